@@ -1,17 +1,40 @@
-import pyautogui
+from ..config.config import config
+from ..metrics import metrics
+from .cursor_backends import CursorBackend, create_cursor_backend
+
+from typing import Optional, Tuple
+
+BACKEND = config.get("CursorAdapter", "BACKEND")
+COALESCE_MOVES = config.getboolean("CursorAdapter", "COALESCE_MOVES")
 
 class CursorAdapter:
-    def __init__(self):
-        self.screen_width, self.screen_height = pyautogui.size()
+    context_key = "mouse_controller"  # Context key the mouse interface looks the adapter up by
+
+    def __init__(self, backend: CursorBackend = None, coalesce_moves: bool = COALESCE_MOVES):
+        self.backend = backend if backend is not None else create_cursor_backend(BACKEND)
+        self.screen_width, self.screen_height = self.backend.size()
         self.is_mouse_down = False
 
+        # With coalescing, move_norm only records the target; flush() issues the latest one.
+        # The InterfaceManager flushes once per frame, and button actions flush first.
+        self.coalesce_moves = coalesce_moves
+        self._pending_move: Optional[Tuple[int, int]] = None
+        self._last_move: Optional[Tuple[int, int]] = None
+
+        self.moves_issued = 0
+        self.moves_coalesced = 0  # Superseded within a frame or equal to the last issued position
+
     def printRange(self) -> tuple[int, int]:
         print(f"Screen size: ({self.screen_width}, {self.screen_height})")
         return self.screen_width, self.screen_height
 
     def get_mouse_position(self) -> tuple[int, int]:
-        return pyautogui.position()
+        return self.backend.position()
 
+    def get_stats(self) -> dict:
+        return {"backend": self.backend.name, "moves_issued": self.moves_issued, "moves_coalesced": self.moves_coalesced}
+
+    @metrics.timed("adapter", "cursor.move_norm")
     def move_norm(self, x: float, y: float) -> None:
         orig_x, orig_y = x, y
         clamped = False
@@ -24,30 +47,53 @@ class CursorAdapter:
         if clamped:
             print(f"[Cursor Adapter] Warning: move_norm received out-of-bounds values ({orig_x:.4f}, {orig_y:.4f}), clamped to ({x:.4f}, {y:.4f})")
 
-        px = int(x * self.screen_width)
-        py = int(y * self.screen_height)
-        pyautogui.moveTo(px, py)
+        px = min(int(x * self.screen_width), self.screen_width - 1)
+        py = min(int(y * self.screen_height), self.screen_height - 1)
+
+        if self.coalesce_moves:
+            if self._pending_move is not None:
+                self.moves_coalesced += 1
+            self._pending_move = (px, py)
+        else:
+            self._move_to(px, py)
+
+    @metrics.timed("adapter", "cursor.flush")
+    def flush(self) -> None:
+        if self._pending_move is not None:
+            px, py = self._pending_move
+            self._pending_move = None
+            self._move_to(px, py)
 
+    def _move_to(self, px: int, py: int) -> None:
+        if (px, py) == self._last_move:
+            self.moves_coalesced += 1
+            return
+        self.backend.move_to(px, py)
+        self._last_move = (px, py)
+        self.moves_issued += 1
+
+    @metrics.timed("adapter", "cursor.click_once")
     def click_once(self, button: str = "left") -> None:
-        pyautogui.click(button=button)
+        self.flush()  # Click where the cursor was last sent
+        self.backend.click(button)
 
     def double_click(self, button: str = "left", interval: float = 0.25) -> None:
-        pyautogui.doubleClick(button=button, interval=interval)
+        self.flush()
+        self.backend.click(button, clicks=2, interval=interval)
 
     def mouse_down(self, button: str = "left") -> None:
-        pyautogui.mouseDown(button=button)
+        self.flush()
+        self.backend.button(button, True)
         self.is_mouse_down = True
 
     def mouse_up(self, button: str = "left") -> None:
-        pyautogui.mouseUp(button=button)
+        self.flush()
+        self.backend.button(button, False)
         self.is_mouse_down = False
 
     def scroll(self, dx: int = 0, dy: int = 0) -> None:
-        # pyautogui.scroll scrolls vertically; horizontal scroll is OS-dependent
-        if dy != 0:
-            pyautogui.scroll(dy)
-        if dx != 0:
-            try:
-                pyautogui.hscroll(dx)
-            except AttributeError:
-                pass  # hscroll may not be available on all platforms
\ No newline at end of file
+        self.backend.scroll(dx, dy)
+
+    def close(self) -> None:
+        self.flush()
+        self.backend.close()
@@ -0,0 +1,219 @@
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+BUTTONS = ("left", "middle", "right")
+
+class CursorBackend(ABC):
+    """Issues cursor moves, button presses and scrolls to the OS in screen pixels."""
+    name: str
+
+    @abstractmethod
+    def size(self) -> Tuple[int, int]:
+        ...
+
+    @abstractmethod
+    def position(self) -> Tuple[int, int]:
+        ...
+
+    @abstractmethod
+    def move_to(self, x: int, y: int) -> None:
+        ...
+
+    @abstractmethod
+    def button(self, button: str, down: bool) -> None:
+        ...
+
+    @abstractmethod
+    def scroll(self, dx: int = 0, dy: int = 0) -> None:
+        # Positive dy scrolls up, positive dx scrolls right, in wheel clicks
+        ...
+
+    def click(self, button: str = "left", clicks: int = 1, interval: float = 0.0) -> None:
+        for i in range(clicks):
+            if i and interval > 0:
+                time.sleep(interval)
+            self.button(button, True)
+            self.button(button, False)
+
+    def close(self) -> None:
+        pass
+
+class PyAutoGUIBackend(CursorBackend):
+    # Portable fallback. _pause=False skips the pyautogui.PAUSE sleep (0.1 s by default) after every call
+    name = "pyautogui"
+
+    def __init__(self) -> None:
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def size(self) -> Tuple[int, int]:
+        return tuple(self.pyautogui.size())
+
+    def position(self) -> Tuple[int, int]:
+        return tuple(self.pyautogui.position())
+
+    def move_to(self, x: int, y: int) -> None:
+        self.pyautogui.moveTo(x, y, _pause=False)
+
+    def button(self, button: str, down: bool) -> None:
+        if down:
+            self.pyautogui.mouseDown(button=button, _pause=False)
+        else:
+            self.pyautogui.mouseUp(button=button, _pause=False)
+
+    def click(self, button: str = "left", clicks: int = 1, interval: float = 0.0) -> None:
+        self.pyautogui.click(button=button, clicks=clicks, interval=interval, _pause=False)
+
+    def scroll(self, dx: int = 0, dy: int = 0) -> None:
+        if dy != 0:
+            self.pyautogui.scroll(dy, _pause=False)
+        if dx != 0:
+            try:
+                self.pyautogui.hscroll(dx, _pause=False)
+            except AttributeError:
+                pass  # hscroll may not be available on all platforms
+
+class Win32Backend(CursorBackend):
+    # SetCursorPos/mouse_event through ctypes: one user32 call per action
+    name = "win32"
+
+    _MOUSEEVENTF = {
+        ("left", True): 0x0002, ("left", False): 0x0004,
+        ("right", True): 0x0008, ("right", False): 0x0010,
+        ("middle", True): 0x0020, ("middle", False): 0x0040,
+    }
+    _MOUSEEVENTF_WHEEL = 0x0800
+    _MOUSEEVENTF_HWHEEL = 0x1000
+
+    def __init__(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.user32 = ctypes.windll.user32
+        self.user32.SetProcessDPIAware()  # Physical pixels, as pyautogui does on import
+        self._point = wintypes.POINT()
+
+    def size(self) -> Tuple[int, int]:
+        return self.user32.GetSystemMetrics(0), self.user32.GetSystemMetrics(1)
+
+    def position(self) -> Tuple[int, int]:
+        self.user32.GetCursorPos(self.ctypes.byref(self._point))
+        return self._point.x, self._point.y
+
+    def move_to(self, x: int, y: int) -> None:
+        self.user32.SetCursorPos(x, y)
+
+    def button(self, button: str, down: bool) -> None:
+        self.user32.mouse_event(self._MOUSEEVENTF[(button, down)], 0, 0, 0, 0)
+
+    def scroll(self, dx: int = 0, dy: int = 0) -> None:
+        # Same units as pyautogui.scroll on Windows
+        if dy != 0:
+            self.user32.mouse_event(self._MOUSEEVENTF_WHEEL, 0, 0, dy, 0)
+        if dx != 0:
+            self.user32.mouse_event(self._MOUSEEVENTF_HWHEEL, 0, 0, dx, 0)
+
+class XlibBackend(CursorBackend):
+    # XTEST fake input on one long-lived display connection (python-xlib, Linux/X11)
+    name = "xlib"
+
+    _BUTTON_CODES = {"left": 1, "middle": 2, "right": 3}
+
+    def __init__(self) -> None:
+        from Xlib import X, display
+        from Xlib.ext import xtest
+        self.X = X
+        self.xtest = xtest
+        self.display = display.Display()
+        self.screen = self.display.screen()
+
+    def size(self) -> Tuple[int, int]:
+        return self.screen.width_in_pixels, self.screen.height_in_pixels
+
+    def position(self) -> Tuple[int, int]:
+        pointer = self.screen.root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def move_to(self, x: int, y: int) -> None:
+        self.xtest.fake_input(self.display, self.X.MotionNotify, x=x, y=y)
+        self.display.flush()
+
+    def button(self, button: str, down: bool) -> None:
+        self.xtest.fake_input(self.display, self.X.ButtonPress if down else self.X.ButtonRelease, self._BUTTON_CODES[button])
+        self.display.flush()
+
+    def scroll(self, dx: int = 0, dy: int = 0) -> None:
+        # X11 scrolls with buttons 4/5 (up/down) and 6/7 (left/right), one press per click
+        for code, clicks in ((4 if dy > 0 else 5, abs(dy)), (7 if dx > 0 else 6, abs(dx))):
+            for _ in range(clicks):
+                self.xtest.fake_input(self.display, self.X.ButtonPress, code)
+                self.xtest.fake_input(self.display, self.X.ButtonRelease, code)
+        self.display.flush()
+
+    def close(self) -> None:
+        self.display.close()
+
+class NullCursorBackend(CursorBackend):
+    # Tracks the position without touching the OS; for headless runs and benchmarks
+    name = "null"
+
+    def __init__(self, screen_size: Tuple[int, int] = (1920, 1080)) -> None:
+        self.screen_size = screen_size
+        self.x, self.y = screen_size[0] // 2, screen_size[1] // 2
+
+    def size(self) -> Tuple[int, int]:
+        return self.screen_size
+
+    def position(self) -> Tuple[int, int]:
+        return self.x, self.y
+
+    def move_to(self, x: int, y: int) -> None:
+        self.x, self.y = x, y
+
+    def button(self, button: str, down: bool) -> None:
+        pass
+
+    def scroll(self, dx: int = 0, dy: int = 0) -> None:
+        pass
+
+class RecordingCursorBackend(NullCursorBackend):
+    # Keeps every action as a tuple, e.g. ("move", x, y), ("button", "left", True), ("scroll", dx, dy)
+    name = "recording"
+
+    def __init__(self, screen_size: Tuple[int, int] = (1920, 1080)) -> None:
+        super().__init__(screen_size)
+        self.actions: List[tuple] = []
+
+    def move_to(self, x: int, y: int) -> None:
+        super().move_to(x, y)
+        self.actions.append(("move", x, y))
+
+    def button(self, button: str, down: bool) -> None:
+        self.actions.append(("button", button, down))
+
+    def scroll(self, dx: int = 0, dy: int = 0) -> None:
+        self.actions.append(("scroll", dx, dy))
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (PyAutoGUIBackend, Win32Backend, XlibBackend, NullCursorBackend, RecordingCursorBackend)
+}
+
+def create_cursor_backend(name: str = "auto") -> CursorBackend:
+    if name != "auto":
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown cursor backend '{name}'. Expected 'auto' or one of {list(BACKENDS)}.")
+        return BACKENDS[name]()
+
+    # Direct backends first; pyautogui covers everything else (e.g. macOS)
+    if sys.platform == "win32":
+        return Win32Backend()
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        try:
+            return XlibBackend()
+        except Exception as e:
+            print(f"[Cursor Adapter] Xlib backend unavailable ({type(e).__name__}: {e}), falling back to pyautogui")
+    return PyAutoGUIBackend()
@@ -0,0 +1,171 @@
+import threading
+from typing import List
+
+from .esp32_serial import (
+    ACK_BAD_COMMAND, ACK_BAD_CRC, ACK_OK, LIGHT_OFF, LIGHT_ON, LIGHT_TOGGLE, NUM_LEDS, OP_ACK, OP_LED_MASK,
+    OP_LED_SET, OP_LED_TOGGLE, OP_LIGHT, OP_TEXT, OP_THROTTLE, PROTOCOL_VERSION, FrameDecoder, decode_commands, encode_frame,
+)
+
+class ESP32Emulator:
+    """In-process stand-in for an ESP32 board behind a pyserial-like interface.
+
+    Understands the text commands of both firmwares, the READY handshake, PROTO negotiation
+    and, once negotiated, binary frames (answered with ACK frames). Replies are queued and
+    read back with readline()/read(), so ESP32SerialAdapter can run without hardware.
+    """
+
+    def __init__(self, name: str = "ESP32-Emulator", binary_support: bool = True, timeout: float = 1.0) -> None:
+        self.name = name
+        self.binary_support = binary_support
+        self.timeout = timeout
+        self.is_open = True
+
+        self.led_states = [False] * NUM_LEDS
+        self.throttle = 0
+        self.light_on = False
+
+        self.binary = False
+        self.ready = False
+        self.received_lines: List[str] = []
+        self.received_frames = 0
+        self.received_commands = 0
+        self.writes = 0
+        self.bytes_received = 0
+
+        self._text_buffer = bytearray()
+        self._decoder = FrameDecoder()
+        self._rx = bytearray()  # Host-bound bytes
+        self._condition = threading.Condition()
+
+    # pyserial-like interface
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._rx)
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise ConnectionError(f"{self.name} is disconnected.")
+        self.writes += 1
+        self.bytes_received += len(data)
+        if self.binary:
+            self._receive_binary(data)
+        else:
+            self._receive_text(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def readline(self) -> bytes:
+        with self._condition:
+            self._condition.wait_for(lambda: b"\n" in self._rx or not self.is_open, timeout=self.timeout)
+            end = self._rx.find(b"\n")
+            end = len(self._rx) if end < 0 else end + 1
+            line = bytes(self._rx[:end])
+            del self._rx[:end]
+            return line
+
+    def read(self, size: int = 1) -> bytes:
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._rx) >= size or not self.is_open, timeout=self.timeout)
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+
+    def reset_input_buffer(self) -> None:
+        with self._condition:
+            self._rx.clear()
+
+    def close(self) -> None:
+        with self._condition:
+            self.is_open = False
+            self._condition.notify_all()
+
+    # Board behaviour
+
+    def get_led_mask(self) -> int:
+        return sum(1 << i for i, state in enumerate(self.led_states) if state)
+
+    def _reply(self, data: bytes) -> None:
+        with self._condition:
+            self._rx.extend(data)
+            self._condition.notify_all()
+
+    def _println(self, line: str) -> None:
+        self._reply((line + "\r\n").encode("utf-8"))
+
+    def _receive_text(self, data: bytes) -> None:
+        self._text_buffer.extend(data)
+        while b"\n" in self._text_buffer:
+            end = self._text_buffer.index(b"\n")
+            line = self._text_buffer[:end].decode("utf-8").strip()
+            del self._text_buffer[:end + 1]
+            self.received_lines.append(line)
+            self.handle_text(line)
+
+    def handle_text(self, line: str) -> None:
+        if not self.ready:
+            # Like establishSerialConnection(): everything before READY is ignored
+            if line == "READY":
+                self.ready = True
+                self._println("READY_ACK")
+            return
+
+        if line == f"PROTO {PROTOCOL_VERSION}" and self.binary_support:
+            self._println(f"PROTO_ACK {PROTOCOL_VERSION}")
+            self.binary = True
+            return
+
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == "LED" and parts[1] in ("H", "L", "T") and parts[2].isdigit():
+            index = int(parts[2])
+            if index >= NUM_LEDS:
+                self._println("Invalid LED index.")
+            elif parts[1] == "T":
+                self.led_states[index] = not self.led_states[index]
+                self._println(f"LED{index} toggled to {'HIGH' if self.led_states[index] else 'LOW'}")
+            else:
+                self.led_states[index] = parts[1] == "H"
+                self._println(f"LED{index} is {'HIGH' if self.led_states[index] else 'LOW'}")
+        elif len(parts) == 2 and parts[0] == "THROTTLE" and parts[1].lstrip("-").isdigit():
+            self.throttle = min(max(int(parts[1]), 0), 100)
+            self._println(f"Throttle set to {parts[1]}%")
+        elif line in ("LIGHT ON", "LIGHT OFF", "LIGHT TOGGLE"):
+            self.light_on = {"LIGHT ON": True, "LIGHT OFF": False}.get(line, not self.light_on)
+            self._println(f"LIGHT is {'ON' if self.light_on else 'OFF'}")
+        else:
+            self._println("Unknown command.")
+
+    def _receive_binary(self, data: bytes) -> None:
+        crc_errors = self._decoder.crc_errors
+        for seq, body in self._decoder.feed(data):
+            self.received_frames += 1
+            try:
+                commands = decode_commands(body)
+            except ValueError:
+                self._reply(encode_frame(0, [(OP_ACK, bytes([seq, ACK_BAD_COMMAND]))]))
+                continue
+
+            for opcode, payload in commands:
+                self.received_commands += 1
+                self.handle_command(opcode, payload)
+            self._reply(encode_frame(0, [(OP_ACK, bytes([seq, ACK_OK]))]))
+
+        if self._decoder.crc_errors > crc_errors:
+            # The sequence number of a corrupted frame cannot be trusted; report it as 0xFF
+            self._reply(encode_frame(0, [(OP_ACK, bytes([0xFF, ACK_BAD_CRC]))]))
+
+    def handle_command(self, opcode: int, payload: bytes) -> None:
+        if opcode == OP_LED_SET and payload[0] < NUM_LEDS:
+            self.led_states[payload[0]] = bool(payload[1])
+        elif opcode == OP_LED_MASK:
+            self.led_states = [bool(payload[0] >> i & 1) for i in range(NUM_LEDS)]
+        elif opcode == OP_LED_TOGGLE and payload[0] < NUM_LEDS:
+            self.led_states[payload[0]] = not self.led_states[payload[0]]
+        elif opcode == OP_THROTTLE:
+            self.throttle = min(payload[0], 100)
+        elif opcode == OP_LIGHT:
+            self.light_on = {LIGHT_OFF: False, LIGHT_ON: True, LIGHT_TOGGLE: not self.light_on}.get(payload[0], self.light_on)
+        elif opcode == OP_TEXT:
+            self.handle_text(payload[1:].decode("utf-8"))
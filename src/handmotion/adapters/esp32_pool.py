@@ -0,0 +1,217 @@
+from ..config.config import config
+from .esp32_serial import ESP32SerialAdapter
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Optional
+
+DEVICES = [name.strip() for name in config.get("ESP32Pool", "DEVICES").split(",") if name.strip()]
+HEALTH_CHECK_INTERVAL_S = config.getfloat("ESP32Pool", "HEALTH_CHECK_INTERVAL_S")
+RECONNECT_BACKOFF_S = config.getfloat("ESP32Pool", "RECONNECT_BACKOFF_S")
+MAX_RECONNECT_BACKOFF_S = config.getfloat("ESP32Pool", "MAX_RECONNECT_BACKOFF_S")
+MAX_CONSECUTIVE_TIMEOUTS = config.getint("ESP32Pool", "MAX_CONSECUTIVE_TIMEOUTS")
+
+DEVICE_SECTION_PREFIX = "ESP32Device:"  # One [ESP32Device:<name>] section per board in DEVICES
+
+DeviceState = Literal["connecting", "connected", "disconnected", "stopped"]
+
+@dataclass(slots=True)
+class PooledDevice:
+    adapter: ESP32SerialAdapter
+    capabilities: List[str]
+    state: DeviceState = "disconnected"
+    connects: int = 0
+    reconnects: int = 0
+    last_error: Optional[str] = None
+    connected_at: Optional[float] = None
+    thread: Optional[threading.Thread] = field(default=None, repr=False)
+
+def device_from_config(name: str) -> PooledDevice:
+    section = DEVICE_SECTION_PREFIX + name
+    if not config.has_section(section):
+        raise ValueError(f"ESP32 device '{name}' is listed in [ESP32Pool] DEVICES but has no [{section}] section.")
+
+    options = {}
+    if config.has_option(section, "BAUDRATE"):
+        options["baud"] = config.getint(section, "BAUDRATE")
+    if config.has_option(section, "PROTOCOL"):
+        options["protocol"] = config.get(section, "PROTOCOL")
+
+    adapter = ESP32SerialAdapter(name=name, port=config.get(section, "PORT"), **options)
+    capabilities = [c.strip().lower() for c in config.get(section, "CAPABILITIES", fallback="").split(",") if c.strip()]
+    return PooledDevice(adapter, capabilities)
+
+class ESP32AdapterPool:
+    """Several ESP32 boards behind one object, each kept connected in the background.
+
+    Boards connect concurrently, one thread each, so a slow or missing board delays neither the
+    others nor the frame loop. A health check watches every connected board (closed port, write
+    or read errors, MAX_CONSECUTIVE_TIMEOUTS unanswered commands) and reconnects it with
+    exponential backoff; while a board is down, writes to it are dropped instead of raising.
+    Interfaces get their board with context_for(device name or capability).
+    """
+
+    def __init__(self, devices: Optional[Dict[str, PooledDevice]] = None,
+                 health_check_interval_s: float = HEALTH_CHECK_INTERVAL_S) -> None:
+        if devices is None:
+            devices = {name: device_from_config(name) for name in DEVICES}
+        self.devices = devices
+        for device in devices.values():
+            device.adapter.drop_while_disconnected = True
+        self.health_check_interval_s = health_check_interval_s
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    # Routing
+
+    def get(self, name: str) -> ESP32SerialAdapter:
+        if name not in self.devices:
+            raise KeyError(f"No ESP32 device named '{name}'. Known devices: {list(self.devices)}")
+        return self.devices[name].adapter
+
+    def for_capability(self, capability: str) -> List[ESP32SerialAdapter]:
+        capability = capability.lower()
+        return [device.adapter for device in self.devices.values() if capability in device.capabilities]
+
+    def route(self, target: str) -> ESP32SerialAdapter:
+        # Device name first, then the first board with that capability
+        if target in self.devices:
+            return self.devices[target].adapter
+        adapters = self.for_capability(target)
+        if not adapters:
+            raise KeyError(f"No ESP32 device named or capable of '{target}'. Known devices: {list(self.devices)}")
+        return adapters[0]
+
+    def context_for(self, target: str) -> dict:
+        # Adapter objects survive reconnects, so interfaces can hold on to them
+        return {"esp32_serial_adapter": self.route(target)}
+
+    def write_line(self, target: str, s: str, key: str = None) -> None:
+        self.route(target).write_line(s, key)
+
+    # Lifecycle
+
+    def start(self) -> None:
+        self._stop.clear()
+        for device in self.devices.values():
+            self._connect_in_background(device)
+
+        self._health_thread = threading.Thread(target=self._health_loop, name="ESP32PoolHealth", daemon=True)
+        self._health_thread.start()
+
+    def wait_until_connected(self, timeout_s: float) -> bool:
+        # Optional at startup; the frame loop runs fine with boards still connecting
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            if all(device.state == "connected" for device in self.devices.values()):
+                return True
+            time.sleep(0.05)
+        return all(device.state == "connected" for device in self.devices.values())
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=1.0)
+            self._health_thread = None
+
+        for device in self.devices.values():
+            if device.thread is not None:
+                device.thread.join(timeout=1.0)
+            if device.state == "connected":
+                device.adapter.close_serial()
+            device.state = "stopped"
+
+    # Health
+
+    def get_health(self) -> Dict[str, dict]:
+        health = {}
+        for name, device in self.devices.items():
+            adapter = device.adapter
+            health[name] = {
+                "state": device.state,
+                "port": adapter.port,
+                "protocol": adapter.active_protocol,
+                "capabilities": device.capabilities,
+                "connects": device.connects,
+                "reconnects": device.reconnects,
+                "uptime_s": time.monotonic() - device.connected_at if device.state == "connected" else 0.0,
+                "dropped_while_disconnected": adapter.dropped_while_disconnected,
+                "last_error": device.last_error,
+                "writer": adapter.writer.get_stats() if adapter.writer is not None else None,
+                "reader": adapter.reader.get_stats() if adapter.reader is not None else None,
+            }
+        return health
+
+    def print_health(self) -> None:
+        for name, h in self.get_health().items():
+            rtt = f", rtt p50 {h['reader']['rtt_p50_ms']:.1f} ms" if h["reader"] else ""
+            error = f", last error: {h['last_error']}" if h["last_error"] else ""
+            print(f"[ESP32Pool] {name} ({h['port']}): {h['state']}, {h['reconnects']} reconnects{rtt}{error}")
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_check_interval_s):
+            for device in self.devices.values():
+                if device.state != "connected":
+                    continue
+                problem = self._link_problem(device)
+                if problem is not None:
+                    print(f"[ESP32Pool] {device.adapter.name} link lost ({problem}), reconnecting.")
+                    device.last_error = problem
+                    device.reconnects += 1
+                    self._connect_in_background(device)
+
+    def _link_problem(self, device: PooledDevice) -> Optional[str]:
+        adapter = device.adapter
+        if not adapter.is_connected():
+            return "port closed"
+
+        # Every connection starts a new writer and reader, so any error counted is from this link
+        if adapter.writer is not None and adapter.writer.errors:
+            return f"write failed: {adapter.writer.last_error}"
+        if adapter.reader is not None:
+            if adapter.reader.read_errors:
+                return f"read failed: {adapter.reader.last_error}"
+            if adapter.reader.consecutive_timeouts >= MAX_CONSECUTIVE_TIMEOUTS:
+                return f"{adapter.reader.consecutive_timeouts} commands unanswered"
+        return None
+
+    # Connecting
+
+    def _connect_in_background(self, device: PooledDevice) -> None:
+        with self._lock:
+            if device.state == "connecting":
+                return
+            device.state = "connecting"
+        device.thread = threading.Thread(target=self._connect, args=(device,), name=f"{device.adapter.name}Connect", daemon=True)
+        device.thread.start()
+
+    def _connect(self, device: PooledDevice) -> None:
+        adapter = device.adapter
+        backoff_s = RECONNECT_BACKOFF_S
+
+        while not self._stop.is_set():
+            try:
+                if adapter.serial_connection is not None:
+                    adapter.close_serial()
+                adapter.open_serial()
+                adapter.establish_connection_handshake()
+            except Exception as e:
+                device.last_error = str(e)
+                print(f"[ESP32Pool] {adapter.name} on {adapter.port} failed to connect: {e}. Retrying in {backoff_s:g} s.")
+                if self._stop.wait(backoff_s):
+                    break
+                backoff_s = min(backoff_s * 2, MAX_RECONNECT_BACKOFF_S)
+                continue
+
+            device.connects += 1
+            device.connected_at = time.monotonic()
+            with self._lock:
+                device.state = "connected"
+            print(f"[ESP32Pool] {adapter.name} connected on {adapter.port}.")
+            return
+
+        with self._lock:
+            device.state = "stopped"
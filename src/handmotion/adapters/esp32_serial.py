@@ -1,20 +1,160 @@
 from ..config.config import config
+from ..metrics import metrics
+from .serial_writer import CoalescingSerialWriter
 
+import binascii
+import struct
 import time
+from typing import List, Tuple
 import serial.tools.list_ports as lp
 import serial
 
 DEFAULT_PORT = config.get("ESP32Adapter", "PORT")
 DEFAULT_BAUD = config.getint("ESP32Adapter", "BAUDRATE")
+ASYNC_WRITES = config.getboolean("ESP32Adapter", "ASYNC_WRITES")
+PROTOCOL = config.get("ESP32Adapter", "PROTOCOL")
+READ_REPLIES = config.getboolean("ESP32Adapter", "READ_REPLIES")
+HANDSHAKE_TIMEOUT_S = config.getfloat("ESP32Adapter", "HANDSHAKE_TIMEOUT_S")
+
+EMULATOR_PORT = "EMULATOR"  # PORT value that connects to the in-process ESP32Emulator
+
+# Binary protocol, version 1. One frame per write:
+#   SYNC (0xA5) | LEN (u8, bytes from SEQ to the last command) | SEQ (u8) | commands... | CRC16 (u16 LE)
+# Each command is OPCODE (u8) followed by a fixed-size payload (TEXT: u8 length + bytes).
+# CRC16 is CRC-16/CCITT-FALSE over SEQ and the commands.
+PROTOCOL_VERSION = "BIN1"
+FRAME_SYNC = 0xA5
+MAX_FRAME_BODY = 255
+
+OP_LED_SET = 0x01  # index, state
+OP_LED_MASK = 0x02  # bit i = LED i
+OP_LED_TOGGLE = 0x03  # index
+OP_THROTTLE = 0x04  # percent
+OP_LIGHT = 0x05  # LIGHT_OFF | LIGHT_ON | LIGHT_TOGGLE
+OP_TEXT = 0x7E  # length-prefixed text command, for anything without an opcode
+OP_ACK = 0x7F  # board -> host: seq, status
+
+LIGHT_OFF, LIGHT_ON, LIGHT_TOGGLE = range(3)
+ACK_OK, ACK_BAD_CRC, ACK_BAD_COMMAND = range(3)
+
+PAYLOAD_SIZES = {OP_LED_SET: 2, OP_LED_MASK: 1, OP_LED_TOGGLE: 1, OP_THROTTLE: 1, OP_LIGHT: 1, OP_ACK: 2}
+NUM_LEDS = 4
+LED_MASK_BITS = 8 * PAYLOAD_SIZES[OP_LED_MASK]  # LED indices the binary LED opcodes can address
+
+Command = Tuple[int, bytes]
+
+def crc16(data: bytes) -> int:
+    # binascii.crc_hqx is CRC-16/CCITT; an initial value of 0xFFFF makes it CCITT-FALSE
+    return binascii.crc_hqx(data, 0xFFFF)
+
+def encode_frame(seq: int, commands: List[Command]) -> bytes:
+    body = bytes([seq & 0xFF]) + b"".join(bytes([opcode]) + payload for opcode, payload in commands)
+    if len(body) > MAX_FRAME_BODY:
+        raise ValueError(f"Frame body of {len(body)} bytes exceeds {MAX_FRAME_BODY}.")
+    return bytes([FRAME_SYNC, len(body)]) + body + struct.pack("<H", crc16(body))
+
+def decode_commands(data: bytes) -> List[Command]:
+    commands = []
+    i = 0
+    while i < len(data):
+        opcode = data[i]
+        if opcode == OP_TEXT:
+            if i + 1 >= len(data):
+                raise ValueError(f"Truncated payload for opcode 0x{opcode:02X}.")
+            size = 1 + data[i + 1]
+        elif opcode in PAYLOAD_SIZES:
+            size = PAYLOAD_SIZES[opcode]
+        else:
+            raise ValueError(f"Unknown opcode 0x{opcode:02X}.")
+        if i + 1 + size > len(data):
+            raise ValueError(f"Truncated payload for opcode 0x{opcode:02X}.")
+        commands.append((opcode, bytes(data[i + 1:i + 1 + size])))
+        i += 1 + size
+    return commands
+
+class FrameDecoder:
+    """Incremental frame parser; bytes may arrive split across reads."""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        # Returns (seq, command bytes) for each complete, CRC-valid frame
+        self.buffer.extend(data)
+        frames = []
+        while True:
+            start = self.buffer.find(FRAME_SYNC)
+            if start < 0:
+                self.buffer.clear()
+                return frames
+            del self.buffer[:start]
+
+            if len(self.buffer) < 2 or len(self.buffer) < 2 + self.buffer[1] + 2:
+                return frames
+
+            length = self.buffer[1]
+            body = bytes(self.buffer[2:2 + length])
+            (crc,) = struct.unpack_from("<H", self.buffer, 2 + length)
+            if length == 0 or crc != crc16(body):
+                # Not a frame boundary (or corrupted): resynchronize on the next sync byte
+                self.crc_errors += 1
+                del self.buffer[:1]
+                continue
+
+            del self.buffer[:2 + length + 2]
+            frames.append((body[0], body[1:]))
+
+def text_to_command(line: str) -> Command:
+    # Translate the text commands the interfaces send into binary commands
+    parts = line.split()
+    try:
+        if len(parts) == 3 and parts[0] == "LED" and parts[1] in ("H", "L", "T"):
+            index = int(parts[2])
+            if not 0 <= index < LED_MASK_BITS:
+                raise ValueError(f"LED index {index} does not fit the LED mask.")  # Sent as text below
+            if parts[1] == "T":
+                return (OP_LED_TOGGLE, bytes([index]))
+            return (OP_LED_SET, bytes([index, parts[1] == "H"]))
+        if len(parts) == 2 and parts[0] == "THROTTLE":
+            return (OP_THROTTLE, bytes([min(max(int(parts[1]), 0), 100)]))
+        if len(parts) == 2 and parts[0] == "LIGHT" and parts[1] in ("OFF", "ON", "TOGGLE"):
+            return (OP_LIGHT, bytes([("OFF", "ON", "TOGGLE").index(parts[1])]))
+    except ValueError:
+        pass
+
+    encoded = line.encode("utf-8")
+    if len(encoded) > 255:
+        raise ValueError(f"Text command is too long for a binary frame: '{line}'")
+    return (OP_TEXT, bytes([len(encoded)]) + encoded)
 
 class ESP32SerialAdapter:
+    context_key = "esp32_serial_adapter"  # Context key the ESP32 interfaces look the adapter up by
+
+    def __init__(self, name: str, port: str = DEFAULT_PORT, baud: int = DEFAULT_BAUD, async_writes: bool = ASYNC_WRITES,
+                 protocol: str = PROTOCOL, read_replies: bool = READ_REPLIES) -> None:
+        if protocol not in ("text", "binary", "auto"):
+            raise ValueError(f"Unknown protocol '{protocol}'. Expected 'text', 'binary' or 'auto'.")
 
-    def __init__(self, name: str, port: str = DEFAULT_PORT, baud: int = DEFAULT_BAUD) -> None:
         self.name = name
         self.port = port
         self.baud = baud
         self.serial_connection = None
-    
+        self.async_writes = async_writes
+        self.writer = None
+        self.read_replies = read_replies
+        self.reader = None
+        self.handshake_complete = False
+        # Set by ESP32AdapterPool: while the link is down, writes are dropped and counted instead of raising
+        self.drop_while_disconnected = False
+        self.dropped_while_disconnected = 0
+
+        # Requested protocol; active_protocol is what the board agreed to in the handshake
+        self.protocol = protocol
+        self.active_protocol = "text"
+        self.seq = 0
+        self.led_mask = 0  # Host-side copy of the LED states; all LEDs start LOW on the boards
+
     def list_ports(self) -> None:
         ports = lp.comports()
         print("Available serial ports:")
@@ -24,42 +164,143 @@ class ESP32SerialAdapter:
     def set_port(self, port: str) -> None:
         self.port = port
 
+    def is_connected(self) -> bool:
+        return self.handshake_complete and self.serial_connection is not None and self.serial_connection.is_open
+
     def open_serial(self) -> None:
-        self.serial_connection = serial.Serial(self.port, self.baud, timeout=1)
-        time.sleep(2)  # Wait for the connection to establish
+        self.handshake_complete = False
+        if self.port == EMULATOR_PORT:
+            from .esp32_emulator import ESP32Emulator
+            self.serial_connection = ESP32Emulator(name=self.name)
+        else:
+            self.serial_connection = serial.Serial(self.port, self.baud, timeout=1)
+            time.sleep(2)  # Wait for the connection to establish
         print(f"Connected to {self.port} at {self.baud} baud.")
 
+        if self.async_writes:
+            self.writer = CoalescingSerialWriter(self._write_lines, name=self.name)
+            self.writer.start()
+
     def close_serial(self) -> None:
+        self.handshake_complete = False
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+        if self.reader is not None:
+            self.reader.stop()
+            self.reader = None
         if self.serial_connection and self.serial_connection.is_open:
             self.serial_connection.flush()
             self.serial_connection.close()
         print("Serial connection closed.")
 
-    def establish_connection_handshake(self) -> None:
-        
+    def establish_connection_handshake(self, timeout_s: float = HANDSHAKE_TIMEOUT_S) -> None:
+
         if not self.serial_connection.is_open:
             raise ConnectionError("Serial port is not open.")
-        
-        self.write_line("READY")
+
+        self.active_protocol = "text"
+        self._write_bytes(b"READY\n")
+        deadline = time.monotonic() + timeout_s
         response = self.serial_connection.readline().decode('utf-8').strip()
         while response != "READY_ACK":
+            if time.monotonic() > deadline:
+                raise ConnectionError(f"{self.name}: no READY_ACK within {timeout_s:g} s.")
             response = self.serial_connection.readline().decode('utf-8').strip()
             print(f"Waiting for READY_ACK, received: {response}")
         print("Received READY_ACK, connection established with ESP32.")
-        
 
-    def write_line(self, s: str) -> None:
+        if self.protocol != "text":
+            self.negotiate_protocol()
+
+        if self.read_replies:
+            # From here on replies are drained continuously instead of piling up in the input buffer
+            from .serial_reader import SerialReader
+            self.reader = SerialReader(self.serial_connection, name=self.name)
+            self.reader.start(binary=self.active_protocol == "binary")
+
+        self.handshake_complete = True
+
+    def negotiate_protocol(self) -> bool:
+        # Boards without binary support answer with their usual "Unknown command" line (or nothing)
+        self._write_bytes(f"PROTO {PROTOCOL_VERSION}\n".encode('utf-8'))
+        response = self.serial_connection.readline().decode('utf-8').strip()
+
+        if response == f"PROTO_ACK {PROTOCOL_VERSION}":
+            self.active_protocol = "binary"
+            print(f"{self.name}: using binary protocol {PROTOCOL_VERSION}.")
+            return True
+
+        if self.protocol == "binary":
+            raise ConnectionError(f"{self.name} does not support binary protocol {PROTOCOL_VERSION} (replied '{response}').")
+        print(f"{self.name}: binary protocol not supported (replied '{response}'), falling back to text.")
+        return False
+
+    @metrics.timed("adapter", "esp32.write_line")
+    def write_line(self, s: str, key: str = None) -> None:
+        # key marks s as the latest value of a setting (e.g. "THROTTLE"): with async writes only
+        # the newest pending value per key is sent, and unchanged values are not resent
+        if self.drop_while_disconnected and not self.is_connected():
+            self.dropped_while_disconnected += 1
+            return
         if not self.serial_connection.is_open:
             raise ConnectionError("Serial port is not open.")
-            
-        self.serial_connection.write((s + "\n").encode('utf-8'))
-        self.serial_connection.flush()
+
+        if self.writer is not None:
+            self.writer.submit(s, key)
+            return
+
+        self._write_lines([s])
         # print(f"Sent to {self.name}: {s}")
 
-    def read_line(self) -> str:
+    def _write_lines(self, lines: List[str]) -> None:
+        # One write per batch: concatenated lines, or a single binary frame
+        if self.active_protocol == "binary":
+            seq = self.seq
+            frame = self.encode_batch(lines)
+            if self.reader is not None:
+                self.reader.track_frame(seq, lines)
+            self._write_bytes(frame)
+        else:
+            if self.reader is not None:
+                self.reader.track_lines(lines)
+            self._write_bytes("".join(line + "\n" for line in lines).encode('utf-8'))
+
+    def encode_batch(self, lines: List[str]) -> bytes:
+        # LED changes in a batch collapse into one LED_MASK built from the host-side LED states
+        commands = []
+        mask_position = None
+        for line in lines:
+            opcode, payload = text_to_command(line)
+            if opcode == OP_LED_SET:
+                index, state = payload
+                self.led_mask = self.led_mask | (1 << index) if state else self.led_mask & ~(1 << index)
+            elif opcode == OP_LED_TOGGLE:
+                self.led_mask ^= 1 << payload[0]
+            else:
+                commands.append((opcode, payload))
+                continue
+            if mask_position is None:
+                mask_position = len(commands)
+                commands.append(None)
+
+        if mask_position is not None:
+            commands[mask_position] = (OP_LED_MASK, bytes([self.led_mask]))
+
+        frame = encode_frame(self.seq, commands)
+        self.seq = (self.seq + 1) & 0xFF
+        return frame
+
+    def _write_bytes(self, data: bytes) -> None:
+        self.serial_connection.write(data)
+        self.serial_connection.flush()
+
+    def read_line(self, timeout_s: float = 1.0) -> str:
+        # Next reply line, or "" on timeout
         if not self.serial_connection.is_open:
             raise ConnectionError("Serial port is not open.")
-        
-        line = self.serial_connection.readline().decode('utf-8').strip()
-        print(f"Received from {self.name}: {line}")
-        return line
\ No newline at end of file
+
+        if self.reader is not None:
+            return self.reader.wait_for_line(timeout_s) or ""
+
+        return self.serial_connection.readline().decode('utf-8').strip()
@@ -0,0 +1,258 @@
+from ..config.config import config
+from ..metrics import metrics
+
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Literal, Optional
+
+from .esp32_serial import ACK_OK, OP_ACK, FrameDecoder, decode_commands
+
+ACK_TIMEOUT_S = config.getfloat("ESP32Adapter", "ACK_TIMEOUT_S")
+READ_POLL_S = 0.05  # Port read timeout while the reader runs; bounds how late timeouts and stop() are noticed
+RTT_WINDOW = 256
+MAX_LINE_BYTES = 1024  # A longer run without a newline is noise and is discarded
+
+ResponseEventType = Literal["ack", "error", "timeout", "unsolicited"]
+
+@dataclass(slots=True)
+class ResponseEvent:
+    type: ResponseEventType
+    commands: List[str]  # Sent lines this event refers to; empty for unsolicited replies
+    reply: Optional[str]
+    rtt_ns: Optional[int]
+
+@dataclass(slots=True)
+class _Pending:
+    key: Optional[str]
+    commands: List[str]
+    sent_ns: int
+
+_LED_REPLY = re.compile(r"^LED(\d+) ")
+
+def command_reply_key(line: str) -> Optional[str]:
+    # Which reply a text command produces; None for commands without a specific reply
+    parts = line.split()
+    if len(parts) == 3 and parts[0] == "LED":
+        return f"LED{parts[2]}"
+    if parts and parts[0] in ("THROTTLE", "LIGHT"):
+        return parts[0]
+    return None
+
+def reply_key(reply: str) -> Optional[str]:
+    # Inverse of command_reply_key for the firmware's reply lines; None for error replies
+    match = _LED_REPLY.match(reply)
+    if match:
+        return f"LED{match.group(1)}"
+    if reply.startswith("Throttle set to"):
+        return "THROTTLE"
+    if reply.startswith("LIGHT is"):
+        return "LIGHT"
+    return None
+
+class SerialReader:
+    """Drains the board's replies on a background thread and matches them to sent commands.
+
+    Text replies are matched by what they refer to (LED index, throttle, light) since the
+    firmware answers every line once and in order; error replies match the oldest command.
+    Binary ACK frames are matched by sequence number. Commands not answered within
+    ack_timeout_s produce a "timeout" event instead of blocking anything.
+    """
+
+    def __init__(self, serial_connection, name: str = "Serial", ack_timeout_s: float = ACK_TIMEOUT_S) -> None:
+        self.serial_connection = serial_connection
+        self.name = name
+        self.ack_timeout_ns = int(ack_timeout_s * 1e9)
+        self.binary = False
+
+        self._text_pending: Deque[_Pending] = deque()
+        self._frame_pending: Dict[int, _Pending] = {}
+        self._lock = threading.Lock()
+        self._decoder = FrameDecoder()
+        self._line_buffer = bytearray()  # Text replies may arrive split across reads, like frames
+        self._listeners: List[Callable[[ResponseEvent], None]] = []
+        self._running = False
+        self._thread = None
+
+        self.lines = deque(maxlen=256)  # Recent reply lines, for read_line()
+        self._lines_available = threading.Condition()
+        self._rtts: Deque[int] = deque(maxlen=RTT_WINDOW)
+
+        self.acked = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.consecutive_timeouts = 0  # Reset by any acknowledgement; a rising count means the board stopped answering
+        self.unsolicited = 0
+        self.read_errors = 0  # I/O failures of the port; a link problem
+        self.protocol_errors = 0  # CRC-valid frames that do not decode; the link itself is fine
+        self.last_error = None
+        self.last_protocol_error = None
+
+    def add_listener(self, listener: Callable[[ResponseEvent], None]) -> None:
+        # Called on the reader thread
+        self._listeners.append(listener)
+
+    def start(self, binary: bool = False) -> None:
+        if self._thread is not None:
+            return
+        self.binary = binary
+        self._previous_timeout = self.serial_connection.timeout
+        self.serial_connection.timeout = READ_POLL_S
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}Reader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._running = False
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        self.serial_connection.timeout = self._previous_timeout
+
+    def track_lines(self, lines: List[str]) -> None:
+        # Text protocol: each line gets its own reply
+        sent_ns = time.perf_counter_ns()
+        with self._lock:
+            for line in lines:
+                self._text_pending.append(_Pending(command_reply_key(line), [line], sent_ns))
+
+    def track_frame(self, seq: int, lines: List[str]) -> None:
+        # Binary protocol: one ACK per frame
+        with self._lock:
+            self._frame_pending[seq] = _Pending(None, lines, time.perf_counter_ns())
+
+    def get_pending_count(self) -> int:
+        return len(self._text_pending) + len(self._frame_pending)
+
+    def get_rtt_stats(self) -> dict:
+        rtts = list(self._rtts)
+        if not rtts:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": len(rtts),
+            "mean_ms": statistics.fmean(rtts) / 1e6,
+            "p50_ms": statistics.median(rtts) / 1e6,
+            "max_ms": max(rtts) / 1e6,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            "acked": self.acked,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "read_errors": self.read_errors,
+            "protocol_errors": self.protocol_errors,
+            "unsolicited": self.unsolicited,
+            "pending": self.get_pending_count(),
+            **{f"rtt_{k}": v for k, v in self.get_rtt_stats().items()},
+        }
+
+    def wait_for_line(self, timeout_s: float) -> Optional[str]:
+        with self._lines_available:
+            if not self._lines_available.wait_for(lambda: self.lines, timeout=timeout_s):
+                return None
+            return self.lines.popleft()
+
+    def _run(self) -> None:
+        while self._running:
+            try:
+                data = self.serial_connection.read(max(self.serial_connection.in_waiting, 1))
+                if self.binary:
+                    for _, body in self._decoder.feed(data):
+                        self._on_frame(body)
+                else:
+                    for line in self._feed_lines(data):
+                        self._on_line(line)
+            except Exception as e:
+                if not self._running or not self.serial_connection.is_open:
+                    return
+                self.read_errors += 1
+                self.last_error = e
+                print(f"[{self.name} Reader] Read failed: {e}")
+                time.sleep(READ_POLL_S)
+
+            self._expire()
+
+    def _feed_lines(self, data: bytes) -> List[str]:
+        # Only newline-terminated replies are complete; a read timeout mid-line keeps the rest buffered
+        self._line_buffer.extend(data)
+        *complete, rest = self._line_buffer.split(b"\n")
+        self._line_buffer = rest if len(rest) <= MAX_LINE_BYTES else bytearray()
+        lines = (raw.decode("utf-8", errors="replace").strip() for raw in complete)
+        return [line for line in lines if line]
+
+    def _on_line(self, line: str) -> None:
+        with self._lines_available:
+            self.lines.append(line)
+            self._lines_available.notify_all()
+
+        key = reply_key(line)
+        with self._lock:
+            match = None
+            for pending in self._text_pending:
+                if key is None or pending.key == key or pending.key is None:
+                    match = pending
+                    break
+            if match is not None:
+                self._text_pending.remove(match)
+
+        if match is None:
+            self.unsolicited += 1
+            self._emit(ResponseEvent("unsolicited", [], line, None))
+        else:
+            self._complete(match, "ack" if key is not None else "error", line)
+
+    def _on_frame(self, body: bytes) -> None:
+        try:
+            commands = decode_commands(body)
+        except ValueError as e:
+            # Unknown opcode or truncated payload: reported, but other frames of this read still count
+            self.protocol_errors += 1
+            self.last_protocol_error = e
+            self._emit(ResponseEvent("error", [], f"Bad frame: {e}", None))
+            return
+
+        for opcode, payload in commands:
+            if opcode != OP_ACK:
+                continue
+            seq, status = payload
+            with self._lock:
+                match = self._frame_pending.pop(seq, None)
+            if match is None:
+                self.unsolicited += 1
+                self._emit(ResponseEvent("unsolicited" if status == ACK_OK else "error", [], f"ACK {seq} {status}", None))
+            else:
+                self._complete(match, "ack" if status == ACK_OK else "error", f"ACK {seq} {status}")
+
+    def _complete(self, pending: _Pending, event_type: ResponseEventType, reply: str) -> None:
+        rtt_ns = time.perf_counter_ns() - pending.sent_ns
+        self.consecutive_timeouts = 0
+        if event_type == "ack":
+            self.acked += 1
+            self._rtts.append(rtt_ns)
+            metrics.observe_ns("adapter", f"{self.name.lower()}.rtt", rtt_ns)
+        else:
+            self.errors += 1
+        self._emit(ResponseEvent(event_type, pending.commands, reply, rtt_ns))
+
+    def _expire(self) -> None:
+        deadline_ns = time.perf_counter_ns() - self.ack_timeout_ns
+        expired = []
+        with self._lock:
+            while self._text_pending and self._text_pending[0].sent_ns < deadline_ns:
+                expired.append(self._text_pending.popleft())
+            for seq in [seq for seq, p in self._frame_pending.items() if p.sent_ns < deadline_ns]:
+                expired.append(self._frame_pending.pop(seq))
+
+        for pending in expired:
+            self.timeouts += 1
+            self.consecutive_timeouts += 1
+            self._emit(ResponseEvent("timeout", pending.commands, None, None))
+
+    def _emit(self, event: ResponseEvent) -> None:
+        for listener in self._listeners:
+            listener(event)
@@ -0,0 +1,150 @@
+from ..config.config import config
+from ..metrics import metrics
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, List
+
+MAX_SEND_RATE_HZ = config.getfloat("ESP32Adapter", "MAX_SEND_RATE_HZ")
+MAX_QUEUE = config.getint("ESP32Adapter", "MAX_QUEUE")
+MAX_BATCH = config.getint("ESP32Adapter", "MAX_BATCH")
+
+class CoalescingSerialWriter:
+    """Sends lines from a background thread so callers never block on the port.
+
+    Lines without a key are queued in order and always sent (e.g. toggles). Lines with a key
+    are state updates: only the newest pending line per key is sent, and a line equal to the
+    last one sent for its key is suppressed. Queued lines go out before keyed updates, up to
+    max_batch lines are handed to write_lines per write, and writes are spaced to at most
+    max_rate_hz.
+    """
+
+    def __init__(self, write_lines: Callable[[List[str]], None], name: str = "Serial",
+                 max_rate_hz: float = MAX_SEND_RATE_HZ, max_queue: int = MAX_QUEUE, max_batch: int = MAX_BATCH) -> None:
+        self.write_lines = write_lines
+        self.name = name
+        self.max_batch = max(max_batch, 1)
+        self.min_interval_ns = int(1e9 / max_rate_hz) if max_rate_hz > 0 else 0
+        self.max_queue = max_queue
+
+        self._queue = deque()
+        self._latest = OrderedDict()  # key -> newest pending line
+        self._last_sent = {}  # key -> last line written
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._last_write_ns = 0
+
+        self.sent = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}Writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain_timeout_s: float = 1.0) -> None:
+        if self._thread is None:
+            return
+        # Give pending lines a chance to go out before the port is closed
+        deadline = time.monotonic() + drain_timeout_s
+        with self._condition:
+            while self.get_queue_depth() and time.monotonic() < deadline:
+                self._condition.wait(timeout=0.01)
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def submit(self, line: str, key: str = None) -> None:
+        with self._condition:
+            if key is None:
+                if len(self._queue) >= self.max_queue:
+                    self._queue.popleft()  # Drop the oldest rather than block the caller
+                    self.dropped += 1
+                self._queue.append(line)
+            else:
+                if key in self._latest:
+                    self.coalesced += 1
+                    del self._latest[key]
+                if self._last_sent.get(key) == line:
+                    self.suppressed += 1
+                else:
+                    self._latest[key] = line
+            self._condition.notify_all()
+
+    def invalidate(self) -> None:
+        # Forget what was sent so the next keyed update goes out even if unchanged (e.g. after reconnecting)
+        with self._condition:
+            self._last_sent.clear()
+
+    def get_queue_depth(self) -> int:
+        return len(self._queue) + len(self._latest)
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {
+                "queue_depth": self.get_queue_depth(),
+                "sent": self.sent,
+                "writes": self.writes,
+                "coalesced": self.coalesced,
+                "suppressed": self.suppressed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+    def _next_batch(self) -> list:
+        # Called with the condition held; returns (key, line) pairs in send order
+        batch = []
+        while self._queue and len(batch) < self.max_batch:
+            batch.append((None, self._queue.popleft()))
+        while self._latest and len(batch) < self.max_batch:
+            batch.append(self._latest.popitem(last=False))
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: not self._running or self.get_queue_depth() > 0)
+                if not self._running:
+                    return
+
+            # Rate limit outside the lock so submitters are never held up
+            wait_ns = self._last_write_ns + self.min_interval_ns - time.perf_counter_ns()
+            if wait_ns > 0:
+                time.sleep(wait_ns / 1e9)
+
+            with self._condition:
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                for key, line in batch:
+                    if key is not None:
+                        self._last_sent[key] = line
+
+            lines = [line for _, line in batch]
+            try:
+                with metrics.timer("adapter", f"{self.name.lower()}.serial_write"):
+                    self.write_lines(lines)
+                self.sent += len(lines)
+                self.writes += 1
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+                with self._condition:
+                    for key, _ in batch:
+                        if key is not None:
+                            self._last_sent.pop(key, None)  # Not delivered, so do not suppress a retry
+                print(f"[{self.name} Writer] Failed to write {lines}: {e}")
+
+            self._last_write_ns = time.perf_counter_ns()
+            with self._condition:
+                self._condition.notify_all()  # Wakes stop() while draining
@@ -0,0 +1,246 @@
+# Headless microbenchmarks for the per-frame hot path: python -m handmotion.benchmark
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+from mediapipe.framework.formats import classification_pb2, landmark_pb2
+
+from .adapters.cursor import CursorAdapter
+from .adapters.cursor_backends import NullCursorBackend
+from .adapters.esp32_serial import ESP32SerialAdapter
+from .gestures import GestureEngine
+from .manager import InterfaceManager
+from .payload import FramePayload
+from .payload_builder import PayloadBuilder
+from .interfaces.led import LEDInterface
+from .interfaces.light_switch import LightInterface
+from .interfaces.motor import MotorInterface
+from .interfaces.mouse import MouseInterface
+
+FRAME_DIMENSIONS = (1920, 1080)
+FRAME_DELTA_NS = 16_666_667
+PAYLOAD_POOL_SIZE = 64  # Distinct synthetic frames cycled through, half of them pinching
+HAND_COUNTS = (0, 1, 2)
+DEFAULT_BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+class _NullSerial:
+    # Stands in for serial.Serial so the adapter's own formatting and encoding are still measured
+    is_open = True
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+def _stub_esp32_adapter() -> ESP32SerialAdapter:
+    adapter = ESP32SerialAdapter(name="Benchmark")
+    adapter.serial_connection = _NullSerial()
+    return adapter
+
+def _stub_cursor_adapter() -> CursorAdapter:
+    # Moves are still clamped, converted and coalesced; only the OS call is skipped
+    return CursorAdapter(backend=NullCursorBackend(FRAME_DIMENSIONS))
+
+def synthetic_results(num_hands: int, rng: np.random.Generator, pinch: bool):
+    # Legacy solutions-shaped results built from the real MediaPipe protobuf types
+    results = type("SyntheticHandsResults", (), {})()
+    results.multi_hand_landmarks = []
+    results.multi_hand_world_landmarks = []
+    results.multi_handedness = []
+
+    for i in range(num_hands):
+        points = 0.3 + 0.4 * rng.random((21, 3))
+        world = 0.1 * rng.random((21, 3))
+        if pinch:
+            points[8] = points[4] + 0.005  # Thumb and index fingertips together
+            world[8] = world[4] + 0.005
+
+        landmarks = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z in points:
+            landmarks.landmark.add(x=x, y=y, z=z)
+        world_landmarks = landmark_pb2.LandmarkList()
+        for x, y, z in world:
+            world_landmarks.landmark.add(x=x, y=y, z=z)
+        handedness = classification_pb2.ClassificationList()
+        handedness.classification.add(index=i, score=0.95, label=("Left", "Right")[i % 2])
+
+        results.multi_hand_landmarks.append(landmarks)
+        results.multi_hand_world_landmarks.append(world_landmarks)
+        results.multi_handedness.append(handedness)
+
+    return results
+
+def build_pool(num_hands: int, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    results = [synthetic_results(num_hands, rng, pinch=(i // 4) % 2 == 1) for i in range(PAYLOAD_POOL_SIZE)]
+    payloads = [
+        PayloadBuilder.build_payload(frame_dimensions=FRAME_DIMENSIONS, time_ns=i * FRAME_DELTA_NS, time_delta_ns=FRAME_DELTA_NS, hands=r)
+        for i, r in enumerate(results)
+    ]
+    return results, payloads
+
+def measure(op: Callable[[int], object], iterations: int, repeats: int, warmup: int = 100) -> dict:
+    # op receives the iteration index so it can cycle through a pool of inputs
+    for i in range(warmup):
+        op(i)
+
+    samples = []
+    for _ in range(repeats):
+        start_ns = time.perf_counter_ns()
+        for i in range(iterations):
+            op(i)
+        samples.append((time.perf_counter_ns() - start_ns) / iterations)
+
+    # Transient memory of a single call: peak traced bytes above what was live before it
+    tracemalloc.start()
+    peaks = []
+    for i in range(min(iterations, 200)):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        op(i)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    ns_per_op = statistics.median(samples)
+    return {
+        "ns_per_op": ns_per_op,
+        "min_ns_per_op": min(samples),
+        "ops_per_s": 1e9 / ns_per_op if ns_per_op > 0 else 0.0,
+        "alloc_bytes_per_op": statistics.median(peaks),
+    }
+
+def benchmark_cases(num_hands: int) -> Dict[str, Callable[[int], object]]:
+    results, payloads = build_pool(num_hands)
+    n = len(payloads)
+    cases = {}
+
+    cases["to_hand_arrays"] = lambda i: PayloadBuilder.to_hand_arrays(results[i % n])
+    cases["build_payload"] = lambda i: PayloadBuilder.build_payload(frame_dimensions=FRAME_DIMENSIONS, time_ns=i * FRAME_DELTA_NS,
+                                                                    time_delta_ns=FRAME_DELTA_NS, hands=results[i % n])
+
+    if num_hands:
+        def is_touching_cold(i: int) -> bool:
+            # Fresh frame: includes computing the distance matrix
+            hand = payloads[i % n].hands[0]
+            hand._xy_distances = None
+            return hand.is_touching(4, 8)
+
+        cases["is_touching_cold"] = is_touching_cold
+        cases["is_touching_cached"] = lambda i: payloads[i % n].hands[0].is_touching(4, 8)
+
+    def timed(i: int) -> FramePayload:
+        # Gesture timing runs off the payload timestamps, which must keep increasing
+        payload = payloads[i % n]
+        payload.meta.timestamp_ns = i * FRAME_DELTA_NS
+        return payload
+
+    engine = GestureEngine()
+    interfaces = _build_interfaces()
+    for interface in interfaces.values():
+        for definition in interface.get_gestures():
+            engine.register(definition)
+    cases["gesture_engine.update"] = lambda i: engine.update(timed(i))
+
+    manager = InterfaceManager(interfaces=interfaces)
+    manager.set_active(list(interfaces))
+    cases["manager.on_frame"] = lambda i: manager.on_frame(timed(i))
+
+    for interface_id, interface in interfaces.items():
+        cases[f"{interface_id}.on_frame"] = lambda i, interface=interface: interface.on_frame(timed(i))
+
+    return cases
+
+def _build_interfaces() -> dict:
+    esp32_adapter = _stub_esp32_adapter()
+    interfaces = {
+        "led": LEDInterface(context={"esp32_serial_adapter": esp32_adapter}),
+        "light": LightInterface(context={"esp32_serial_adapter": esp32_adapter}),
+        "motor": MotorInterface(context={"esp32_serial_adapter": esp32_adapter}),
+    }
+
+    interfaces["mouse"] = MouseInterface(context={"mouse_controller": _stub_cursor_adapter()})
+
+    for interface in interfaces.values():
+        interface.enable()
+    return interfaces
+
+def run_benchmarks(hand_counts=HAND_COUNTS, iterations: int = 2000, repeats: int = 5, filter_text: str = None) -> Dict[str, dict]:
+    results = {}
+    for num_hands in hand_counts:
+        for name, op in benchmark_cases(num_hands).items():
+            key = f"{name}[{num_hands} hands]"
+            if filter_text and filter_text not in key:
+                continue
+            results[key] = measure(op, iterations, repeats)
+    return results
+
+def print_results(results: Dict[str, dict], baseline: Dict[str, dict] = None, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[str]:
+    regressions = []
+    width = max(len(key) for key in results)
+    header = f"{'benchmark':<{width}}  {'ns/op':>10}  {'ops/s':>11}  {'alloc B/op':>10}"
+    if baseline:
+        header += f"  {'vs baseline':>11}"
+    print(header)
+    print("-" * len(header))
+
+    for key, r in results.items():
+        line = f"{key:<{width}}  {r['ns_per_op']:>10.0f}  {r['ops_per_s']:>11.0f}  {r['alloc_bytes_per_op']:>10.0f}"
+        if baseline and key in baseline:
+            change = r["ns_per_op"] / baseline[key]["ns_per_op"] - 1
+            flag = "  REGRESSION" if change > threshold else ""
+            line += f"  {change:>+10.1%}{flag}"
+            if flag:
+                regressions.append(key)
+        print(line)
+
+    return regressions
+
+def save_baseline(results: Dict[str, dict], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "machine": {"platform": platform.platform(), "python": platform.python_version(), "processor": platform.processor()},
+            "created_ns": time.time_ns(),
+            "results": results,
+        }, f, indent=2)
+    print(f"[Benchmark] Baseline saved to {path}")
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless microbenchmarks for payload building, gestures and dispatch.")
+    parser.add_argument("--hands", type=int, nargs="+", default=list(HAND_COUNTS), help="Hand counts to benchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per timing sample")
+    parser.add_argument("--repeats", type=int, default=5, help="Timing samples per benchmark; the median is reported")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE_PATH, default=None, help="Save results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE_PATH, default=None, help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD, help="Slowdown ratio flagged as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.hands, args.iterations, args.repeats, args.filter)
+    baseline = load_baseline(args.compare) if args.compare else None
+    regressions = print_results(results, baseline, args.threshold)
+
+    if args.save:
+        save_baseline(results, args.save)
+
+    if regressions:
+        print(f"[Benchmark] {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
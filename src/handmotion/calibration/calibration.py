@@ -3,17 +3,45 @@ from ..mediapipe import MediaPipeHands
 from ..time_controller import TimeController
 from ..payload_builder import PayloadBuilder
 
-from .pinch_distance import PinchDistanceCalibration
+from typing import Dict, Sequence
+
+from .pinch_distance import Pair, PinchDistanceCalibration, PinchThresholds
+from .profiles import CalibrationProfile, ProfileStore, profiles
+
+# Thumb to each fingertip, the pairs the interfaces pinch with
+DEFAULT_PROFILE_PAIRS = [(4, 8), (4, 12), (4, 16), (4, 20)]
 
 class Calibration:
     @staticmethod
-    def calibrate_pinch_distance(camera: Camera, hands: MediaPipeHands, lm1: int, lm2: int, time_s: int = 5):
-        calibration = PinchDistanceCalibration()
+    def calibrate_pinch_distance(camera: Camera, hands: MediaPipeHands, lm1: int = 4, lm2: int = 8, time_s: int = 5,
+                                 pairs: Sequence[Pair] = None) -> Dict[Pair, PinchThresholds]:
+        # Calibrates every pair in pairs (default: just lm1-lm2) from the same session
+        calibration = Calibration.record_session(camera, hands, list(pairs) if pairs else [(lm1, lm2)], time_s)
+        return Calibration.print_thresholds(calibration.derive_thresholds())
+
+    @staticmethod
+    def calibrate_profile(camera: Camera, hands: MediaPipeHands, user: str, camera_id: str = None, time_s: int = 5,
+                          pairs: Sequence[Pair] = DEFAULT_PROFILE_PAIRS, store: ProfileStore = profiles) -> CalibrationProfile:
+        # Saves the result for this camera and user and makes it the active profile; None if no pair calibrated
+        camera_id = camera_id or camera.get_identity()
+        calibration = Calibration.record_session(camera, hands, list(pairs), time_s)
+        thresholds = Calibration.print_thresholds(calibration.derive_thresholds())
+        if not thresholds:
+            print("Calibration failed: no pair had both pinched and released samples. The profile was not saved.")
+            return None
+        profile = CalibrationProfile.from_calibration(camera_id, user, calibration, thresholds)
+        store.save(profile)
+        store.activate(camera_id, user)
+        return profile
+
+    @staticmethod
+    def record_session(camera: Camera, hands: MediaPipeHands, pairs: Sequence[Pair], time_s: int) -> PinchDistanceCalibration:
+        calibration = PinchDistanceCalibration(pairs)
         time_controller = TimeController()
 
         time_controller.start()
 
-        print("CALIBRATION: Starting pinch distance calibration. Please perform pinch gestures with one hand in view.")
+        print("CALIBRATION: Starting pinch distance calibration. Please pinch and release repeatedly with one hand in view.")
         print("Press enter to begin...")
         input()
         print("Calibration started.")
@@ -28,20 +56,27 @@ class Calibration:
             hands.annotate_image(camera.get_frame_bgr())
             camera.show_feed()
 
-            payload = PayloadBuilder.build_payload(frame_dimensions=camera.get_frame_dimensions(), 
-                                        time_ns=time_controller.get_elapsed_time_ns(), 
+            payload = PayloadBuilder.build_payload(frame_dimensions=camera.get_frame_dimensions(),
+                                        time_ns=time_controller.get_elapsed_time_ns(),
                                         time_delta_ns=time_controller.get_delta_ns(),
-                                        hands=results)
-            
+                                        hands=results,
+                                        fps_estimate=time_controller.get_fps_estimate())
+
             calibration.add_frame(payload)
 
             elapsed_time = calibration.get_time_elapsed()
-            if calibration.hand_queue:
-                print(f"\rElapsed Time: {elapsed_time:.2f}s. Distance: {calibration.get_current_pinch_distance(calibration.hand_queue[-1], lm1, lm2):.2f}", end="")
+            if calibration.last_distances is not None:
+                print(f"\rElapsed Time: {elapsed_time:.2f}s. Distance: {calibration.last_distances[0]:.3f}", end="")
 
             if elapsed_time >= time_s:
                 break
 
-        average_distance = calibration.calculate_average_pinch_distance(lm1, lm2)
-        print("\nCalibration completed.")
-        return average_distance
\ No newline at end of file
+        print(f"\nCalibration completed: {calibration.frames} frames, {calibration.rejected_frames} rejected, "
+              f"{calibration.rejected_samples} outlier samples.")
+        return calibration
+
+    @staticmethod
+    def print_thresholds(thresholds: Dict[Pair, PinchThresholds]) -> Dict[Pair, PinchThresholds]:
+        for threshold in thresholds.values():
+            print(f"  {threshold}")
+        return thresholds
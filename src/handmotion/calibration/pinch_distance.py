@@ -1,64 +1,209 @@
-from typing import List
-import math
+from ..config.config import config
 from ..payload import FramePayload, Hand
 
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
 DEFAULT_TIME_RANGE_S = 5  # Default time range in seconds for calibration
 
+SPACE = config.get("Calibration", "SPACE")
+HISTOGRAM_BINS = config.getint("Calibration", "HISTOGRAM_BINS")
+HISTOGRAM_MAX = config.getfloat("Calibration", "HISTOGRAM_MAX")
+MIN_CONFIDENCE = config.getfloat("Calibration", "MIN_CONFIDENCE")
+OUTLIER_JUMP = config.getfloat("Calibration", "OUTLIER_JUMP")
+LOW_PERCENTILE = config.getfloat("Calibration", "LOW_PERCENTILE")
+HIGH_PERCENTILE = config.getfloat("Calibration", "HIGH_PERCENTILE")
+ENTER_FRACTION = config.getfloat("Calibration", "ENTER_FRACTION")
+EXIT_FRACTION = config.getfloat("Calibration", "EXIT_FRACTION")
+MIN_SPREAD_BINS = config.getfloat("Calibration", "MIN_SPREAD_BINS")
+MIN_SPREAD_RATIO = config.getfloat("Calibration", "MIN_SPREAD_RATIO")
+
+Pair = Tuple[int, int]
+
+HAND_SCALE_PAIR = (0, 9)  # Wrist to middle finger MCP, barely changes while pinching
+
+@dataclass(slots=True)
+class PinchThresholds:
+    pair: Pair
+    enter_threshold: float
+    exit_threshold: float
+    mean: float
+    std: float
+    pinched: float  # LOW_PERCENTILE distance, the closed end of the distribution
+    released: float  # HIGH_PERCENTILE distance, the open end
+    samples: int
+
+    def __str__(self) -> str:
+        return (f"Pair {self.pair}: enter < {self.enter_threshold:.4f}, exit > {self.exit_threshold:.4f} "
+                f"(pinched {self.pinched:.4f}, released {self.released:.4f}, mean {self.mean:.4f} ± {self.std:.4f}, n={self.samples})")
+
 class PinchDistanceCalibration:
+    """Streaming distance statistics for many landmark pairs at once, in constant memory.
+
+    Every accepted frame updates, for all pairs in one vectorized step, a running mean and
+    variance (Welford) and a fixed-bin histogram used as the percentile sketch (bin width
+    HISTOGRAM_MAX / HISTOGRAM_BINS). Frames need exactly one hand with at least MIN_CONFIDENCE.
+    Samples are committed one frame late: a sample more than OUTLIER_JUMP away from the median
+    of itself and its neighbours is a single-frame glitch and is dropped. Unlike a cut around
+    the mean, this keeps both the pinched and the released mode of the distribution.
+    """
+
+    def __init__(self, pairs: Sequence[Pair] = ((4, 8),), space: str = SPACE,
+                 bins: int = HISTOGRAM_BINS, max_distance: float = HISTOGRAM_MAX):
+        if space not in ("xy", "xyz"):
+            raise ValueError(f"Unknown distance space '{space}'. Expected 'xy' or 'xyz'.")
+
+        self.pairs: List[Pair] = [tuple(pair) for pair in pairs]
+        self.space = space
+        self.bins = bins
+        self.max_distance = max_distance
+
+        self._pair_array = np.asarray(self.pairs, dtype=np.intp)
+        self._rows = np.arange(len(self.pairs))
+        self.counts = np.zeros(len(self.pairs), dtype=np.int64)
+        self.means = np.zeros(len(self.pairs))
+        self._m2 = np.zeros(len(self.pairs))
+        self.histogram = np.zeros((len(self.pairs), bins), dtype=np.int64)
+
+        self.frames = 0
+        self.rejected_frames = 0
+        self.rejected_samples = 0
+        self.last_distances = None
+        self._previous = np.full(len(self.pairs), np.nan)  # Last accepted sample per pair
+        self._pending = None
+        self._hand_scale_sum = 0.0
 
-    def __init__(self):
-        self.hand_queue: List[Hand] = []
         self.start_time: float = 0.0
         self.current_time: float = 0.0
-    
+
     def add_frame(self, payload: FramePayload) -> None:
 
         if not payload.hands:
             print("No hands detected. Rejecting frame.")
+            self.rejected_frames += 1
             return
-        
+
         if len(payload.hands) > 1:
             print("Warning: More than one hand detected. Rejecting frame.")
+            self.rejected_frames += 1
             return
 
-        if len(payload.hands[0].world_landmarks) != 21:
-            print("Warning: Hand does not have 21 landmarks. Rejecting frame.")
+        hand = payload.hands[0]
+        if hand.confidence < MIN_CONFIDENCE:
+            self.rejected_frames += 1
             return
-        
-        self.hand_queue.append(payload.hands[0])
 
-        if len(self.hand_queue) == 1:
-            self.start_time = payload.meta.timestamp_ns / 1e9  # Convert to seconds
+        self.add_distances(self.get_distances(hand))
+        self._hand_scale_sum += self._get_matrix(hand)[HAND_SCALE_PAIR]
 
+        if self.frames == 0:
+            self.start_time = payload.meta.timestamp_ns / 1e9  # Convert to seconds
         self.current_time = payload.meta.timestamp_ns / 1e9  # Convert to seconds
+        self.frames += 1
+
+    def get_distances(self, hand: Hand) -> np.ndarray:
+        # One gather from the hand's cached distance matrix for every pair
+        return self._get_matrix(hand)[self._pair_array[:, 0], self._pair_array[:, 1]]
+
+    def _get_matrix(self, hand: Hand) -> np.ndarray:
+        return hand.xy_distances if self.space == "xy" else hand.xyz_distances
+
+    def get_hand_scale(self) -> float:
+        return float(self._hand_scale_sum / self.frames) if self.frames else 0.0
+
+    def add_distances(self, distances: np.ndarray) -> None:
+        self.last_distances = distances
+        if self._pending is not None:
+            self._commit(self._pending, distances)
+        self._pending = distances
+
+    def flush(self) -> None:
+        # Commits the last held-back sample (judged against its predecessor only)
+        if self._pending is not None:
+            self._commit(self._pending, self._previous)
+            self._pending = None
+
+    def _commit(self, sample: np.ndarray, following: np.ndarray) -> None:
+        # A missing neighbour stands in as the sample itself, so the median falls back to the other one
+        previous = np.where(np.isfinite(self._previous), self._previous, sample)
+        following = np.where(np.isfinite(following), following, sample)
+        median = np.maximum(np.minimum(previous, sample), np.minimum(np.maximum(previous, sample), following))
+        accept = np.isfinite(sample) & (sample >= 0) & (sample < self.max_distance) & (np.abs(sample - median) <= OUTLIER_JUMP)
+        self.rejected_samples += int(np.count_nonzero(~accept))
+        # Rejected pairs keep their last good value as the neighbour for the next decision
+        self._previous = np.where(accept, sample, self._previous)
+
+        # Welford's update, masked to the accepted pairs
+        self.counts += accept
+        delta = np.where(accept, sample - self.means, 0.0)
+        self.means += delta / np.maximum(self.counts, 1)
+        self._m2 += delta * np.where(accept, sample - self.means, 0.0)
+
+        # Each pair hits exactly one bin, so fancy-indexed += is safe
+        bins = (sample[accept] * (self.bins / self.max_distance)).astype(np.intp)
+        self.histogram[self._rows[accept], bins] += 1
 
     def get_time_elapsed(self) -> float:
         return self.current_time - self.start_time
-    
+
     def get_current_pinch_distance(self, hand: Hand, lm1: int, lm2: int) -> float:
-        if not self.hand_queue:
-            print("No frames available for calibration.")
-            return 0.0
-        
-        lm1 = hand.world_landmarks[lm1]
-        lm2 = hand.world_landmarks[lm2]
-        dist = math.dist((lm1.x, lm1.y, lm1.z), (lm2.x, lm2.y, lm2.z))
-        return dist
+        if self.space == "xy":
+            return hand.calculate_xy_distance(lm1, lm2)
+        return hand.calculate_xyz_distance(lm1, lm2)
+
+    def get_std(self) -> np.ndarray:
+        return np.sqrt(self._m2 / np.maximum(self.counts - 1, 1))
+
+    def get_percentiles(self, percentile: float) -> np.ndarray:
+        # Linear interpolation inside the histogram bin holding the percentile, per pair
+        cumulative = np.cumsum(self.histogram, axis=1)
+        rank = percentile / 100 * cumulative[:, -1]
+        index = np.minimum((cumulative < rank[:, None]).sum(axis=1), self.bins - 1)
+        below = np.where(index > 0, cumulative[self._rows, index - 1], 0)
+        in_bin = np.maximum(self.histogram[self._rows, index], 1)
+        width = self.max_distance / self.bins
+        return (index + np.clip((rank - below) / in_bin, 0.0, 1.0)) * width
 
     def calculate_average_pinch_distance(self, lm_index_1: int, lm_index_2: int) -> float:
-        if not self.hand_queue:
+        pair = (lm_index_1, lm_index_2)
+        if pair not in self.pairs or self.counts[self.pairs.index(pair)] == 0:
             print("No frames available for calibration.")
             return 0.0
-        
-        total_distance = 0.0
-        count = 0
-
-        for hand in self.hand_queue:
-            dist = self.get_current_pinch_distance(hand, lm_index_1, lm_index_2)
-            total_distance += dist
-            count += 1
-        
-        average_distance = total_distance / count if count > 0 else 0.0
 
+        average_distance = float(self.means[self.pairs.index(pair)])
         print(f"Average pinch distance between landmarks {lm_index_1} and {lm_index_2}: {average_distance:.4f}")
         return average_distance
+
+    def derive_thresholds(self, enter_fraction: float = ENTER_FRACTION, exit_fraction: float = EXIT_FRACTION) -> Dict[Pair, PinchThresholds]:
+        # The session alternates pinching and releasing, so the distribution has a closed and an
+        # open end; thresholds sit at fixed fractions of the way from one to the other
+        assert 0 < enter_fraction <= exit_fraction < 1, "Calibration: expected 0 < ENTER_FRACTION <= EXIT_FRACTION < 1."
+        self.flush()
+        pinched = self.get_percentiles(LOW_PERCENTILE)
+        released = self.get_percentiles(HIGH_PERCENTILE)
+        spread = released - pinched
+        # Without both ends there is nothing to put the thresholds between; they would sit on noise
+        min_spread = np.maximum(MIN_SPREAD_BINS * self.max_distance / self.bins, MIN_SPREAD_RATIO * released)
+        std = self.get_std()
+
+        thresholds = {}
+        for i, pair in enumerate(self.pairs):
+            if self.counts[i] == 0:
+                continue
+            if spread[i] < min_spread[i]:
+                print(f"Warning: Pair {pair} spread {spread[i]:.4f} (pinched {pinched[i]:.4f}, released {released[i]:.4f}) "
+                      f"is below {min_spread[i]:.4f}; the session needs both pinches and releases. Skipping pair.")
+                continue
+            thresholds[pair] = PinchThresholds(
+                pair=pair,
+                enter_threshold=float(pinched[i] + enter_fraction * spread[i]),
+                exit_threshold=float(pinched[i] + exit_fraction * spread[i]),
+                mean=float(self.means[i]),
+                std=float(std[i]),
+                pinched=float(pinched[i]),
+                released=float(released[i]),
+                samples=int(self.counts[i]),
+            )
+        return thresholds
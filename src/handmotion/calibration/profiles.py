@@ -0,0 +1,169 @@
+from ..config.config import config
+from ..payload import FramePayload
+
+from dataclasses import dataclass, field
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from .pinch_distance import HAND_SCALE_PAIR, MIN_CONFIDENCE, Pair, PinchDistanceCalibration, PinchThresholds
+
+PROFILE_PATH = config.get("Profiles", "PATH")
+SCALE_FRAMES = config.getint("Profiles", "SCALE_FRAMES")
+VERSION = 1
+
+@dataclass(slots=True)
+class CalibrationProfile:
+    camera: str
+    user: str
+    space: str
+    thresholds: Dict[Pair, Tuple[float, float]]  # (enter, exit) per landmark pair
+    hand_scale: float  # Mean wrist to middle-finger-MCP distance during calibration, in space units
+    created: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_calibration(cls, camera: str, user: str, calibration: PinchDistanceCalibration,
+                         thresholds: Dict[Pair, PinchThresholds] = None) -> "CalibrationProfile":
+        # Pairs the calibration could not derive thresholds for are left out
+        if thresholds is None:
+            thresholds = calibration.derive_thresholds()
+        thresholds = {pair: (t.enter_threshold, t.exit_threshold) for pair, t in thresholds.items()}
+        return cls(camera=camera, user=user, space=calibration.space, thresholds=thresholds, hand_scale=calibration.get_hand_scale())
+
+    def rescaled(self, camera: str, hand_scale: float) -> "CalibrationProfile":
+        # Thresholds are image distances, so they scale with the apparent hand size on this camera
+        ratio = hand_scale / self.hand_scale
+        thresholds = {pair: (enter * ratio, exit_ * ratio) for pair, (enter, exit_) in self.thresholds.items()}
+        return CalibrationProfile(camera=camera, user=self.user, space=self.space, thresholds=thresholds,
+                                  hand_scale=hand_scale, created=self.created)
+
+    def get_thresholds(self, lm1: int, lm2: int) -> Optional[Tuple[float, float]]:
+        # Pairs are unordered
+        return self.thresholds.get((lm1, lm2)) or self.thresholds.get((lm2, lm1))
+
+    def to_dict(self) -> dict:
+        return {
+            "camera": self.camera,
+            "user": self.user,
+            "space": self.space,
+            "hand_scale": round(self.hand_scale, 6),
+            "created": int(self.created),
+            "thresholds": {f"{lm1}-{lm2}": [round(enter, 6), round(exit_, 6)] for (lm1, lm2), (enter, exit_) in self.thresholds.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CalibrationProfile":
+        thresholds = {}
+        for key, (enter, exit_) in data["thresholds"].items():
+            lm1, lm2 = key.split("-")
+            thresholds[(int(lm1), int(lm2))] = (float(enter), float(exit_))
+        return cls(camera=data["camera"], user=data["user"], space=data["space"], thresholds=thresholds,
+                   hand_scale=float(data["hand_scale"]), created=float(data["created"]))
+
+class ProfileStore:
+    """Calibration profiles keyed by camera identity and user, kept in one small JSON file.
+
+    activate() picks the profile interfaces read their pinch thresholds from. A user without
+    a profile for this camera falls back to their most recent profile from another camera, but
+    only after observe() has measured the hand scale here over SCALE_FRAMES frames and rescaled
+    its thresholds; until then, and with no profile at all, interfaces keep [MediaPipe] CLICK_THRESHOLD.
+    """
+
+    def __init__(self, path: str = PROFILE_PATH) -> None:
+        self.path = path
+        self.profiles: Dict[str, CalibrationProfile] = {}
+        self.active: Optional[CalibrationProfile] = None
+        self.pending: Optional[CalibrationProfile] = None  # Cross-camera profile waiting for a hand scale
+        self._pending_camera = None
+        self._scale_sum = 0.0
+        self._scale_frames = 0
+
+    @staticmethod
+    def key(camera: str, user: str) -> str:
+        return f"{camera}|{user}"
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            self.profiles = {}
+            return
+
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != VERSION:
+            raise ValueError(f"Unsupported profile store version {data.get('version')} in {self.path}. Expected {VERSION}.")
+        self.profiles = {key: CalibrationProfile.from_dict(profile) for key, profile in data["profiles"].items()}
+
+    def save(self, profile: CalibrationProfile) -> None:
+        self.profiles[self.key(profile.camera, profile.user)] = profile
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written to a temporary file first so a crash never leaves a truncated store behind
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"version": VERSION, "profiles": {key: p.to_dict() for key, p in self.profiles.items()}},
+                      file, separators=(",", ":"))
+        os.replace(temporary_path, self.path)
+        print(f"[Profiles] Saved profile for user '{profile.user}' on camera '{profile.camera}' to {self.path}")
+
+    def find(self, camera: str, user: str) -> Optional[CalibrationProfile]:
+        profile = self.profiles.get(self.key(camera, user))
+        if profile is not None:
+            return profile
+
+        candidates = [p for p in self.profiles.values() if p.user == user]
+        return max(candidates, key=lambda p: p.created) if candidates else None
+
+    def activate(self, camera: str, user: str) -> Optional[CalibrationProfile]:
+        profile = self.find(camera, user)
+        self.active = None
+        self.pending = None
+
+        if profile is None:
+            print(f"[Profiles] No profile for user '{user}', using config thresholds")
+        elif profile.camera == camera:
+            self.active = profile
+            print(f"[Profiles] Loaded profile for user '{user}' on camera '{camera}'")
+        elif profile.hand_scale > 0:
+            self.pending = profile
+            self._pending_camera = camera
+            self._scale_sum = 0.0
+            self._scale_frames = 0
+            print(f"[Profiles] No profile for user '{user}' on camera '{camera}'. Using config thresholds until the "
+                  f"profile from '{profile.camera}' is rescaled to this camera over the first {SCALE_FRAMES} frames with one hand")
+        else:
+            print(f"[Profiles] No profile for user '{user}' on camera '{camera}' and no hand scale to rescale "
+                  f"the one from '{profile.camera}', using config thresholds")
+        return self.active
+
+    def observe(self, payload: FramePayload) -> bool:
+        # Measures the hand scale for a pending cross-camera profile; True once it becomes active
+        if self.pending is None or len(payload.hands) != 1 or payload.hands[0].confidence < MIN_CONFIDENCE:
+            return False
+
+        hand = payload.hands[0]
+        distances = hand.xy_distances if self.pending.space == "xy" else hand.xyz_distances
+        self._scale_sum += float(distances[HAND_SCALE_PAIR])
+        self._scale_frames += 1
+        if self._scale_frames < SCALE_FRAMES:
+            return False
+
+        hand_scale = self._scale_sum / self._scale_frames
+        print(f"[Profiles] Rescaled the profile from '{self.pending.camera}' to camera '{self._pending_camera}' "
+              f"by {hand_scale / self.pending.hand_scale:.3f} (hand scale {self.pending.hand_scale:.4f} -> {hand_scale:.4f})")
+        self.active = self.pending.rescaled(self._pending_camera, hand_scale)
+        self.pending = None
+        return True
+
+    def get_pinch_thresholds(self, lm1: int, lm2: int, default: float, space: str = "xy") -> Tuple[float, Optional[float]]:
+        # (enter, exit) from the active profile; (default, None) leaves the exit to HYSTERESIS_RATIO
+        if self.active is not None and self.active.space == space:
+            thresholds = self.active.get_thresholds(lm1, lm2)
+            if thresholds is not None:
+                return thresholds
+        return default, None
+
+# Shared store; interfaces read thresholds from its active profile
+profiles = ProfileStore()
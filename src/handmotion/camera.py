@@ -1,4 +1,9 @@
 from .config.config import config
+from .frame_prep import FramePreparer
+from .metrics import metrics
+
+import threading
+import time
 
 import cv2
 from cv2_enumerate_cameras import enumerate_cameras
@@ -8,6 +13,8 @@ DEFAULT_CAMERA_INDEX = config.getint("Camera", "INDEX")
 ASK_FOR_CAMERA_INDEX = config.getboolean("Camera", "ASK_FOR_INDEX")
 DEFAULT_CAMERA_RESOLUTION = (config.getint("Camera", "RESOLUTION_X"), config.getint("Camera", "RESOLUTION_Y"))
 DEFAULT_WINDOW_NAME = config.get("Camera", "WINDOW_NAME")
+THREADED_CAPTURE = config.getboolean("Camera", "THREADED_CAPTURE")
+FIRST_FRAME_TIMEOUT_S = config.getfloat("Camera", "FIRST_FRAME_TIMEOUT_S")
 
 class Camera:
     """Singleton class to manage camera access."""
@@ -20,7 +27,7 @@ class Camera:
             print("Warning: Camera instance already exists. Returning the existing instance.")
         return cls._instance
 
-    def __init__(self, camera_index=DEFAULT_CAMERA_INDEX, width=DEFAULT_CAMERA_RESOLUTION[0], height=DEFAULT_CAMERA_RESOLUTION[1]):
+    def __init__(self, camera_index=DEFAULT_CAMERA_INDEX, width=DEFAULT_CAMERA_RESOLUTION[0], height=DEFAULT_CAMERA_RESOLUTION[1], threaded=THREADED_CAPTURE):
         if ASK_FOR_CAMERA_INDEX:
             self.print_cameras()
             camera_index = int(input(f"Enter Camera Index [{camera_index}]: ") or camera_index)
@@ -31,7 +38,36 @@ class Camera:
         if not self.cap.isOpened():
             raise RuntimeError(f"Could not open camera with index {camera_index}.")
 
-        print(f"Camera Initialized With Index [{camera_index}] at Resolution {width}x{height}")
+        self.camera_index = camera_index
+        self._identity = None
+
+        self.frame_bgr = None
+        self.frame_rgb = None
+        self.frame_rgb_seq = -1
+        self.frame_seq = 0
+        self.frame_timestamp_ns = 0
+
+        # Latest-frame slot written by the capture thread; older frames are overwritten, never queued
+        self._latest_frame = None
+        self._latest_seq = 0
+        self._latest_timestamp_ns = 0
+        self._frame_lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._frame_lock)
+        self._capture_thread = None
+        self._capture_error = None
+        self._running = False
+        self.dropped_frames = 0
+
+        # Pause between threaded captures (idle mode); 0 captures at the driver rate
+        self.capture_interval_s = 0.0
+        self._capture_wake = threading.Event()
+
+        self.preparer = FramePreparer()
+
+        if threaded:
+            self.start_capture_thread()
+
+        print(f"Camera Initialized With Index [{camera_index}] at Resolution {width}x{height} ({'threaded' if threaded else 'synchronous'} capture)")
 
     def print_cameras(self) -> None:
         cameras = list(enumerate_cameras())
@@ -44,27 +80,123 @@ class Camera:
         for camera_info in cameras:
             print(f"  {camera_info.index:>4} | {camera_info.name}")
 
-    def read(self) -> None:
-        ret, self.frame_bgr = self.cap.read()
+    def get_identity(self) -> str:
+        # Device name and capture resolution, e.g. "HD Pro Webcam C920@1920x1080"; keys calibration profiles
+        if self._identity is None:
+            name = next((info.name for info in enumerate_cameras() if info.index == self.camera_index), f"Camera {self.camera_index}")
+            width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self._identity = f"{name}@{width}x{height}"
+        return self._identity
+
+    def start_capture_thread(self) -> None:
+        if self._capture_thread is not None:
+            return
+
+        # Keep the driver queue as short as possible so the slot always holds the freshest frame
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._running = True
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="CameraCapture", daemon=True)
+        self._capture_thread.start()
+
+    def stop_capture_thread(self) -> None:
+        if self._capture_thread is None:
+            return
+
+        self._running = False
+        self._capture_wake.set()
+        self._capture_thread.join(timeout=1.0)
+        self._capture_thread = None
+
+    def set_capture_interval(self, interval_s: float) -> None:
+        # Takes effect immediately, also when the capture thread is waiting out a longer interval
+        self.capture_interval_s = interval_s
+        self._capture_wake.set()
+
+    def is_threaded(self) -> bool:
+        return self._capture_thread is not None
+
+    def _capture_loop(self) -> None:
+        while self._running:
+            with metrics.timer("stage", "capture"):
+                ret, frame = self.cap.read()
+            timestamp_ns = time.monotonic_ns()
+
+            with self._frame_ready:
+                if not ret:
+                    self._capture_error = RuntimeError("Failed to read frame from camera.")
+                    self._running = False
+                    self._frame_ready.notify_all()
+                    return
+
+                # Count frames that were captured but never consumed by read()
+                if self._latest_frame is not None and self._latest_seq != self.frame_seq:
+                    self.dropped_frames += 1
+
+                self._latest_frame = frame
+                self._latest_seq += 1
+                self._latest_timestamp_ns = timestamp_ns
+                self._frame_ready.notify_all()
+
+            if self.capture_interval_s > 0 and self._capture_wake.wait(self.capture_interval_s):
+                self._capture_wake.clear()
+
+    def read(self, wait_for_new: bool = False, timeout_s: float = FIRST_FRAME_TIMEOUT_S) -> None:
+        if self._capture_thread is None:
+            with metrics.timer("stage", "capture"):
+                ret, self.frame_bgr = self.cap.read()
+
+            if not ret:
+                raise RuntimeError("Failed to read frame from camera.")
+
+            self.frame_seq += 1
+            self.frame_timestamp_ns = time.monotonic_ns()
+            return
+
+        with self._frame_ready:
+            # Only block until the first frame arrives (or a newer one, if requested)
+            if not self._frame_ready.wait_for(
+                lambda: self._capture_error is not None or (
+                    self._latest_frame is not None and (not wait_for_new or self._latest_seq != self.frame_seq)
+                ),
+                timeout=timeout_s,
+            ):
+                raise RuntimeError("Timed out waiting for a frame from the capture thread.")
+
+            if self._capture_error is not None:
+                raise self._capture_error
+
+            self.frame_bgr = self._latest_frame
+            self.frame_seq = self._latest_seq
+            self.frame_timestamp_ns = self._latest_timestamp_ns
+
+    def get_frame_seq(self) -> int:
+        return self.frame_seq
 
-        if not ret:
-            raise RuntimeError("Failed to read frame from camera.")        
+    def get_frame_timestamp_ns(self) -> int:
+        return self.frame_timestamp_ns
 
     def get_frame_rgb(self) -> np.ndarray:
-        self.frame_rgb = cv2.cvtColor(self.frame_bgr, cv2.COLOR_BGR2RGB)
+        # Downscaled to the inference resolution into a reused buffer; converted at most once per frame
+        if self.frame_rgb_seq != self.frame_seq:
+            self.frame_rgb = self.preparer.prepare(self.frame_bgr)
+            self.frame_rgb_seq = self.frame_seq
         return self.frame_rgb
 
     def get_frame_bgr(self) -> np.ndarray:
         return self.frame_bgr
 
     def get_frame_dimensions(self) -> tuple:
-        return (self.frame_rgb.shape[1], self.frame_rgb.shape[0])
+        # Original capture dimensions, independent of the inference resolution
+        return (self.frame_bgr.shape[1], self.frame_bgr.shape[0])
 
     def show_feed(self, window_name=DEFAULT_WINDOW_NAME, wait_key=1):
         cv2.imshow(window_name, self.frame_bgr)
         cv2.waitKey(wait_key)
 
     def release(self) -> None:
+        self.stop_capture_thread()
         if self.cap.isOpened():
             self.cap.release()
 
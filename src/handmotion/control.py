@@ -0,0 +1,280 @@
+from .config.config import config
+from .manager import InterfaceManager
+from .time_controller import TimeController
+
+from collections import deque
+from dataclasses import dataclass
+import json
+import socketserver
+import threading
+from typing import Dict, Iterator, List, Tuple
+
+HOTKEYS = config.getboolean("Control", "HOTKEYS")
+SERVER = config.getboolean("Control", "SERVER")
+HOST = config.get("Control", "HOST")
+PORT = config.getint("Control", "PORT")
+MAX_PENDING = config.getint("Control", "MAX_PENDING")
+
+# Command name -> (min args, max args); None means any number
+COMMANDS = {
+    "activate": (0, None),  # activate <id> [<id> ...]; no ids deactivates everything
+    "toggle": (1, 1),  # toggle <id>
+    "pause": (0, 0),
+    "resume": (0, 0),
+    "toggle_pause": (0, 0),
+    "fps": (1, 1),  # fps <frames per second>
+    "quit": (0, 0),
+    "status": (0, 0),  # Control socket only; answered directly, never queued
+}
+
+@dataclass(slots=True)
+class ControlCommand:
+    name: str
+    args: Tuple[str, ...] = ()
+    source: str = ""
+
+def parse_command(line: str, source: str = "") -> ControlCommand:
+    words = line.split()
+    if not words:
+        raise ValueError("Empty command.")
+
+    name, args = words[0].lower(), tuple(words[1:])
+    if name not in COMMANDS:
+        raise ValueError(f"Unknown command '{name}'. Expected one of {list(COMMANDS)}.")
+    min_args, max_args = COMMANDS[name]
+    if len(args) < min_args or (max_args is not None and len(args) > max_args):
+        raise ValueError(f"Command '{name}' takes {min_args if min_args == max_args else f'at least {min_args}'} argument(s), got {len(args)}.")
+    if name == "fps" and not float(args[0]) > 0:
+        raise ValueError("FPS must be positive.")
+    return ControlCommand(name=name, args=args, source=source)
+
+def format_command(command: ControlCommand) -> str:
+    return " ".join((command.name,) + command.args)
+
+def get_hotkey_bindings() -> Dict[str, str]:
+    # [Hotkeys] hotkey = command; DEFAULT keys are inherited by every section and skipped
+    defaults = config.defaults()
+    if not config.has_section("Hotkeys"):
+        return {}
+    return {hotkey: command for hotkey, command in config.items("Hotkeys") if hotkey not in defaults}
+
+class Mailbox:
+    """Commands from any thread to the frame loop, without locks.
+
+    deque.append and deque.popleft are atomic in CPython, so hotkey and socket threads post
+    while the loop drains, and the loop's once-per-frame check is a length test.
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING) -> None:
+        self.max_pending = max_pending
+        self._queue = deque()
+        self.dropped = 0
+
+    def post(self, command: ControlCommand) -> bool:
+        if len(self._queue) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._queue.append(command)
+        return True
+
+    def drain(self) -> Iterator[ControlCommand]:
+        while True:
+            try:
+                yield self._queue.popleft()
+            except IndexError:
+                return
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+class HotkeyListener:
+    """Posts a command when a hotkey fires; the keyboard library calls back on its own listener thread."""
+
+    def __init__(self, mailbox: Mailbox, bindings: Dict[str, str] = None) -> None:
+        self.mailbox = mailbox
+        # Parsed up front so a typo in [Hotkeys] fails at startup, not on the key press
+        self.bindings = {hotkey: parse_command(command, source=f"hotkey {hotkey}")
+                         for hotkey, command in (bindings if bindings is not None else get_hotkey_bindings()).items()}
+        self._handles = []
+
+    def start(self) -> None:
+        try:
+            import keyboard  # Needs root on Linux, so only imported when hotkeys are enabled
+            for hotkey, command in self.bindings.items():
+                self._handles.append(keyboard.add_hotkey(hotkey, self.mailbox.post, args=(command,)))
+        except Exception as e:
+            print(f"[Control] Hotkeys unavailable: {e}. Use the control socket ([Control] SERVER) instead.")
+            return
+        print(f"[Control] Hotkeys: {', '.join(f'{hotkey} = {format_command(command)}' for hotkey, command in self.bindings.items())}")
+
+    def stop(self) -> None:
+        if not self._handles:
+            return
+        import keyboard
+        for handle in self._handles:
+            keyboard.remove_hotkey(handle)
+        self._handles = []
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class ControlServer:
+    """Line-based command socket at HOST:PORT, e.g. `echo "activate mouse led" | nc 127.0.0.1 9465`.
+
+    Each line is answered with OK (queued for the next frame), ERR <reason>, or for status a
+    JSON snapshot of the loop state.
+    """
+
+    def __init__(self, controller: "Controller", host: str = HOST, port: int = PORT) -> None:
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self) -> None:
+        controller = self.controller
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                source = f"socket {self.client_address[0]}:{self.client_address[1]}"
+                for raw_line in self.rfile:
+                    line = raw_line.decode("utf-8", errors="replace").strip()
+                    if not line:
+                        continue
+                    self.wfile.write((controller.handle_line(line, source) + "\n").encode("utf-8"))
+
+        self._server = _TCPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ControlServer", daemon=True)
+        self._thread.start()
+        print(f"[Control] Accepting commands on {self.host}:{self.port}")
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=1.0)
+        self._server = None
+        self._thread = None
+
+class Controller:
+    """Applies hotkey and socket commands on the loop thread, once per frame.
+
+    Runtimes call should_exit() every frame; it returns immediately unless a command is waiting.
+    pause deactivates every interface and stops capturing and inferring until resume restores
+    the previous set. The serial runtime checks paused itself; the pipelined and multi runtimes
+    are attached as runtime and receive set_paused() and set_fps().
+    """
+
+    def __init__(self, interface_manager: InterfaceManager, time_controller: TimeController = None,
+                 hotkeys: bool = HOTKEYS, server: bool = SERVER) -> None:
+        self.interface_manager = interface_manager
+        self.time_controller = time_controller
+        self.inference_gate = None  # Set by the serial runtime so FPS changes survive idle mode
+        self.runtime = None  # Set by runtimes that pace their own capture (set_paused, set_fps)
+
+        self.mailbox = Mailbox()
+        self.hotkeys = HotkeyListener(self.mailbox) if hotkeys else None
+        self.server = ControlServer(self) if server else None
+
+        self.paused = False
+        self.exit_requested = False
+        self.commands_applied = 0
+        self._paused_ids: List[str] = []
+        self._status = {}
+        self._publish_status()
+
+    def start(self) -> None:
+        if self.hotkeys is not None:
+            self.hotkeys.start()
+        if self.server is not None:
+            self.server.start()
+
+    def stop(self) -> None:
+        if self.hotkeys is not None:
+            self.hotkeys.stop()
+        if self.server is not None:
+            self.server.stop()
+
+    def post(self, command: ControlCommand) -> bool:
+        return self.mailbox.post(command)
+
+    def handle_line(self, line: str, source: str = "") -> str:
+        # Runs on a socket thread; only status reads loop state, and only the published snapshot
+        try:
+            command = parse_command(line, source)
+        except ValueError as e:
+            return f"ERR {e}"
+        if command.name == "status":
+            return json.dumps(self._status)
+        return "OK" if self.post(command) else "ERR Too many pending commands."
+
+    def should_exit(self) -> bool:
+        if len(self.mailbox):
+            self.poll()
+        return self.exit_requested
+
+    def poll(self) -> None:
+        for command in self.mailbox.drain():
+            self._apply(command)
+            self.commands_applied += 1
+        self._publish_status()
+
+    def _apply(self, command: ControlCommand) -> None:
+        print(f"[Control] {format_command(command)} ({command.source or 'local'})")
+        manager = self.interface_manager
+
+        if command.name == "quit":
+            self.exit_requested = True
+        elif command.name in ("activate", "toggle"):
+            available = manager.get_available_interfaces()
+            unknown = [interface_id for interface_id in command.args if interface_id not in available]
+            if unknown:
+                print(f"[Control] Unknown interface(s) {unknown}. Available: {available}")
+                return
+            if command.name == "toggle":
+                current = self._paused_ids if self.paused else manager.get_active_interfaces()
+                interface_id = command.args[0]
+                ids = [i for i in current if i != interface_id] if interface_id in current else current + [interface_id]
+            else:
+                ids = list(command.args)
+            if self.paused:
+                self._paused_ids = ids  # Applied on resume
+            else:
+                manager.set_active(ids)
+        elif command.name == "pause" or (command.name == "toggle_pause" and not self.paused):
+            if not self.paused:
+                self.paused = True
+                self._paused_ids = list(manager.get_active_interfaces())
+                manager.set_active([])
+                if self.runtime is not None:
+                    self.runtime.set_paused(True)
+        elif command.name == "resume" or command.name == "toggle_pause":
+            if self.paused:
+                self.paused = False
+                if self.runtime is not None:
+                    self.runtime.set_paused(False)
+                manager.set_active(self._paused_ids)
+        elif command.name == "fps":
+            fps = float(command.args[0])
+            if self.runtime is not None:
+                self.runtime.set_fps(fps)
+            elif self.inference_gate is not None:
+                self.inference_gate.set_active_fps(fps)
+            elif self.time_controller is not None:
+                self.time_controller.set_fps(fps)
+
+    def _publish_status(self) -> None:
+        # Replaced, never mutated, so socket threads always read a consistent snapshot
+        self._status = {
+            "active": list(self.interface_manager.get_active_interfaces()),
+            "available": self.interface_manager.get_available_interfaces(),
+            "paused": self.paused,
+            "paused_active": list(self._paused_ids) if self.paused else [],
+            "fps": self.time_controller.fps if self.time_controller is not None else None,
+            "commands_applied": self.commands_applied,
+            "commands_dropped": self.mailbox.dropped,
+        }
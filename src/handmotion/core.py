@@ -1,80 +1,186 @@
-# Core loop: capture, mediapipe, payload, hotkeys
+# Core loop: capture, mediapipe, payload, control commands
+
+from .config.config import config
 
 from .manager import InterfaceManager
 from .payload import FramePayload
 from .camera import Camera
-from .mediapipe import MediaPipeHands
 from .time_controller import TimeController
 from .payload_builder import PayloadBuilder
-from .calibration.calibration import Calibration
-
-from .interfaces.mouse import MouseInterface
-from .interfaces.led import LEDInterface
-from .interfaces.motor import MotorInterface
-
-from .adapters.cursor import CursorAdapter
-from .adapters.esp32_serial import ESP32SerialAdapter
-
-import keyboard
-
-def main():
-
-    # Initialize Camera, MediaPipeHands, TimeController, DemoManager instance
-    camera = Camera()
-    hands = MediaPipeHands()
-    time_controller = TimeController()
-
-    # Calibration.calibrate_pinch_distance(camera, hands, lm1=4, lm2=8, time_s=5)
-
-    # esp32_serial_adapter = ESP32SerialAdapter(name="ESP32")
-    # esp32_serial_adapter.list_ports()
-    # esp32_serial_adapter.open_serial()
-    # esp32_serial_adapter.establish_connection_handshake()
-
-    cursor_adapter = CursorAdapter()
-
-    # led_interface = LEDInterface(context={"esp32_serial_adapter": esp32_serial_adapter})
-    # motor_interface = MotorInterface(context={"esp32_serial_adapter": esp32_serial_adapter})
-    mouse_interface = MouseInterface(context={"mouse_controller": cursor_adapter})
-
-    interface_manager = InterfaceManager(interfaces={
-        # "led": led_interface,
-        # "motor": motor_interface,
-        "mouse": mouse_interface
-    })
-
-    interface_manager.set_active(["mouse"])
+from .calibration.profiles import profiles
+from .multi_source import MultiSourceRuntime
+from .gating import InferenceGate, MOTION_GATING, IDLE_MODE
+from .recording import PayloadRecorder, PayloadReplay
+from .metrics import metrics, MetricsServer
+from .plugins import PluginRegistry
+from .control import Controller
+
+# Interfaces and adapters are imported by the PluginRegistry when activated. Modules that pull in
+# MediaPipe are imported by the runtime that needs them, so replay starts without it
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .mediapipe import MediaPipeHands
+    from .quality import QualityController
+
+RUNTIME = config.get("Core", "RUNTIME")
+ADAPTIVE_QUALITY = config.getboolean("QualityController", "ENABLED")
+RECORD_PATH = config.get("Recording", "RECORD_PATH")
+REPLAY_PATH = config.get("Recording", "REPLAY_PATH")
+REPLAY_SPEED = config.getfloat("Recording", "REPLAY_SPEED")
+ACTIVE_INTERFACES = [name.strip() for name in config.get("Plugins", "ACTIVE").split(",") if name.strip()]
+AUTO_LOAD_PROFILE = config.getboolean("Profiles", "AUTO_LOAD")
+PROFILE_USER = config.get("Profiles", "USER")
+PROFILE_CAMERA_ID = config.get("Profiles", "CAMERA_ID")
+
+def load_profile(interface_manager: InterfaceManager, camera_id: str) -> None:
+    # Thresholds of the saved calibration for this camera and user; no input() or recalibration needed
+    profiles.load()
+    if profiles.activate(camera_id, PROFILE_USER) is not None:
+        interface_manager.apply_profile()
+
+def run_serial(camera: Camera, hands: "MediaPipeHands", time_controller: TimeController, interface_manager: InterfaceManager,
+               controller: Controller, quality_controller: "QualityController" = None, inference_gate: InferenceGate = None) -> None:
 
     time_controller.start()
+    payload = None
+    results = None
 
     while True:
 
         time_controller.update()
 
+        # Hotkey and socket commands are applied here, between frames
+        if controller.should_exit():
+            break
+        if controller.paused:
+            continue  # Nothing is captured or inferred until resumed
+
         camera.read()
 
-        results = hands.process_sync(camera.get_frame_rgb())
+        timestamp_ms = camera.get_frame_timestamp_ns() // 1_000_000
+        inferred = inference_gate is None or inference_gate.should_infer(camera.get_frame_bgr(), payload is not None and bool(payload.hands))
+        if hands.is_async():
+            # LIVE_STREAM: submit this frame and dispatch whichever result has completed meanwhile
+            if inferred:
+                hands.process_async(camera.get_frame_rgb(), timestamp_ms)
+            results = hands.get_latest_result()
+        elif not inferred:
+            pass  # Static frame: the last result is dispatched again
+        elif hands.roi_tracker is not None:
+            results = hands.process_roi(camera.get_frame_bgr(), camera.preparer, payload, timestamp_ms)
+        else:
+            results = hands.process_sync(camera.get_frame_rgb(), timestamp_ms)
         # hands.annotate_image(camera.get_frame_bgr())
 
-        payload: FramePayload = PayloadBuilder.build_payload(frame_dimensions=camera.get_frame_dimensions(), 
-                                                             time_ns=time_controller.get_elapsed_time_ns(), 
-                                                             time_delta_ns=time_controller.get_delta_ns(),
-                                                             hands=results)
-        # payload.print_summary()
+        if results is not None:
+            payload: FramePayload = PayloadBuilder.build_payload(frame_dimensions=camera.get_frame_dimensions(), 
+                                                                 time_ns=time_controller.get_elapsed_time_ns(), 
+                                                                 time_delta_ns=time_controller.get_delta_ns(),
+                                                                 hands=results,
+                                                                 fps_estimate=time_controller.get_fps_estimate())
+            # payload.print_summary()
 
-        # camera.show_feed()
+            # Capture-to-dispatch latency of this frame; a reused result has no meaningful one
+            latency_ns = time.monotonic_ns() - camera.get_frame_timestamp_ns() if inferred else None
+            interface_manager.on_frame(payload, latency_ns)
 
-        interface_manager.on_frame(payload)
+            if quality_controller is not None and inferred:
+                quality_controller.update(latency_ns)
 
-        # Exit on 'q' key press
-        if keyboard.is_pressed('q'):
-            print("Exiting...")
-            break
+        # camera.show_feed()
 
         # time.sleep(1)  # Delay for testing purposes
 
-    camera.shutdown()  # Ensure camera is shutdown properly
-    # esp32_serial_adapter.close_serial()
+def main():
+
+    # Initialize TimeController; Camera and MediaPipeHands are created by the selected runtime
+    time_controller = TimeController()
+
+    # Interfaces declared in config.ini; only the activated ones (and their adapters) are imported, built and connected
+    plugin_registry = PluginRegistry.from_config()
+
+    # Several boards: connects and reconnects in the background, interfaces are routed by capability
+    # from .adapters.esp32_pool import ESP32AdapterPool
+    # esp32_pool = ESP32AdapterPool()
+    # esp32_pool.start()
+    # plugin_registry.provide_adapter("esp32", esp32_pool.route("led"))
+
+    interface_manager = InterfaceManager(registry=plugin_registry)
+
+    interface_manager.set_active(ACTIVE_INTERFACES)
+
+    if RECORD_PATH:
+        interface_manager.recorder = PayloadRecorder(RECORD_PATH)
+
+    # Hotkeys and the control socket post commands from their own threads; the loop applies them once per frame
+    controller = Controller(interface_manager, time_controller)
+    controller.start()
+
+    metrics_server = None
+    if metrics.enabled:
+        metrics_server = MetricsServer()
+        metrics_server.start()
+        metrics.start_summary()
+
+    try:
+        if RUNTIME in ("replay", "multi") and AUTO_LOAD_PROFILE:
+            # No single camera to identify; CAMERA_ID (or the user's latest profile) decides
+            load_profile(interface_manager, PROFILE_CAMERA_ID)
+
+        if RUNTIME == "replay":
+            # Feeds a recorded session through the interfaces; no camera or MediaPipe needed
+            plugin_registry.print_report()
+            PayloadReplay(REPLAY_PATH).run(interface_manager, speed=REPLAY_SPEED)
+        elif RUNTIME == "multi":
+            # Each camera gets its own MediaPipeHands in a worker process
+            plugin_registry.print_report()
+            runtime = controller.runtime = MultiSourceRuntime(interface_manager, time_controller)
+            runtime.run(should_exit=controller.should_exit)
+        elif RUNTIME in ("serial", "pipelined"):
+            with plugin_registry.timed("mediapipe", "import"):
+                from .mediapipe import MediaPipeHands
+                from .pipeline import PipelinedRuntime
+                from .quality import QualityController
+            with plugin_registry.timed("camera", "construct"):
+                camera = Camera()
+            with plugin_registry.timed("mediapipe", "construct"):
+                hands = MediaPipeHands()
+            plugin_registry.print_report()
+
+            if AUTO_LOAD_PROFILE:
+                load_profile(interface_manager, PROFILE_CAMERA_ID or camera.get_identity())
+
+            # Calibrate once per camera and user; later runs load the saved profile instead
+            # from .calibration.calibration import Calibration
+            # Calibration.calibrate_profile(camera, hands, user=PROFILE_USER, camera_id=PROFILE_CAMERA_ID or None)
+            # interface_manager.apply_profile()
+
+            if RUNTIME == "pipelined":
+                runtime = controller.runtime = PipelinedRuntime(camera, hands, interface_manager, time_controller, adaptive_quality=ADAPTIVE_QUALITY)
+                runtime.run(should_exit=controller.should_exit)
+            else:
+                quality_controller = QualityController(hands, camera.preparer, time_controller) if ADAPTIVE_QUALITY else None
+                inference_gate = InferenceGate(time_controller, camera) if MOTION_GATING or IDLE_MODE else None
+                controller.inference_gate = inference_gate
+                run_serial(camera, hands, time_controller, interface_manager, controller, quality_controller, inference_gate)
+
+            hands.close()
+            camera.shutdown()  # Ensure camera is shutdown properly
+        else:
+            raise ValueError(f"Unknown runtime '{RUNTIME}'. Expected 'serial', 'pipelined', 'multi' or 'replay'.")
+    finally:
+        controller.stop()
+        # Flush buffered records even if the runtime exits with an error
+        if interface_manager.recorder is not None:
+            interface_manager.recorder.close()
+        if metrics_server is not None:
+            metrics.stop_summary()
+            metrics_server.stop()
+        plugin_registry.close()
+
+    # esp32_pool.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,88 @@
+from .config.config import config
+from .metrics import metrics
+
+import cv2
+import numpy as np
+
+DEFAULT_INFERENCE_WIDTH = config.getint("Camera", "INFERENCE_WIDTH")
+MAX_CACHED_SHAPES = 8  # Buffer sets kept for alternating input sizes (e.g. ROI crops and full frames)
+
+class FramePreparer:
+    """Converts BGR camera frames into RGB inference frames using preallocated buffers.
+
+    The frame is downscaled first (BGR, one pass over the full-resolution image) and the
+    smaller result is converted to RGB, so neither step allocates once the buffers exist.
+    """
+
+    def __init__(self, inference_width: int = DEFAULT_INFERENCE_WIDTH, num_buffers: int = 1) -> None:
+        assert num_buffers >= 1, f"FramePreparer: num_buffers must be at least 1. Got {num_buffers} instead."
+
+        self.inference_width = inference_width
+        self.num_buffers = num_buffers
+
+        self._source_shape = None
+        self._rgb_buffers = []
+        self._next_buffer = 0
+        self._buffer_cache = {}
+        self._resize_cache = {}
+
+    def set_inference_width(self, width: int) -> None:
+        if width != self.inference_width:
+            self.inference_width = width
+            self._source_shape = None  # Force reallocation on the next frame
+            self._buffer_cache.clear()
+
+    def get_inference_dimensions(self, frame_width: int, frame_height: int) -> tuple:
+        # 0 (or anything at or above the native width) means "use the native resolution"
+        if self.inference_width <= 0 or self.inference_width >= frame_width:
+            return (frame_width, frame_height)
+
+        width = self.inference_width
+        height = max(int(round(frame_height * width / frame_width)), 1)
+        return (width, height)
+
+    def _allocate(self, frame_shape: tuple) -> None:
+        self._source_shape = frame_shape
+        self._next_buffer = 0
+
+        self._rgb_buffers = self._buffer_cache.get(frame_shape)
+        if self._rgb_buffers is not None:
+            return
+
+        frame_height, frame_width = frame_shape[0], frame_shape[1]
+        width, height = self.get_inference_dimensions(frame_width, frame_height)
+        self._rgb_buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(self.num_buffers)]
+
+        if len(self._buffer_cache) >= MAX_CACHED_SHAPES:
+            self._buffer_cache.pop(next(iter(self._buffer_cache)))
+        self._buffer_cache[frame_shape] = self._rgb_buffers
+
+    def _get_resize_buffer(self, target_size: tuple) -> np.ndarray:
+        buffer = self._resize_cache.get(target_size)
+        if buffer is None:
+            if len(self._resize_cache) >= MAX_CACHED_SHAPES:
+                self._resize_cache.pop(next(iter(self._resize_cache)))
+            buffer = np.empty((target_size[1], target_size[0], 3), dtype=np.uint8)
+            self._resize_cache[target_size] = buffer
+        return buffer
+
+    @metrics.timed("stage", "color_convert")  # Includes the downscale
+    def prepare(self, frame_bgr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        if out is None:
+            if frame_bgr.shape != self._source_shape:
+                self._allocate(frame_bgr.shape)
+
+            # Rotate through the buffers so a consumer may still hold the previous frame(s)
+            out = self._rgb_buffers[self._next_buffer]
+            self._next_buffer = (self._next_buffer + 1) % self.num_buffers
+
+        target_size = (out.shape[1], out.shape[0])
+
+        if target_size == (frame_bgr.shape[1], frame_bgr.shape[0]):
+            cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=out)
+            return out
+
+        resized_bgr = self._get_resize_buffer(target_size)
+        cv2.resize(frame_bgr, target_size, dst=resized_bgr, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(resized_bgr, cv2.COLOR_BGR2RGB, dst=out)
+        return out
@@ -0,0 +1,172 @@
+from .config.config import config
+from .metrics import metrics
+
+import time
+
+import cv2
+import numpy as np
+
+MOTION_GATING = config.getboolean("Gating", "MOTION_GATING")
+GATE_WITH_HANDS = config.getboolean("Gating", "GATE_WITH_HANDS")
+GATE_WIDTH = config.getint("Gating", "GATE_WIDTH")
+PIXEL_THRESHOLD = config.getint("Gating", "PIXEL_THRESHOLD")
+CHANGED_FRACTION = config.getfloat("Gating", "CHANGED_FRACTION")
+MAX_SKIPPED_FRAMES = config.getint("Gating", "MAX_SKIPPED_FRAMES")
+IDLE_MODE = config.getboolean("Gating", "IDLE_MODE")
+IDLE_AFTER_S = config.getfloat("Gating", "IDLE_AFTER_S")
+IDLE_FPS = config.getfloat("Gating", "IDLE_FPS")
+
+# Nearest-neighbour sampling to this multiple of GATE_WIDTH comes first; the area average over
+# the samples then suppresses sensor noise without reading every pixel of the full frame
+SAMPLING_FACTOR = 4
+
+class MotionDetector:
+    """Frame differencing on a tiny grayscale copy of the frame.
+
+    A frame has motion when more than changed_fraction of its pixels differ from the reference
+    by more than pixel_threshold gray levels. The reference only moves on accept(), so slow
+    changes accumulate until they count as motion instead of slipping through frame by frame.
+    """
+
+    def __init__(self, width: int = GATE_WIDTH, pixel_threshold: int = PIXEL_THRESHOLD, changed_fraction: float = CHANGED_FRACTION) -> None:
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.changed_fraction = changed_fraction
+
+        self._source_shape = None
+        self._sampled = None
+        self._small = None
+        self._gray = None
+        self._reference = None
+        self._diff = None
+
+    def _allocate(self, frame_shape: tuple) -> None:
+        self._source_shape = frame_shape
+        height = max(int(round(frame_shape[0] * self.width / frame_shape[1])), 1)
+        self._sampled = np.empty((height * SAMPLING_FACTOR, self.width * SAMPLING_FACTOR, 3), dtype=np.uint8)
+        self._small = np.empty((height, self.width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, self.width), dtype=np.uint8)
+        self._reference = None
+        self._diff = np.empty((height, self.width), dtype=np.uint8)
+
+    @metrics.timed("stage", "motion_detect")
+    def has_motion(self, frame_bgr: np.ndarray) -> bool:
+        if frame_bgr.shape != self._source_shape:
+            self._allocate(frame_bgr.shape)
+
+        # Downscale first so the color conversion and differencing touch a few thousand pixels
+        cv2.resize(frame_bgr, (self._sampled.shape[1], self._sampled.shape[0]), dst=self._sampled, interpolation=cv2.INTER_NEAREST)
+        cv2.resize(self._sampled, (self.width, self._small.shape[0]), dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self._reference is None:
+            return True
+
+        cv2.absdiff(self._gray, self._reference, dst=self._diff)
+        cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+        return cv2.countNonZero(self._diff) > self.changed_fraction * self._diff.size
+
+    def accept(self) -> None:
+        # The frame last passed to has_motion() becomes the reference
+        if self._reference is None:
+            self._reference = self._gray.copy()
+        else:
+            self._reference, self._gray = self._gray, self._reference
+
+class InferenceGate:
+    """Decides per frame whether MediaPipe runs, and drops to an idle rate when nobody is there.
+
+    With motion gating, static frames skip inference and the caller reuses the last result;
+    inference still runs every max_skipped_frames frames. By default frames with hands are
+    never gated, so small finger movements cannot be missed. In idle mode, after idle_after_s
+    without hands the loop (and threaded capture) slows to idle_fps and only motion triggers
+    inference; the first frame with motion restores the previous rate and is inferred.
+    """
+
+    def __init__(self, time_controller, camera=None, motion_gating: bool = MOTION_GATING, idle_mode: bool = IDLE_MODE,
+                 gate_with_hands: bool = GATE_WITH_HANDS, max_skipped_frames: int = MAX_SKIPPED_FRAMES,
+                 idle_after_s: float = IDLE_AFTER_S, idle_fps: float = IDLE_FPS) -> None:
+        self.time_controller = time_controller
+        self.camera = camera
+        self.motion_gating = motion_gating
+        self.idle_mode = idle_mode
+        self.gate_with_hands = gate_with_hands
+        self.max_skipped_frames = max_skipped_frames
+        self.idle_after_ns = int(idle_after_s * 1e9)
+        self.idle_fps = idle_fps
+
+        self.detector = MotionDetector()
+        self.idle = False
+        self._active_fps = None
+        self._last_hands_ns = time.monotonic_ns()
+        self._skipped_in_row = 0
+
+        self.inferred = 0
+        self.skipped = 0
+        self.idle_periods = 0
+
+    def should_infer(self, frame_bgr: np.ndarray, hands_present: bool) -> bool:
+        # hands_present: whether the last inference result had hands
+        now_ns = time.monotonic_ns()
+        motion = self.detector.has_motion(frame_bgr)
+        if hands_present:
+            self._last_hands_ns = now_ns
+
+        if self.idle:
+            # Hands found by a periodic refresh wake it too (someone standing still)
+            if not motion and not hands_present:
+                return self._skip()
+            self.wake()
+        elif self.idle_mode and now_ns - self._last_hands_ns > self.idle_after_ns:
+            self.enter_idle()
+
+        if motion or not self.motion_gating or (hands_present and not self.gate_with_hands):
+            return self._infer()
+        return self._skip()
+
+    def enter_idle(self) -> None:
+        self.idle = True
+        self.idle_periods += 1
+        self._active_fps = self.time_controller.fps
+        self.time_controller.set_fps(self.idle_fps)
+        if self.camera is not None:
+            self.camera.set_capture_interval(1 / self.idle_fps)
+        print(f"[Gating] No hands for {self.idle_after_ns / 1e9:g} s, idling at {self.idle_fps:g} FPS")
+
+    def wake(self) -> None:
+        self.idle = False
+        self._last_hands_ns = time.monotonic_ns()  # A full idle_after_s for hands to show up
+        self.time_controller.set_fps(self._active_fps)
+        if self.camera is not None:
+            self.camera.set_capture_interval(0)
+        print(f"[Gating] Activity detected, resuming at {self._active_fps:g} FPS")
+
+    def set_active_fps(self, fps: float) -> None:
+        # While idle the new rate applies on wake; otherwise immediately
+        if self.idle:
+            self._active_fps = fps
+        else:
+            self.time_controller.set_fps(fps)
+
+    def get_stats(self) -> dict:
+        total = self.inferred + self.skipped
+        return {
+            "idle": self.idle,
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / total if total else 0.0,
+            "idle_periods": self.idle_periods,
+        }
+
+    def _infer(self) -> bool:
+        self.detector.accept()
+        self._skipped_in_row = 0
+        self.inferred += 1
+        return True
+
+    def _skip(self) -> bool:
+        # Periodic refresh so a slowly changing or missed scene is still re-checked
+        if self._skipped_in_row >= self.max_skipped_frames:
+            return self._infer()
+        self._skipped_in_row += 1
+        self.skipped += 1
+        return False
@@ -0,0 +1,147 @@
+from .config.config import config
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+
+from .payload import FramePayload, Hand, Handedness
+
+HYSTERESIS_RATIO = config.getfloat("Gestures", "HYSTERESIS_RATIO")
+MIN_HOLD_S = config.getfloat("Gestures", "MIN_HOLD_S")
+
+GestureEventType = Literal["press", "release", "hold"]
+
+@dataclass(frozen=True)
+class GestureDefinition:
+    """A gesture is active while every landmark pair is closer than its threshold.
+
+    The gesture enters below enter_threshold and only exits above exit_threshold
+    (hysteresis), must be held for min_hold_s before "press" fires, and optionally
+    fires a single "hold" event once it has been held for hold_s.
+    """
+    name: str
+    hand: Handedness
+    pairs: Tuple[Tuple[int, int], ...]
+    enter_threshold: float
+    exit_threshold: float = None
+    min_hold_s: float = MIN_HOLD_S
+    hold_s: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        if self.exit_threshold is None:
+            object.__setattr__(self, "exit_threshold", self.enter_threshold * HYSTERESIS_RATIO)
+        assert self.exit_threshold >= self.enter_threshold, f"Gesture '{self.name}': exit threshold must not be below the enter threshold."
+        assert len(self.pairs) > 0, f"Gesture '{self.name}': at least one landmark pair is required."
+
+def pinch_gesture(hand: Handedness, lm1: int, lm2: int, threshold: float, **kwargs) -> GestureDefinition:
+    # Named by hand and landmarks so interfaces asking for the same pinch share one definition
+    return GestureDefinition(name=f"pinch_{hand.lower()}_{lm1}_{lm2}", hand=hand, pairs=((lm1, lm2),), enter_threshold=threshold, **kwargs)
+
+@dataclass(slots=True)
+class GestureEvent:
+    name: str
+    type: GestureEventType
+    timestamp_ns: int
+    hand: Optional[Hand]
+
+@dataclass(slots=True)
+class _GestureState:
+    pressed: bool = False
+    candidate_since_ns: Optional[int] = None
+    pressed_since_ns: Optional[int] = None
+    hold_sent: bool = False
+
+@dataclass
+class _HandGroup:
+    # All gestures for one hand, evaluated with a single distance gather
+    definitions: List[GestureDefinition] = field(default_factory=list)
+    pairs: np.ndarray = None
+    slices: List[slice] = field(default_factory=list)
+    enter_thresholds: np.ndarray = None
+    exit_thresholds: np.ndarray = None
+
+class GestureEngine:
+    def __init__(self) -> None:
+        self.definitions: Dict[str, GestureDefinition] = {}
+        self.states: Dict[str, _GestureState] = {}
+        self._groups: Dict[str, _HandGroup] = {}
+
+    def register(self, definition: GestureDefinition) -> None:
+        existing = self.definitions.get(definition.name)
+        if existing is not None:
+            if existing != definition:
+                raise ValueError(f"Gesture '{definition.name}' is already registered with a different definition.")
+            return
+
+        self.definitions[definition.name] = definition
+        self.states[definition.name] = _GestureState()
+        self._rebuild_groups()
+
+    def _rebuild_groups(self) -> None:
+        self._groups = {}
+        for definition in self.definitions.values():
+            self._groups.setdefault(definition.hand, _HandGroup()).definitions.append(definition)
+
+        for group in self._groups.values():
+            pairs, enter, exit_ = [], [], []
+            for definition in group.definitions:
+                group.slices.append(slice(len(pairs), len(pairs) + len(definition.pairs)))
+                pairs.extend(definition.pairs)
+                enter.extend([definition.enter_threshold] * len(definition.pairs))
+                exit_.extend([definition.exit_threshold] * len(definition.pairs))
+            group.pairs = np.array(pairs, dtype=np.intp)
+            group.enter_thresholds = np.array(enter)
+            group.exit_thresholds = np.array(exit_)
+
+    def reset(self) -> None:
+        for name in self.states:
+            self.states[name] = _GestureState()
+
+    def update(self, payload: FramePayload) -> List[GestureEvent]:
+        events = []
+        timestamp_ns = payload.meta.timestamp_ns
+
+        for handedness, group in self._groups.items():
+            hand = next((h for h in payload.hands if h.handedness == handedness), None)
+
+            if hand is None:
+                for definition in group.definitions:
+                    self._step(definition, False, False, timestamp_ns, None, events)
+                continue
+
+            distances = hand.calculate_xy_distances(group.pairs)
+            within_enter = distances < group.enter_thresholds
+            within_exit = distances < group.exit_thresholds
+
+            for definition, pair_slice in zip(group.definitions, group.slices):
+                self._step(definition, within_enter[pair_slice].all(), within_exit[pair_slice].all(), timestamp_ns, hand, events)
+
+        return events
+
+    def _step(self, definition: GestureDefinition, entering: bool, holding: bool, timestamp_ns: int, hand: Optional[Hand], events: List[GestureEvent]) -> None:
+        state = self.states[definition.name]
+
+        if state.pressed:
+            if not holding:
+                state.pressed = False
+                state.pressed_since_ns = None
+                state.candidate_since_ns = None
+                events.append(GestureEvent(definition.name, "release", timestamp_ns, hand))
+            elif definition.hold_s is not None and not state.hold_sent and timestamp_ns - state.pressed_since_ns >= definition.hold_s * 1e9:
+                state.hold_sent = True
+                events.append(GestureEvent(definition.name, "hold", timestamp_ns, hand))
+            return
+
+        if not entering:
+            state.candidate_since_ns = None
+            return
+
+        if state.candidate_since_ns is None:
+            state.candidate_since_ns = timestamp_ns
+
+        if timestamp_ns - state.candidate_since_ns >= definition.min_hold_s * 1e9:
+            state.pressed = True
+            state.pressed_since_ns = timestamp_ns
+            state.hold_sent = False
+            events.append(GestureEvent(definition.name, "press", timestamp_ns, hand))
@@ -1,7 +1,9 @@
 from ..config.config import config
 
 from abc import ABC, abstractmethod
+from typing import List
 from ..payload import FramePayload
+from ..gestures import GestureDefinition, GestureEvent
 
 INTERFACE_NAME_LENGTH = config.getint("DefaultInterface", "NAME_LENGTH")
 DEBUG = config.getboolean("DEFAULT", "DEBUG")
@@ -36,6 +38,21 @@ class BaseInterface(ABC):
         self.enabled = False
         self.print_message("Disabled")
 
+    def get_gestures(self) -> List[GestureDefinition]:
+        # Gestures this interface wants events for; evaluated once per frame by the InterfaceManager
+        return []
+
+    def on_gesture(self, event: GestureEvent) -> None:
+        pass
+
+    def on_profile_changed(self) -> None:
+        # Called when a calibration profile is activated; rebuild anything derived from thresholds here
+        pass
+
+    def on_frame_end(self) -> None:
+        # Called once every active interface has handled the frame and its gestures
+        pass
+
     def print_message(self, message: str) -> None:
         if DEBUG:
             print(f"[{self.name}] {message}")
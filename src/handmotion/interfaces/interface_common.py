@@ -1,6 +1,9 @@
 from ..config.config import config
 from .base import BaseInterface
 from ..payload import FramePayload
+from ..calibration.profiles import profiles
+
+from typing import Optional, Tuple
 
 __all__ = ["config", "BaseInterface", "FramePayload"]
 
@@ -10,6 +13,10 @@ def get_hand_preference(interface: str) -> str:
 def get_click_threshold() -> float:
     return config.getfloat("MediaPipe", "CLICK_THRESHOLD")
 
+def get_pinch_thresholds(lm1: int, lm2: int, space: str = "xy") -> Tuple[float, Optional[float]]:
+    # (enter, exit) of the active calibration profile, else CLICK_THRESHOLD with the default exit
+    return profiles.get_pinch_thresholds(lm1, lm2, get_click_threshold(), space)
+
 def get_thumb_tip_index() -> int:
     return config.getint("LandmarkIndices", "THUMB_TIP")
 
@@ -3,6 +3,7 @@ from .interface_common import (
     BaseInterface,
     FramePayload,
     get_hand_preference,
+    get_pinch_thresholds,
     get_thumb_tip_index,
     get_index_finger_tip_index,
     get_middle_finger_tip_index,
@@ -11,6 +12,7 @@ from .interface_common import (
 )
 
 from ..adapters.esp32_serial import ESP32SerialAdapter
+from ..gestures import GestureEvent, pinch_gesture
 
 HAND_PREFERENCE = get_hand_preference("LEDInterface")
 
@@ -20,6 +22,14 @@ MIDDLE_FINGER_TIP = get_middle_finger_tip_index()
 RING_FINGER_TIP = get_ring_finger_tip_index()
 PINKY_TIP = get_pinky_tip_index()
 
+# Thumb to each fingertip, one pair per LED channel
+PINCH_PAIRS = [
+    (THUMB_TIP, INDEX_FINGER_TIP),
+    (THUMB_TIP, MIDDLE_FINGER_TIP),
+    (THUMB_TIP, RING_FINGER_TIP),
+    (THUMB_TIP, PINKY_TIP),
+]
+
 class LEDInterface(BaseInterface):
     id = "led"
     name = "LED Interface"
@@ -29,38 +39,32 @@ class LEDInterface(BaseInterface):
 
         # Track LED states in a list for scalability
         self.led_states = [False, False, False, False]
-        # Track whether a pinch is currently active (for edge detection)
-        self.pinch_active = [False, False, False, False]
+        self.on_profile_changed()
 
-    def on_frame(self, payload: FramePayload) -> None:
+    def on_profile_changed(self) -> None:
+        # One pinch gesture per channel, each with its own calibrated thresholds; the gesture engine handles edge detection
+        self.channel_gestures = []
+        for lm1, lm2 in PINCH_PAIRS:
+            enter, exit_ = get_pinch_thresholds(lm1, lm2)
+            self.channel_gestures.append(pinch_gesture(HAND_PREFERENCE, lm1, lm2, enter, exit_threshold=exit_))
+        self.channel_by_gesture = {gesture.name: i for i, gesture in enumerate(self.channel_gestures)}
 
-        if not super().on_frame(payload):
-            return
-
-        if not super().find_hand(payload, HAND_PREFERENCE):
-            return
+    def get_gestures(self) -> list:
+        return self.channel_gestures
 
-        self.pinch_fingers = [
-            self.hand_1.is_touching(THUMB_TIP, INDEX_FINGER_TIP),
-            self.hand_1.is_touching(THUMB_TIP, MIDDLE_FINGER_TIP),
-            self.hand_1.is_touching(THUMB_TIP, RING_FINGER_TIP),
-            self.hand_1.is_touching(THUMB_TIP, PINKY_TIP)
-        ]
-
-        for i, is_pinching in enumerate(self.pinch_fingers):
-
-            # Edge detection: trigger only when going from not-pinched to pinched
-            if is_pinching and not self.pinch_active[i]:
+    def on_frame(self, payload: FramePayload) -> None:
+        super().on_frame(payload)
 
-                self.pinch_active[i] = is_pinching
+    def on_gesture(self, event: GestureEvent) -> None:
+        if event.type != "press":
+            return
 
-                # Toggle LED state
-                self.led_states[i] = not self.led_states[i]
+        i = self.channel_by_gesture[event.name]
 
-                cmd = f"LED {'H' if self.led_states[i] else 'L'} {i}"
-                self.adapter.write_line(cmd)
+        # Toggle LED state
+        self.led_states[i] = not self.led_states[i]
 
-                self.print_message(f"Pinch detected on finger {i}. Sent: {cmd}")
+        cmd = f"LED {'H' if self.led_states[i] else 'L'} {i}"
+        self.adapter.write_line(cmd, key=f"LED {i}")
 
-            elif not is_pinching and self.pinch_active[i]:
-                self.pinch_active[i] = is_pinching
\ No newline at end of file
+        self.print_message(f"Pinch detected on finger {i}. Sent: {cmd}")
\ No newline at end of file
@@ -3,12 +3,14 @@ from .interface_common import (
     BaseInterface,
     FramePayload,
     get_hand_preference,
+    get_pinch_thresholds,
     get_thumb_tip_index,
     get_index_finger_tip_index,
     get_pinky_tip_index,
 )
 
 from ..adapters.esp32_serial import ESP32SerialAdapter
+from ..gestures import GestureEvent, pinch_gesture
 
 HAND_PREFERENCE = get_hand_preference("LEDInterface")
 
@@ -23,20 +25,20 @@ class LightInterface(BaseInterface):
     def __init__(self, context: dict) -> None:
         super().__init__(context, "esp32_serial_adapter", ESP32SerialAdapter)
 
-        self.pinch_state = False  # Track whether a pinch is currently active
+        self.on_profile_changed()
 
-    def on_frame(self, payload: FramePayload) -> None:
-
-        if not super().on_frame(payload):
-            return
+    def on_profile_changed(self) -> None:
+        enter, exit_ = get_pinch_thresholds(THUMB_TIP, INDEX_FINGER_TIP)
+        self.pinch_gesture = pinch_gesture(HAND_PREFERENCE, THUMB_TIP, INDEX_FINGER_TIP, enter, exit_threshold=exit_)
 
-        if not super().find_hand(payload, HAND_PREFERENCE):
-            return
+    def get_gestures(self) -> list:
+        return [self.pinch_gesture]
 
-        # Compute distances
-        is_pinch = self.hand_1.is_touching(THUMB_TIP, INDEX_FINGER_TIP)
+    def on_frame(self, payload: FramePayload) -> None:
+        super().on_frame(payload)
 
-        if is_pinch != self.pinch_state:
-            self.pinch_state = is_pinch
+    def on_gesture(self, event: GestureEvent) -> None:
+        # Toggle on every pinch state change, as before
+        if event.type in ("press", "release"):
             self.adapter.write_line("LIGHT TOGGLE")
             self.print_message("Pinch detected - Toggled Light")
\ No newline at end of file
@@ -3,7 +3,7 @@ from .interface_common import (
     BaseInterface,
     FramePayload,
     get_hand_preference,
-    get_click_threshold,
+    get_pinch_thresholds,
     get_thumb_tip_index,
     get_index_finger_tip_index,
 )
@@ -11,7 +11,6 @@ from .interface_common import (
 from ..adapters.esp32_serial import ESP32SerialAdapter
 
 HAND_PREFERENCE = get_hand_preference("MotorInterface")
-CLICK_THRESHOLD = get_click_threshold()
 
 THUMB_TIP = get_thumb_tip_index()
 INDEX_FINGER_TIP = get_index_finger_tip_index()
@@ -23,6 +22,12 @@ class MotorInterface(BaseInterface):
     def __init__(self, context: dict) -> None:
         super().__init__(context, "esp32_serial_adapter", ESP32SerialAdapter)
 
+        self.on_profile_changed()
+
+    def on_profile_changed(self) -> None:
+        # Throttle is measured in world space, so only an xyz profile replaces CLICK_THRESHOLD here
+        self.threshold, _ = get_pinch_thresholds(THUMB_TIP, INDEX_FINGER_TIP, space="xyz")
+
     def on_frame(self, payload: FramePayload) -> None:
         
         if not super().on_frame(payload):
@@ -31,11 +36,12 @@ class MotorInterface(BaseInterface):
         if not super().find_hand(payload, HAND_PREFERENCE):
             return
 
-        distance = self.hand_1.calculate_xyz_distance(THUMB_TIP, INDEX_FINGER_TIP)
+        distance = self.hand_1.predicted().calculate_xyz_distance(THUMB_TIP, INDEX_FINGER_TIP)
 
-        speed = (distance - CLICK_THRESHOLD) / (0.15 - CLICK_THRESHOLD) * 10
+        speed = (distance - self.threshold) / (0.15 - self.threshold) * 10
         speed = min(max(speed, 0), 10)
         
         command = f"THROTTLE {int(speed)}"
-        self.adapter.write_line(command)
+        # Keyed so only the newest throttle is sent, and only when it changes
+        self.adapter.write_line(command, key="THROTTLE")
         self.print_message(f"Sent command: {command}")
\ No newline at end of file
@@ -3,11 +3,13 @@ from .interface_common import (
     BaseInterface,
     FramePayload,
     get_hand_preference,
+    get_pinch_thresholds,
     get_thumb_tip_index,
     get_index_finger_tip_index,
 )
 
 from ..adapters.cursor import CursorAdapter
+from ..gestures import GestureEvent, pinch_gesture
 
 from ..payload import Landmark
 
@@ -26,6 +28,14 @@ class MouseInterface(BaseInterface):
         super().__init__(context, "mouse_controller", CursorAdapter)
 
         self.pos_x, self.pos_y = 0.5, 0.5  # Start in the center of the screen
+        self.on_profile_changed()
+
+    def on_profile_changed(self) -> None:
+        enter, exit_ = get_pinch_thresholds(THUMB_TIP, INDEX_FINGER_TIP)
+        self.click_gesture = pinch_gesture(HAND_PREFERENCE, THUMB_TIP, INDEX_FINGER_TIP, enter, exit_threshold=exit_)
+
+    def get_gestures(self) -> list:
+        return [self.click_gesture]
 
     def on_frame(self, payload: FramePayload) -> None:
 
@@ -35,14 +45,20 @@ class MouseInterface(BaseInterface):
         if not super().find_hand(payload, HAND_PREFERENCE):
             return
 
-        tracker: Landmark = self.hand_1.landmarks[TRACKER_LANDMARK]
+        # Extrapolated past the capture-to-dispatch delay when the motion model is enabled
+        tracker: Landmark = self.hand_1.predicted().get_landmark(TRACKER_LANDMARK)
 
         self.pos_x, self.pos_y = 1 - tracker.x, tracker.y
         self.adapter.move_norm(self.pos_x, self.pos_y)
 
         self.print_message(f"Cursor moved to: ({self.pos_x:.2f}, {self.pos_y:.2f})")
 
-        # Click Detection
-        if self.hand_1.is_touching(THUMB_TIP, INDEX_FINGER_TIP):
+    def on_gesture(self, event: GestureEvent) -> None:
+        # Click once per pinch instead of on every frame the pinch is held
+        if event.name == self.click_gesture.name and event.type == "press":
             self.adapter.click_once()
-            self.print_message("Click detected")
\ No newline at end of file
+            self.print_message("Click detected")
+
+    def on_frame_end(self) -> None:
+        # Issue only the latest cursor target of the frame
+        self.adapter.flush()
\ No newline at end of file
@@ -1,6 +1,11 @@
 from typing import Dict
+from .calibration.profiles import profiles
 from .interfaces.base import BaseInterface
 from .payload import FramePayload
+from .gestures import GestureEngine
+from .metrics import metrics
+from .motion import MotionPredictor
+from .plugins import PluginRegistry
 
 class InterfaceManager:
     _instance = None
@@ -12,11 +17,37 @@ class InterfaceManager:
             print("Warning: InterfaceManager instance already exists. Returning the existing instance.")
         return cls._instance
 
-    def __init__(self, interfaces: Dict[str, BaseInterface]):
-        self.interfaces = interfaces
-        self.active_ids = list(interfaces.keys())
+    def __init__(self, interfaces: Dict[str, BaseInterface] = None, registry: PluginRegistry = None):
+        self.interfaces = interfaces if interfaces is not None else {}
+        self.active_ids = list(self.interfaces.keys())
+        # Declared but not yet built interfaces; set_active() creates them on first activation
+        self.registry = registry
+
+        self._register_gestures()
+
+        # Latency compensation; interfaces read it through Hand.predicted()
+        self.motion_predictor = MotionPredictor()
+
+        # Optional PayloadRecorder; every dispatched payload is appended to it
+        self.recorder = None
+
         self._initialized = True
 
+    def _register_gestures(self) -> None:
+        # Shared gesture evaluation; each interface only receives events for gestures it registered
+        self.gesture_engine = GestureEngine()
+        self.gesture_subscriptions: Dict[str, set] = {}
+        for interface_id, interface in self.interfaces.items():
+            for definition in interface.get_gestures():
+                self.gesture_engine.register(definition)
+                self.gesture_subscriptions.setdefault(interface_id, set()).add(definition.name)
+
+    def apply_profile(self) -> None:
+        # Interfaces rebuild their gestures from the active calibration profile; gesture state starts over
+        for interface in self.interfaces.values():
+            interface.on_profile_changed()
+        self._register_gestures()
+
     def activate_all(self) -> None:
         for interface in self.interfaces.values():
             interface.enable()
@@ -31,6 +62,14 @@ class InterfaceManager:
 
     def set_active(self, interface_ids: list[str]) -> None:
 
+        created = False
+        for interface_id in interface_ids:
+            if interface_id not in self.interfaces and self.registry is not None and self.registry.has_interface(interface_id):
+                self.interfaces[interface_id] = self.registry.create_interface(interface_id)
+                created = True
+        if created:
+            self._register_gestures()
+
         self.deactivate_all()
 
         for interface_id in interface_ids:
@@ -47,6 +86,37 @@ class InterfaceManager:
     def get_active_interfaces(self) -> list[str]:
         return self.active_ids
 
-    def on_frame(self, payload: FramePayload) -> None:
+    def get_available_interfaces(self) -> list[str]:
+        # Built interfaces plus declared ones that set_active() can still create
+        declared = list(self.registry.interfaces) if self.registry is not None else []
+        return list(dict.fromkeys(list(self.interfaces) + declared))
+
+    def on_frame(self, payload: FramePayload, latency_ns: int = None) -> None:
+        # latency_ns: capture-to-dispatch latency of this frame, when the runtime knows it
+        if self.recorder is not None:
+            self.recorder.write(payload)
+
+        # A profile from another camera becomes active once its hand scale here is known
+        if profiles.pending is not None and profiles.observe(payload):
+            self.apply_profile()
+
+        with metrics.timer("stage", "motion_predict"):
+            self.motion_predictor.update(payload, latency_ns)
+
+        with metrics.timer("stage", "gestures"):
+            events = self.gesture_engine.update(payload)
+
+        for active_id in self.active_ids:
+            interface = self.interfaces[active_id]
+            with metrics.timer("interface", active_id):
+                interface.on_frame(payload)
+
+                subscriptions = self.gesture_subscriptions.get(active_id)
+                if not subscriptions or not interface.enabled:
+                    continue
+                for event in events:
+                    if event.name in subscriptions:
+                        interface.on_gesture(event)
+
         for active_id in self.active_ids:
-            self.interfaces[active_id].on_frame(payload)
+            self.interfaces[active_id].on_frame_end()
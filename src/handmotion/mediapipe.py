@@ -1,49 +1,295 @@
 from .config.config import config
 
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
 import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
+from mediapipe.tasks.python import BaseOptions
+from mediapipe.tasks.python import vision
+
+from .frame_prep import FramePreparer
+from .metrics import metrics
+from .payload import FramePayload
+from .payload_builder import HandArrays, PayloadBuilder
+from .roi import RoiTracker
 
+BACKEND = config.get("MediaPipe", "BACKEND")
+RUNNING_MODE = config.get("MediaPipe", "RUNNING_MODE")
+MODEL_ASSET_PATH = config.get("MediaPipe", "MODEL_ASSET_PATH")
 STATIC_IMAGE_MODE = config.getboolean("MediaPipe", "STATIC_IMAGE_MODE")
 MAX_NUM_HANDS = config.getint("MediaPipe", "MAX_NUM_HANDS")
 MIN_DETECTION_CONFIDENCE = config.getfloat("MediaPipe", "MIN_DETECTION_CONFIDENCE")
+MIN_PRESENCE_CONFIDENCE = config.getfloat("MediaPipe", "MIN_PRESENCE_CONFIDENCE")
 MIN_TRACKING_CONFIDENCE = config.getfloat("MediaPipe", "MIN_TRACKING_CONFIDENCE")
 MODEL_COMPLEXITY = config.getint("MediaPipe", "MODEL_COMPLEXITY")
+ROI_TRACKING = config.getboolean("MediaPipe", "ROI_TRACKING")
+ROI_REDETECT_INTERVAL = config.getint("MediaPipe", "ROI_REDETECT_INTERVAL")
+
+BACKENDS = ("solutions", "tasks")
+RUNNING_MODES = {
+    "IMAGE": vision.RunningMode.IMAGE,
+    "VIDEO": vision.RunningMode.VIDEO,
+    "LIVE_STREAM": vision.RunningMode.LIVE_STREAM,
+}
 
 class MediaPipeHands:
+    """Hand landmark inference with a pluggable backend.
+
+    - "solutions": legacy mp.solutions.hands.Hands, synchronous only.
+    - "tasks": Tasks HandLandmarker in IMAGE, VIDEO or LIVE_STREAM mode. LIVE_STREAM results
+      arrive on a MediaPipe thread and are collected with get_latest_result() or listeners.
+    """
+
     def __init__(
-            self, 
-            static_image_mode=STATIC_IMAGE_MODE, 
-            max_num_hands=MAX_NUM_HANDS, 
-            min_detection_confidence=MIN_DETECTION_CONFIDENCE, 
-            min_tracking_confidence=MIN_TRACKING_CONFIDENCE, 
-            model_complexity=MODEL_COMPLEXITY
+            self,
+            static_image_mode=STATIC_IMAGE_MODE,
+            max_num_hands=MAX_NUM_HANDS,
+            min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
+            model_complexity=MODEL_COMPLEXITY,
+            backend=BACKEND,
+            running_mode=RUNNING_MODE,
+            model_asset_path=MODEL_ASSET_PATH,
+            min_presence_confidence=MIN_PRESENCE_CONFIDENCE,
+            roi_tracking=ROI_TRACKING
             ):
-        
-        self.hands = mp.solutions.hands.Hands(
+
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown MediaPipe backend '{backend}'. Expected one of {BACKENDS}.")
+        if backend == "tasks" and running_mode not in RUNNING_MODES:
+            raise ValueError(f"Unknown running mode '{running_mode}'. Expected one of {tuple(RUNNING_MODES)}.")
+
+        self.backend = backend
+        self.running_mode = running_mode if backend == "tasks" else "IMAGE"
+        self.results = None
+
+        self._last_timestamp_ms = -1
+        self._result_lock = threading.Lock()
+        self._latest_result = None
+        self._latest_result_timestamp_ms = None
+        self._latest_result_consumed = True
+        self._result_listeners = []
+
+        self.max_num_hands = max_num_hands
+        self.roi_tracker = RoiTracker() if roi_tracking else None
+        self.roi = None
+        self._frames_since_full_detection = 0
+        self.crop_hands = None  # Stateless instance for ROI crops, see _create_crop_hands()
+        self._task_options = None
+
+        self.model_complexity = model_complexity
+        self._solutions_kwargs = dict(
             static_image_mode=static_image_mode,
             max_num_hands=max_num_hands,
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence,
-            model_complexity=model_complexity
-        )
-        print(
-            f"MediaPipe Hands initialized with parameters:\n"
-            f"  static_image_mode: {static_image_mode}\n"
-            f"  max_num_hands: {max_num_hands}\n"
-            f"  min_detection_confidence: {min_detection_confidence}\n"
-            f"  min_tracking_confidence: {min_tracking_confidence}\n"
-            f"  model_complexity: {model_complexity}"
         )
+        # Guards the legacy graph while it is rebuilt from another thread
+        self._hands_lock = threading.Lock()
+
+        if backend == "solutions":
+            self.hands = mp.solutions.hands.Hands(model_complexity=model_complexity, **self._solutions_kwargs)
+            self._static = static_image_mode
+            print(
+                f"MediaPipe Hands initialized with parameters:\n"
+                f"  static_image_mode: {static_image_mode}\n"
+                f"  max_num_hands: {max_num_hands}\n"
+                f"  min_detection_confidence: {min_detection_confidence}\n"
+                f"  min_tracking_confidence: {min_tracking_confidence}\n"
+                f"  model_complexity: {model_complexity}"
+            )
+        else:
+            model_path = Path(model_asset_path)
+            if not model_path.is_absolute():
+                model_path = Path(__file__).parent / model_path
+            if not model_path.exists():
+                raise FileNotFoundError(f"HandLandmarker model not found at {model_path}.")
+
+            self._task_options = dict(
+                base_options=BaseOptions(model_asset_path=str(model_path)),
+                num_hands=max_num_hands,
+                min_hand_detection_confidence=min_detection_confidence,
+                min_hand_presence_confidence=min_presence_confidence,
+                min_tracking_confidence=min_tracking_confidence,
+            )
+            options = vision.HandLandmarkerOptions(
+                running_mode=RUNNING_MODES[running_mode],
+                result_callback=self._on_async_result if running_mode == "LIVE_STREAM" else None,
+                **self._task_options
+            )
+            self.hands = vision.HandLandmarker.create_from_options(options)
+            self._static = running_mode == "IMAGE"
+            print(
+                f"MediaPipe HandLandmarker initialized with parameters:\n"
+                f"  running_mode: {running_mode}\n"
+                f"  model_asset_path: {model_path}\n"
+                f"  num_hands: {max_num_hands}\n"
+                f"  min_detection_confidence: {min_detection_confidence}\n"
+                f"  min_presence_confidence: {min_presence_confidence}\n"
+                f"  min_tracking_confidence: {min_tracking_confidence}"
+            )
+
+        if self.roi_tracker is not None:
+            self.crop_hands = self._create_crop_hands()
+
+    def _create_crop_hands(self):
+        # The legacy tracking graph and Tasks VIDEO mode carry a landmark ROI from one image to the
+        # next in that image's normalized coordinates. A crop that moves every frame (and the switch
+        # back to the full frame on redetection) breaks that, so crops get their own instance that
+        # runs palm detection on every image; the tracking instance only ever sees full frames.
+        if self._static:
+            return self.hands
+        if self.backend == "solutions":
+            return mp.solutions.hands.Hands(model_complexity=self.model_complexity,
+                                            **dict(self._solutions_kwargs, static_image_mode=True))
+        return vision.HandLandmarker.create_from_options(
+            vision.HandLandmarkerOptions(running_mode=vision.RunningMode.IMAGE, **self._task_options))
+
+    def is_async(self) -> bool:
+        return self.running_mode == "LIVE_STREAM"
+
+    def _next_timestamp_ms(self, timestamp_ms: int = None) -> int:
+        # Tasks VIDEO/LIVE_STREAM modes reject timestamps that do not strictly increase
+        if timestamp_ms is None:
+            timestamp_ms = time.monotonic_ns() // 1_000_000
+        timestamp_ms = max(int(timestamp_ms), self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def set_model_complexity(self, model_complexity: int) -> bool:
+        # Only the legacy graph has selectable complexity; rebuilding it resets its tracking state
+        if self.backend != "solutions" or model_complexity == self.model_complexity:
+            return False
+
+        hands = mp.solutions.hands.Hands(model_complexity=model_complexity, **self._solutions_kwargs)
+        with self._hands_lock:
+            old_hands, self.hands = self.hands, hands
+            self.model_complexity = model_complexity
+            old_crop_hands = self.crop_hands
+            if old_crop_hands is not None:
+                self.crop_hands = self._create_crop_hands()
+        old_hands.close()
+        if old_crop_hands is not None and old_crop_hands is not old_hands:
+            old_crop_hands.close()
+        print(f"MediaPipe Hands model_complexity set to {model_complexity}")
+        return True
+
+    @metrics.timed("stage", "inference")
+    def process_sync(self, image, timestamp_ms: int = None):
+        if self.backend == "solutions":
+            with self._hands_lock:
+                self.results = self.hands.process(image)
+            return self.results
 
-    def process_sync(self, image):
-        self.results = self.hands.process(image)
+        if self.is_async():
+            raise RuntimeError("MediaPipeHands: process_sync is unavailable in LIVE_STREAM mode. Use process_async instead.")
+
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image)
+        if self.running_mode == "VIDEO":
+            self.results = self.hands.detect_for_video(mp_image, self._next_timestamp_ms(timestamp_ms))
+        else:
+            self.results = self.hands.detect(mp_image)
         return self.results
 
+    @metrics.timed("stage", "inference")
+    def process_crop(self, image):
+        # Always a single, stateless detection; see _create_crop_hands()
+        if self.crop_hands is None:
+            raise RuntimeError("MediaPipeHands: process_crop requires roi_tracking.")
+        if self.backend == "solutions":
+            with self._hands_lock:
+                self.results = self.crop_hands.process(image)
+            return self.results
+
+        self.results = self.crop_hands.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=image))
+        return self.results
+
+    def process_roi(self, frame_bgr, preparer: FramePreparer, previous_payload: FramePayload = None, timestamp_ms: int = None) -> HandArrays:
+        # Crop to the hands found last frame; fall back to the full frame when tracking is lost.
+        # Results are returned in full-frame normalized coordinates.
+        frame_height, frame_width = frame_bgr.shape[0], frame_bgr.shape[1]
+
+        self.roi = None
+        if self.roi_tracker is not None and self._frames_since_full_detection < ROI_REDETECT_INTERVAL:
+            self.roi = self.roi_tracker.compute_roi(previous_payload, frame_width, frame_height)
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            arrays = PayloadBuilder.to_hand_arrays(self.process_crop(preparer.prepare(frame_bgr[y0:y1, x0:x1])))
+
+            if len(arrays) >= len(previous_payload.hands):
+                self._frames_since_full_detection += 1
+                return RoiTracker.remap(arrays, self.roi, frame_width, frame_height)
+            self.roi = None
+
+        # Full-frame detection also runs periodically so hands entering outside the crop are found
+        self._frames_since_full_detection = 0
+        return PayloadBuilder.to_hand_arrays(self.process_sync(preparer.prepare(frame_bgr), timestamp_ms))
+
+    @metrics.timed("stage", "inference_submit")
+    def process_async(self, image, timestamp_ms: int = None) -> int:
+        if not self.is_async():
+            raise RuntimeError("MediaPipeHands: process_async requires the tasks backend in LIVE_STREAM mode.")
+
+        timestamp_ms = self._next_timestamp_ms(timestamp_ms)
+        self.hands.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=image), timestamp_ms)
+        return timestamp_ms
+
+    def add_result_listener(self, listener: Callable) -> None:
+        # listener(result, timestamp_ms) is called on the MediaPipe callback thread
+        self._result_listeners.append(listener)
+
+    def _on_async_result(self, result, output_image, timestamp_ms: int) -> None:
+        # Submission timestamps are monotonic capture times, so this is capture-to-result latency
+        metrics.observe_ns("stage", "inference_async", time.monotonic_ns() - timestamp_ms * 1_000_000)
+
+        with self._result_lock:
+            self._latest_result = result
+            self._latest_result_timestamp_ms = timestamp_ms
+            self._latest_result_consumed = False
+
+        for listener in self._result_listeners:
+            listener(result, timestamp_ms)
+
+    def get_latest_result(self, new_only: bool = True):
+        # Returns None when no (new) LIVE_STREAM result has arrived since the last call
+        with self._result_lock:
+            if self._latest_result is None or (new_only and self._latest_result_consumed):
+                return None
+            self._latest_result_consumed = True
+            self.results = self._latest_result
+            return self.results
+
+    def get_latest_result_timestamp_ms(self) -> int:
+        return self._latest_result_timestamp_ms
+
+    def close(self) -> None:
+        if self.crop_hands is not None and self.crop_hands is not self.hands:
+            self.crop_hands.close()
+        self.hands.close()
+
     def annotate_image(self, image):
-        if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                mp.solutions.drawing_utils.draw_landmarks(
-                    image,
-                    hand_landmarks,
-                    mp.solutions.hands.HAND_CONNECTIONS
+        if self.results is None:
+            return image
+
+        if self.backend == "solutions":
+            hand_landmark_lists = self.results.multi_hand_landmarks or []
+        else:
+            hand_landmark_lists = []
+            for landmarks in self.results.hand_landmarks:
+                landmark_list = landmark_pb2.NormalizedLandmarkList()
+                landmark_list.landmark.extend(
+                    landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z) for lm in landmarks
                 )
+                hand_landmark_lists.append(landmark_list)
+
+        for hand_landmarks in hand_landmark_lists:
+            mp.solutions.drawing_utils.draw_landmarks(
+                image,
+                hand_landmarks,
+                mp.solutions.hands.HAND_CONNECTIONS
+            )
         return image
@@ -0,0 +1,248 @@
+from .config.config import config
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+
+ENABLED = config.getboolean("Metrics", "ENABLED")
+HOST = config.get("Metrics", "HOST")
+PORT = config.getint("Metrics", "PORT")
+SUMMARY_INTERVAL_S = config.getfloat("Metrics", "SUMMARY_INTERVAL_S")
+
+# Log-spaced bucket upper bounds from 1 us to ~9 s, 25% apart, so quantile estimates stay within one bucket width
+BUCKET_BOUNDS_NS = [int(1_000 * 1.25 ** i) for i in range(72)]
+
+# Histogram families and the label each one is keyed by
+FAMILIES = {
+    "stage": ("stage", "Latency of each frame pipeline stage."),
+    "interface": ("interface", "Latency of each interface's frame and gesture handling."),
+    "adapter": ("call", "Latency of adapter calls to devices."),
+    "startup": ("step", "Import, construction and connection time of plugins."),
+}
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; observing is one bisect and three additions."""
+    __slots__ = ("counts", "sum_ns", "count", "_lock")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)  # Last bucket is +Inf
+        self.sum_ns = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe_ns(self, value_ns: int) -> None:
+        index = bisect_left(BUCKET_BOUNDS_NS, value_ns)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum_ns += value_ns
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], int, int]:
+        with self._lock:
+            return list(self.counts), self.sum_ns, self.count
+
+    @staticmethod
+    def quantile_from(counts: List[int], count: int, q: float) -> float:
+        # Linear interpolation inside the bucket holding the q-th observation, in ns
+        if count == 0:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                if index == len(BUCKET_BOUNDS_NS):
+                    return float(BUCKET_BOUNDS_NS[-1])
+                lower = BUCKET_BOUNDS_NS[index - 1] if index > 0 else 0
+                upper = BUCKET_BOUNDS_NS[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return float(BUCKET_BOUNDS_NS[-1])
+
+    def quantile(self, q: float) -> float:
+        counts, _, count = self.snapshot()
+        return self.quantile_from(counts, count, q)
+
+class _Timer:
+    __slots__ = ("histogram", "start_ns")
+
+    def __init__(self, histogram: LatencyHistogram) -> None:
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe_ns(time.perf_counter_ns() - self.start_ns)
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = ENABLED) -> None:
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._summary_thread = None
+        self._summary_stop = threading.Event()
+
+    def histogram(self, family: str, label: str) -> LatencyHistogram:
+        key = (family, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            if family not in FAMILIES:
+                raise ValueError(f"Unknown metrics family '{family}'. Expected one of {list(FAMILIES)}.")
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def observe_ns(self, family: str, label: str, value_ns: int) -> None:
+        if self.enabled:
+            self.histogram(family, label).observe_ns(value_ns)
+
+    def timer(self, family: str, label: str):
+        # with metrics.timer("stage", "inference"): ...
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(family, label))
+
+    def timed(self, family: str, label: str) -> Callable:
+        # Decorator form of timer(); the enabled check happens per call so it can be toggled at runtime
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start_ns = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.histogram(family, label).observe_ns(time.perf_counter_ns() - start_ns)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        lines = []
+        histograms = sorted(self._histograms.items())
+
+        for family, (label_name, help_text) in FAMILIES.items():
+            name = f"handmotion_{family}_latency_seconds"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+
+            for (hist_family, label), histogram in histograms:
+                if hist_family != family:
+                    continue
+                counts, sum_ns, count = histogram.snapshot()
+                label_text = f'{label_name}="{label}"'
+
+                cumulative = 0
+                for bound_ns, bucket_count in zip(BUCKET_BOUNDS_NS, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{label_text},le="{bound_ns / 1e9:.9g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {count}')
+                lines.append(f"{name}_sum{{{label_text}}} {sum_ns / 1e9:.9g}")
+                lines.append(f"{name}_count{{{label_text}}} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def get_summary(self) -> Dict[Tuple[str, str], dict]:
+        summary = {}
+        for key, histogram in sorted(self._histograms.items()):
+            counts, sum_ns, count = histogram.snapshot()
+            summary[key] = {
+                "count": count,
+                "mean_ms": sum_ns / count / 1e6 if count else 0.0,
+                "p50_ms": LatencyHistogram.quantile_from(counts, count, 0.50) / 1e6,
+                "p95_ms": LatencyHistogram.quantile_from(counts, count, 0.95) / 1e6,
+                "p99_ms": LatencyHistogram.quantile_from(counts, count, 0.99) / 1e6,
+            }
+        return summary
+
+    def print_summary(self) -> None:
+        summary = self.get_summary()
+        if not summary:
+            return
+        print("[Metrics] " + " | ".join(
+            f"{label}: p50 {s['p50_ms']:.3f} / p95 {s['p95_ms']:.3f} / p99 {s['p99_ms']:.3f} ms"
+            for (_, label), s in summary.items()
+        ))
+
+    def start_summary(self, interval_s: float = SUMMARY_INTERVAL_S) -> None:
+        if self._summary_thread is not None or interval_s <= 0:
+            return
+        self._summary_stop.clear()
+        self._summary_thread = threading.Thread(target=self._summary_loop, args=(interval_s,), name="MetricsSummary", daemon=True)
+        self._summary_thread.start()
+
+    def stop_summary(self) -> None:
+        if self._summary_thread is None:
+            return
+        self._summary_stop.set()
+        self._summary_thread.join(timeout=1.0)
+        self._summary_thread = None
+
+    def _summary_loop(self, interval_s: float) -> None:
+        while not self._summary_stop.wait(interval_s):
+            self.print_summary()
+
+# Shared by every instrumented module
+metrics = MetricsRegistry()
+
+class MetricsServer:
+    """Serves the registry in Prometheus text format at http://HOST:PORT/metrics."""
+
+    def __init__(self, registry: MetricsRegistry = metrics, host: str = HOST, port: int = PORT) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                pass  # Keep scrapes out of the console
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+        print(f"[Metrics] Serving Prometheus metrics at http://{self.host}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=1.0)
+        self._server = None
+        self._thread = None
@@ -0,0 +1,132 @@
+from .config.config import config
+from .payload import FramePayload, Hand
+
+import functools
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+ENABLED = config.getboolean("MotionModel", "ENABLED")
+VELOCITY_SMOOTHING = config.getfloat("MotionModel", "VELOCITY_SMOOTHING")
+USE_ACCELERATION = config.getboolean("MotionModel", "USE_ACCELERATION")
+ACCELERATION_SMOOTHING = config.getfloat("MotionModel", "ACCELERATION_SMOOTHING")
+DAMPING = config.getfloat("MotionModel", "DAMPING")
+EXTRA_HORIZON_MS = config.getfloat("MotionModel", "EXTRA_HORIZON_MS")
+MAX_HORIZON_MS = config.getfloat("MotionModel", "MAX_HORIZON_MS")
+FALLBACK_LATENCY_MS = config.getfloat("MotionModel", "FALLBACK_LATENCY_MS")
+LATENCY_SMOOTHING = config.getfloat("MotionModel", "LATENCY_SMOOTHING")
+MAX_GAP_MS = config.getfloat("MotionModel", "MAX_GAP_MS")
+
+HandKey = Tuple[str, int]  # (handedness, n-th hand of that handedness in the frame)
+
+class HandMotion:
+    """Velocity and acceleration of one hand's landmarks, estimated from consecutive frames.
+
+    Normalized and world landmarks are tracked together as one (42, 3) array. Velocity is the
+    smoothed finite difference of the raw positions, acceleration the smoothed difference of
+    velocities; positions themselves are not filtered, so tracking adds no lag. Arrays are
+    replaced rather than updated in place, so a frame's snapshot stays valid after the next update.
+    """
+    __slots__ = ("position", "velocity", "acceleration", "timestamp_ns")
+
+    def __init__(self, position: np.ndarray, timestamp_ns: int) -> None:
+        self.position = position
+        self.velocity = np.zeros_like(position)
+        self.acceleration = np.zeros_like(position)
+        self.timestamp_ns = timestamp_ns
+
+    def update(self, position: np.ndarray, timestamp_ns: int) -> None:
+        rate = 1e9 / (timestamp_ns - self.timestamp_ns)
+        velocity = (position - self.position) * rate
+        if USE_ACCELERATION:
+            acceleration = (velocity - self.velocity) * rate
+            self.acceleration = self.acceleration + ACCELERATION_SMOOTHING * (acceleration - self.acceleration)
+        self.velocity = self.velocity + VELOCITY_SMOOTHING * (velocity - self.velocity)
+        self.position = position
+        self.timestamp_ns = timestamp_ns
+
+    def extrapolate(self, horizon_s: float, damping: float = DAMPING) -> np.ndarray:
+        return extrapolate(self.position, self.velocity, self.acceleration, horizon_s, damping)
+
+def extrapolate(position: np.ndarray, velocity: np.ndarray, acceleration: np.ndarray, horizon_s: float, damping: float) -> np.ndarray:
+    # Scalars are folded first so each term is a single array operation
+    predicted = position + velocity * ((1.0 - damping) * horizon_s)
+    if USE_ACCELERATION:
+        predicted += acceleration * ((1.0 - damping) * 0.5 * horizon_s * horizon_s)
+    return predicted
+
+class MotionPredictor:
+    """Extrapolates every hand forward by the measured pipeline latency.
+
+    update() runs once per frame (the InterfaceManager calls it before dispatch) and attaches
+    a prediction to each Hand, so any interface can use hand.predicted() in place of the hand.
+    The prediction is only computed when an interface asks for it. The horizon is the smoothed capture-to-dispatch latency plus EXTRA_HORIZON_MS, capped
+    at MAX_HORIZON_MS. Hands are matched across frames by handedness; a hand that disappears
+    or a gap longer than MAX_GAP_MS restarts its estimate from rest.
+    """
+
+    def __init__(self, enabled: bool = ENABLED, damping: float = DAMPING, extra_horizon_ms: float = EXTRA_HORIZON_MS,
+                 max_horizon_ms: float = MAX_HORIZON_MS) -> None:
+        self.enabled = enabled
+        self.damping = damping
+        self.extra_horizon_ns = int(extra_horizon_ms * 1e6)
+        self.max_horizon_ns = int(max_horizon_ms * 1e6)
+        self.max_gap_ns = int(MAX_GAP_MS * 1e6)
+
+        self.latency_ns: Optional[float] = None
+        self.hands: Dict[HandKey, HandMotion] = {}
+
+    def observe_latency(self, latency_ns: int) -> None:
+        if self.latency_ns is None:
+            self.latency_ns = float(latency_ns)
+        else:
+            self.latency_ns += LATENCY_SMOOTHING * (latency_ns - self.latency_ns)
+
+    def get_horizon_ns(self) -> int:
+        latency_ns = self.latency_ns if self.latency_ns is not None else FALLBACK_LATENCY_MS * 1e6
+        return int(min(max(latency_ns + self.extra_horizon_ns, 0), self.max_horizon_ns))
+
+    def update(self, payload: FramePayload, latency_ns: int = None) -> None:
+        if not self.enabled:
+            return
+        if latency_ns is not None:
+            self.observe_latency(latency_ns)
+
+        timestamp_ns = payload.meta.timestamp_ns
+        horizon_s = self.get_horizon_ns() / 1e9
+        seen = {}
+        tracked = {}
+
+        for hand in payload.hands:
+            index = seen.get(hand.handedness, 0)
+            seen[hand.handedness] = index + 1
+            key = (hand.handedness, index)
+            position = np.concatenate((hand.landmarks, hand.world_landmarks))
+
+            motion = self.hands.get(key)
+            if motion is None or not 0 < timestamp_ns - motion.timestamp_ns <= self.max_gap_ns:
+                motion = HandMotion(position, timestamp_ns)
+            else:
+                motion.update(position, timestamp_ns)
+            tracked[key] = motion
+
+            hand.set_prediction(functools.partial(self._predict_hand, hand, motion.position, motion.velocity,
+                                                  motion.acceleration, horizon_s, self.damping))
+
+        self.hands = tracked  # Hands not seen this frame start over when they return
+
+    @staticmethod
+    def _predict_hand(hand: Hand, position: np.ndarray, velocity: np.ndarray, acceleration: np.ndarray,
+                      horizon_s: float, damping: float) -> Hand:
+        predicted = extrapolate(position, velocity, acceleration, horizon_s, damping)
+        landmarks = predicted[:21]
+        # Extrapolation may overshoot the frame edge, but never further out than the measured landmark
+        measured, xy = hand.landmarks[:, :2], landmarks[:, :2]
+        np.maximum(xy, np.minimum(measured, 0.0), out=xy)  # np.clip with array bounds is several times slower
+        np.minimum(xy, np.maximum(measured, 1.0), out=xy)
+        return Hand(in_frame=hand.in_frame, handedness=hand.handedness, confidence=hand.confidence,
+                    landmarks=landmarks, world_landmarks=predicted[21:], source_id=hand.source_id)
+
+    def reset(self) -> None:
+        self.hands.clear()
+        self.latency_ns = None
@@ -0,0 +1,338 @@
+from .config.config import config
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from .frame_prep import FramePreparer
+from .manager import InterfaceManager
+from .payload import FramePayload
+from .payload_builder import PayloadBuilder
+from .time_controller import CaptureThrottle, TimeController
+
+CAMERA_INDICES = [int(index) for index in config.get("MultiSource", "CAMERA_INDICES").split(",")]
+RING_SLOTS = config.getint("MultiSource", "RING_SLOTS")
+START_METHOD = config.get("MultiSource", "START_METHOD")
+MERGE = config.get("MultiSource", "MERGE")
+DEFAULT_RESOLUTION = (config.getint("Camera", "RESOLUTION_X"), config.getint("Camera", "RESOLUTION_Y"))
+DEFAULT_INFERENCE_WIDTH = config.getint("Camera", "INFERENCE_WIDTH")
+
+MERGE_MODES = ("views", "stations")
+
+# Per-slot metadata columns
+META_SEQ, META_TIMESTAMP_NS, META_WIDTH, META_HEIGHT = range(4)
+
+class SharedFrameRing:
+    """Fixed-size ring of RGB frames in shared memory.
+
+    Pixels never cross the process boundary through a pipe: the producer writes into a slot
+    and only (slot, seq) is sent to the consumer. Each slot has a sequence number so the
+    consumer can detect a slot that was overwritten while it was being processed.
+    """
+
+    def __init__(self, slots: int, frame_shape: tuple, name: str = None, meta_name: str = None) -> None:
+        self.slots = slots
+        self.frame_shape = frame_shape
+        self._owner = name is None
+
+        frame_bytes = int(np.prod(frame_shape))
+        self._frames_shm = shared_memory.SharedMemory(name=name, create=self._owner, size=frame_bytes * slots)
+        self._meta_shm = shared_memory.SharedMemory(name=meta_name, create=self._owner, size=slots * 4 * 8)
+
+        self.frames = np.ndarray((slots, *frame_shape), dtype=np.uint8, buffer=self._frames_shm.buf)
+        self.meta = np.ndarray((slots, 4), dtype=np.int64, buffer=self._meta_shm.buf)
+        if self._owner:
+            self.meta[:] = -1
+
+        self._next_slot = 0
+
+    @property
+    def names(self) -> tuple:
+        return (self._frames_shm.name, self._meta_shm.name)
+
+    def acquire_slot(self) -> int:
+        slot = self._next_slot
+        self._next_slot = (self._next_slot + 1) % self.slots
+        self.meta[slot, META_SEQ] = -1  # Invalidate while the slot is being rewritten
+        return slot
+
+    def publish(self, slot: int, seq: int, timestamp_ns: int, frame_dimensions: tuple) -> None:
+        self.meta[slot, META_TIMESTAMP_NS] = timestamp_ns
+        self.meta[slot, META_WIDTH] = frame_dimensions[0]
+        self.meta[slot, META_HEIGHT] = frame_dimensions[1]
+        self.meta[slot, META_SEQ] = seq  # Written last: marks the slot as complete
+
+    def close(self) -> None:
+        # Views must be released before the underlying buffers can be closed
+        del self.frames
+        del self.meta
+        self._frames_shm.close()
+        self._meta_shm.close()
+        if self._owner:
+            self._frames_shm.unlink()
+            self._meta_shm.unlink()
+
+def _inference_worker(source_id: int, ring_names: tuple, slots: int, frame_shape: tuple, task_queue, result_queue, hands_kwargs: dict) -> None:
+    # Runs in a child process: one MediaPipeHands per source
+    from .mediapipe import MediaPipeHands
+
+    ring = SharedFrameRing(slots, frame_shape, name=ring_names[0], meta_name=ring_names[1])
+    hands = MediaPipeHands(**hands_kwargs)
+
+    try:
+        while True:
+            task = task_queue.get()
+
+            # Skip straight to the newest frame if several were published meanwhile
+            try:
+                while task is not None:
+                    task = task_queue.get_nowait()
+            except queue.Empty:
+                pass
+            if task is None:
+                break
+
+            slot, seq = task
+            if ring.meta[slot, META_SEQ] != seq:
+                result_queue.put((source_id, seq, None))  # Overwritten before we got to it
+                continue
+
+            timestamp_ns = int(ring.meta[slot, META_TIMESTAMP_NS])
+            frame_dimensions = (int(ring.meta[slot, META_WIDTH]), int(ring.meta[slot, META_HEIGHT]))
+            results = hands.process_sync(ring.frames[slot], timestamp_ns // 1_000_000)
+
+            if ring.meta[slot, META_SEQ] != seq:
+                result_queue.put((source_id, seq, None))  # Torn read: slot was rewritten mid-inference
+                continue
+
+            result_queue.put((source_id, seq, (timestamp_ns, frame_dimensions, PayloadBuilder.to_hand_arrays(results))))
+    finally:
+        hands.close()
+        ring.close()
+
+class CaptureSource:
+    def __init__(self, camera_index: int, width: int = DEFAULT_RESOLUTION[0], height: int = DEFAULT_RESOLUTION[1]) -> None:
+        self.camera_index = camera_index
+        self.cap = cv2.VideoCapture(camera_index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open camera with index {camera_index}.")
+
+        self.frame_dimensions = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        print(f"Capture source initialized with index [{camera_index}] at resolution {self.frame_dimensions[0]}x{self.frame_dimensions[1]}")
+
+    def release(self) -> None:
+        if self.cap.isOpened():
+            self.cap.release()
+
+class MultiSourceRuntime:
+    """Captures several cameras and runs one MediaPipeHands worker process per camera.
+
+    Every capture tick grabs all cameras back to back (grab() first, then retrieve(), so
+    exposures line up) and stamps them with one tick sequence number. Worker results are
+    aligned by tick and merged into a single FramePayload per tick.
+    """
+
+    def __init__(self, interface_manager: InterfaceManager, time_controller: TimeController, camera_indices: List[int] = CAMERA_INDICES,
+                 inference_width: int = DEFAULT_INFERENCE_WIDTH, slots: int = RING_SLOTS, hands_kwargs: dict = None,
+                 merge: str = MERGE) -> None:
+        if merge not in MERGE_MODES:
+            raise ValueError(f"Unknown merge mode '{merge}'. Expected one of {MERGE_MODES}.")
+
+        self.merge = merge
+        self.interface_manager = interface_manager
+        self.time_controller = time_controller
+        self.sources = [CaptureSource(index) for index in camera_indices]
+        self.preparer = FramePreparer(inference_width=inference_width)
+
+        self._context = mp.get_context(START_METHOD)
+        self.result_queue = self._context.Queue()
+        self.rings = []
+        self.task_queues = []
+        self.workers = []
+
+        for source_id, source in enumerate(self.sources):
+            width, height = self.preparer.get_inference_dimensions(*source.frame_dimensions)
+            ring = SharedFrameRing(slots, (height, width, 3))
+            task_queue = self._context.Queue()
+            worker = self._context.Process(
+                target=_inference_worker,
+                args=(source_id, ring.names, slots, ring.frame_shape, task_queue, self.result_queue, hands_kwargs or {}),
+                name=f"HandsWorker-{source_id}",
+                daemon=True,
+            )
+            self.rings.append(ring)
+            self.task_queues.append(task_queue)
+            self.workers.append(worker)
+
+        self._pending: Dict[int, dict] = {}
+        self._tick = 0
+        self._start_timestamp_ns = None
+        self._last_timestamp_ns = None
+        self._running = False
+        self._capture_thread = None
+        self._capture_error = None
+        self.capture_throttle = CaptureThrottle()  # Rate and pause from the controller; 0 FPS follows the cameras
+
+        self.dropped_ticks = 0
+        self.torn_frames = 0
+
+    def start(self) -> None:
+        for worker in self.workers:
+            worker.start()
+
+        self._running = True
+        self.time_controller.start()
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="MultiSourceCapture", daemon=True)
+        self._capture_thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout=1.0)
+
+        for task_queue in self.task_queues:
+            task_queue.put(None)
+        for worker in self.workers:
+            worker.join(timeout=2.0)
+            if worker.is_alive():
+                worker.terminate()
+
+        for source in self.sources:
+            source.release()
+        for ring in self.rings:
+            ring.close()
+
+    def set_fps(self, fps: float) -> None:
+        self.capture_throttle.set_fps(fps)
+        self.time_controller.set_fps(fps)  # Reported target rate only
+
+    def set_paused(self, paused: bool) -> None:
+        # Paused ticks are never captured, so the workers have nothing to infer
+        self.capture_throttle.set_paused(paused)
+
+    def _capture_loop(self) -> None:
+        try:
+            while self._running:
+                if self.capture_throttle.wait():
+                    self.capture_once()
+        except Exception as e:
+            self._capture_error = e
+            self._running = False
+
+    def capture_once(self) -> int:
+        for source in self.sources:
+            if not source.cap.grab():
+                raise RuntimeError(f"Failed to grab frame from camera {source.camera_index}.")
+        timestamp_ns = time.monotonic_ns()
+
+        self._tick += 1
+        for source_id, source in enumerate(self.sources):
+            ret, frame_bgr = source.cap.retrieve()
+            if not ret:
+                raise RuntimeError(f"Failed to retrieve frame from camera {source.camera_index}.")
+
+            ring = self.rings[source_id]
+            slot = ring.acquire_slot()
+            self.preparer.prepare(frame_bgr, out=ring.frames[slot])
+            ring.publish(slot, self._tick, timestamp_ns, (frame_bgr.shape[1], frame_bgr.shape[0]))
+            self.task_queues[source_id].put((slot, self._tick))
+
+        return self._tick
+
+    def _collect(self, source_id: int, tick: int, result) -> Dict[int, FramePayload]:
+        if result is None:
+            self.torn_frames += 1
+            return None
+
+        pending = self._pending.setdefault(tick, {})
+        pending[source_id] = result
+        if len(pending) < len(self.sources):
+            return None
+
+        # Tick complete: anything older can no longer complete in order
+        for stale_tick in [t for t in self._pending if t < tick]:
+            del self._pending[stale_tick]
+            self.dropped_ticks += 1
+        del self._pending[tick]
+
+        self.time_controller.update(sleep_time_s=0)
+        timestamp_ns = min(r[0] for r in pending.values())
+        if self._start_timestamp_ns is None:
+            self._start_timestamp_ns = timestamp_ns
+        delta_ns = timestamp_ns - self._last_timestamp_ns if self._last_timestamp_ns is not None else 0
+        self._last_timestamp_ns = timestamp_ns
+
+        return {
+            sid: PayloadBuilder.build_payload(frame_dimensions=frame_dimensions,
+                                              time_ns=timestamp_ns - self._start_timestamp_ns,
+                                              time_delta_ns=delta_ns,
+                                              hands=hand_arrays,
+                                              fps_estimate=self.time_controller.get_fps_estimate(),
+                                              source_id=sid)
+            for sid, (_, frame_dimensions, hand_arrays) in sorted(pending.items())
+        }
+
+    def poll(self, timeout_s: float = None) -> Dict[int, FramePayload]:
+        # Returns the per-source payloads of the next fully aligned tick, or None
+        if self._capture_error is not None:
+            raise RuntimeError("Multi-source capture failed.") from self._capture_error
+        for worker in self.workers:
+            if not worker.is_alive():
+                raise RuntimeError(f"Inference worker {worker.name} exited with code {worker.exitcode}.")
+
+        deadline = time.monotonic() + timeout_s if timeout_s is not None else None
+        while True:
+            remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+            try:
+                source_id, tick, result = self.result_queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+
+            payloads = self._collect(source_id, tick, result)
+            if payloads is not None:
+                return payloads
+
+    def run(self, should_exit: Callable[[], bool]) -> None:
+        self.start()
+        try:
+            while not should_exit():
+                payloads = self.poll(timeout_s=0.1)
+                if payloads is None:
+                    continue
+                # Latency from the oldest capture of the tick
+                self.interface_manager.on_frame(merge_payloads(payloads, self.merge), time.monotonic_ns() - self._last_timestamp_ns)
+        finally:
+            self.stop()
+
+def merge_payloads(payloads: Dict[int, FramePayload], merge: str = MERGE) -> FramePayload:
+    # Combine the per-source payloads of one tick; every hand keeps the source_id of its camera.
+    # Gestures and find_hand() use the first hand of each handedness, so the order matters:
+    # - "views": the cameras watch the same hands. Only the most confident hand of each handedness
+    #   is kept and the metadata (resolution) comes from the source of the most confident hand.
+    # - "stations": each camera watches its own user. All hands are kept, ordered by source, and
+    #   interfaces route by Hand.source_id; the metadata comes from the first source.
+    ordered = [payloads[source_id] for source_id in sorted(payloads)]
+    hands = [hand for payload in ordered for hand in payload.hands]
+
+    if merge == "views":
+        best = {}
+        for hand in hands:
+            if hand.handedness not in best or hand.confidence > best[hand.handedness].confidence:
+                best[hand.handedness] = hand
+        hands = sorted(best.values(), key=lambda hand: hand.confidence, reverse=True)
+
+    meta = payloads[hands[0].source_id].meta if merge == "views" and hands else ordered[0].meta
+    return FramePayload(
+        meta=meta,  # Every source of a tick carries the same tick timestamp
+        hands=hands,
+    )
@@ -1,9 +1,9 @@
-import math
-
 from .config.config import config
 
-from dataclasses import dataclass
-from typing import List, Literal
+from dataclasses import dataclass, field
+from typing import Callable, List, Literal, Sequence
+
+import numpy as np
 
 Handedness = Literal["Left", "Right"]
 
@@ -16,68 +16,128 @@ PINKY_TIP = config.getint("LandmarkIndices", "PINKY_TIP")
 
 CLICK_THRESHOLD = config.getfloat("MediaPipe", "CLICK_THRESHOLD")
 
-@dataclass(kw_only=True)
 class Landmark:
-    x: float
-    y: float
-    z: float
+    """(x, y, z) view over one row of a Hand's landmark array."""
+    __slots__ = ("_xyz",)
 
-    def __post_init__(self) -> None:
-        pass
+    def __init__(self, *, x: float, y: float, z: float) -> None:
+        self._xyz = np.array((x, y, z), dtype=np.float32)
+
+    @classmethod
+    def from_row(cls, xyz: np.ndarray) -> "Landmark":
+        landmark = cls.__new__(cls)
+        landmark._xyz = xyz
+        return landmark
+
+    @property
+    def x(self) -> float:
+        return float(self._xyz[0])
+
+    @property
+    def y(self) -> float:
+        return float(self._xyz[1])
+
+    @property
+    def z(self) -> float:
+        return float(self._xyz[2])
 
     def to_tuple(self) -> tuple[float, float, float]:
         return (self.x, self.y, self.z)
 
-@dataclass
-class NormalizedLandmark(Landmark):
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(x={self.x}, y={self.y}, z={self.z})"
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        # assert 0.0 <= self.x <= 1.0, f"x must be in [0,1]. Got {self.x} instead."
-        # assert 0.0 <= self.y <= 1.0, f"y must be in [0,1]. Got {self.y} instead."
+class NormalizedLandmark(Landmark):
+    __slots__ = ()
 
-@dataclass
+@dataclass(slots=True)
 class Hand:
     in_frame: bool
     handedness: Handedness
     confidence: float
-    landmarks: List[NormalizedLandmark]  # len == 21
-    world_landmarks: List[Landmark]  # len == 21
+    landmarks: np.ndarray  # (21, 3) float32, normalized
+    world_landmarks: np.ndarray  # (21, 3) float32, meters
+    source_id: int = 0  # Camera the hand was seen by; only the multi runtime has more than one
+
+    # 21x21 pairwise distance matrices, computed on first use and shared by every query this frame
+    _xy_distances: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    _xyz_distances: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    # This hand extrapolated to the present by the MotionPredictor, built on first use
+    _predict: Callable[[], "Hand"] = field(default=None, init=False, repr=False, compare=False)
+    _predicted: "Hand" = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
-        assert len(self.landmarks) == 21, f"Hand Initialization: Hand must have exactly 21 landmarks. Got {len(self.landmarks)} instead."
-        assert len(self.world_landmarks) == 21, f"Hand Initialization: Hand must have exactly 21 world landmarks. Got {len(self.world_landmarks)} instead."
+        assert self.landmarks.shape == (21, 3), f"Hand Initialization: Hand must have exactly 21 landmarks. Got {self.landmarks.shape} instead."
+        assert self.world_landmarks.shape == (21, 3), f"Hand Initialization: Hand must have exactly 21 world landmarks. Got {self.world_landmarks.shape} instead."
         assert 0.0 <= self.confidence <= 1.0, f"Hand Initialization: Hand Confidence must be in [0,1]. Got {self.confidence} instead."
 
+    def set_prediction(self, predict: Callable[[], "Hand"]) -> None:
+        self._predict = predict
+        self._predicted = None
+
+    def predicted(self) -> "Hand":
+        # Latency-compensated hand for targets (cursor, actuators); the hand itself without a prediction
+        if self._predicted is None:
+            if self._predict is None:
+                return self
+            self._predicted = self._predict()
+        return self._predicted
+
     def get_landmark(self, index: int) -> NormalizedLandmark:
-        return self.landmarks[index]
+        return NormalizedLandmark.from_row(self.landmarks[index])
 
     def get_world_landmark(self, index: int) -> Landmark:
-        return self.world_landmarks[index]
-    
+        return Landmark.from_row(self.world_landmarks[index])
+
+    @staticmethod
+    def _pairwise_distances(points: np.ndarray) -> np.ndarray:
+        # Per-axis outer differences are cheaper than a (21, 21, k) broadcast at this size
+        x, y = points[:, 0], points[:, 1]
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        if points.shape[1] == 2:
+            return np.hypot(dx, dy)
+
+        z = points[:, 2]
+        dz = z[:, None] - z[None, :]
+        return np.sqrt(dx * dx + dy * dy + dz * dz)
+
+    @property
+    def xy_distances(self) -> np.ndarray:
+        if self._xy_distances is None:
+            self._xy_distances = self._pairwise_distances(self.landmarks[:, :2])
+        return self._xy_distances
+
+    @property
+    def xyz_distances(self) -> np.ndarray:
+        if self._xyz_distances is None:
+            self._xyz_distances = self._pairwise_distances(self.world_landmarks)
+        return self._xyz_distances
+
     def calculate_xy_distance(self, lm1_idx: int, lm2_idx: int) -> float:
-        lm1 = self.get_landmark(lm1_idx)
-        lm2 = self.get_landmark(lm2_idx)
-        return math.sqrt((lm1.x - lm2.x) ** 2 + 
-                         (lm1.y - lm2.y) ** 2)
-    
+        return float(self.xy_distances[lm1_idx, lm2_idx])
+
     def calculate_xyz_distance(self, lm1_idx: int, lm2_idx: int) -> float:
-        lm1 = self.get_world_landmark(lm1_idx)
-        lm2 = self.get_world_landmark(lm2_idx)
-        return math.sqrt((lm1.x - lm2.x) ** 2 + 
-                         (lm1.y - lm2.y) ** 2 + 
-                         (lm1.z - lm2.z) ** 2)
-    
+        return float(self.xyz_distances[lm1_idx, lm2_idx])
+
+    def calculate_xy_distances(self, pairs: Sequence[tuple[int, int]]) -> np.ndarray:
+        pairs = np.asarray(pairs)
+        return self.xy_distances[pairs[:, 0], pairs[:, 1]]
+
     def is_touching(self, lm1_idx: int, lm2_idx: int, threshold: float = CLICK_THRESHOLD) -> bool:
-        distance = self.calculate_xy_distance(lm1_idx, lm2_idx)
-        return distance < threshold
+        return self.calculate_xy_distance(lm1_idx, lm2_idx) < threshold
+
+    def is_touching_many(self, pairs: Sequence[tuple[int, int]], thresholds: float | Sequence[float] = CLICK_THRESHOLD) -> np.ndarray:
+        # One gather from the distance matrix for all pairs; thresholds may be a scalar or per pair
+        return self.calculate_xy_distances(pairs) < np.asarray(thresholds)
 
-@dataclass
+@dataclass(slots=True)
 class Meta:
     timestamp_ns: int
     width: int
     height: int
     fps_estimate: float
+    source_id: int = 0  # Camera width and height belong to
 
     def __post_init__(self) -> None:
         assert self.width > 0, f"Width must be positive. Got {self.width} instead."
@@ -87,7 +147,7 @@ class Meta:
     def __str__(self):
         return (f"  MetaData: \n    Time Stamp (ns): {self.timestamp_ns}\n    Resolution: ({self.width}, {self.height})\n    FPS Estimate: {self.fps_estimate:.2f}")
 
-@dataclass
+@dataclass(slots=True)
 class FramePayload:
     meta: Meta
     hands: List[Hand]
@@ -98,6 +158,6 @@ class FramePayload:
 
         for hand in self.hands:
             result.append(f"  {hand.handedness} Hand with confidence {hand.confidence:.2f} - In Frame: {hand.in_frame}")
-            for i, lm in enumerate(hand.landmarks):
-                result.append(f"    Landmark {i}: (x = {lm.x:.3f}, y = {lm.y:.3f}, z = {lm.z:.3f})")
+            for i, (x, y, z) in enumerate(hand.landmarks):
+                result.append(f"    Landmark {i}: (x = {x:.3f}, y = {y:.3f}, z = {z:.3f})")
         return "\n".join(result)
\ No newline at end of file
@@ -1,57 +1,122 @@
-from .payload import FramePayload, Hand, Landmark, NormalizedLandmark, Meta
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from .metrics import metrics
+from .payload import FramePayload, Hand, Meta
+
+@dataclass
+class HandArrays:
+    """Compact, picklable inference result: one row per detected hand."""
+    handedness: List[str]
+    confidence: np.ndarray  # (n,) float32
+    landmarks: np.ndarray  # (n, 21, 3) float32, normalized
+    world_landmarks: np.ndarray  # (n, 21, 3) float32, meters
+
+    def __len__(self) -> int:
+        return len(self.handedness)
+
+    @staticmethod
+    def empty() -> "HandArrays":
+        return _EMPTY_HAND_ARRAYS
+
+# Shared by every frame without hands; read-only so it cannot be mutated by accident
+_EMPTY_HAND_ARRAYS = HandArrays(handedness=[],
+                                confidence=np.zeros((0,), dtype=np.float32),
+                                landmarks=np.zeros((0, 21, 3), dtype=np.float32),
+                                world_landmarks=np.zeros((0, 21, 3), dtype=np.float32))
+for _array in (_EMPTY_HAND_ARRAYS.confidence, _EMPTY_HAND_ARRAYS.landmarks, _EMPTY_HAND_ARRAYS.world_landmarks):
+    _array.setflags(write=False)
 
 class PayloadBuilder:
-    
+
+    @staticmethod
+    def extract_hands(hands) -> list:
+        # Normalize legacy solutions results and Tasks HandLandmarkerResult into
+        # (handedness, confidence, landmarks, world_landmarks) tuples
+        if hasattr(hands, "multi_hand_landmarks"):
+            hand_landmarks = hands.multi_hand_landmarks or []
+            hand_world_landmarks = hands.multi_hand_world_landmarks or []
+            handedness = hands.multi_handedness or []
+
+            assert len(hand_landmarks) == len(handedness) == len(hand_world_landmarks), "PayloadBuilder: Mismatch in number of detected hands."
+
+            return [
+                (handedness[i].classification[0].label,
+                 handedness[i].classification[0].score,
+                 landmarks.landmark,
+                 hand_world_landmarks[i].landmark)
+                for i, landmarks in enumerate(hand_landmarks)
+            ]
+
+        hand_landmarks = hands.hand_landmarks or []
+        hand_world_landmarks = hands.hand_world_landmarks or []
+        handedness = hands.handedness or []
+
+        assert len(hand_landmarks) == len(handedness) == len(hand_world_landmarks), "PayloadBuilder: Mismatch in number of detected hands."
+
+        return [
+            (handedness[i][0].category_name,
+             handedness[i][0].score,
+             landmarks,
+             hand_world_landmarks[i])
+            for i, landmarks in enumerate(hand_landmarks)
+        ]
+
     @staticmethod
-    def build_payload(frame_dimensions: tuple, time_ns: int, time_delta_ns: int, hands) -> FramePayload:
+    def to_hand_arrays(hands) -> HandArrays:
+        if isinstance(hands, HandArrays):
+            return hands
+
+        extracted = PayloadBuilder.extract_hands(hands)
+        if not extracted:
+            return HandArrays.empty()
+
+        return HandArrays(
+            handedness=[hand[0] for hand in extracted],
+            confidence=np.array([hand[1] for hand in extracted], dtype=np.float32),
+            # Flat float lists convert to arrays much faster than lists of tuples
+            landmarks=np.array([v for hand in extracted for lm in hand[2] for v in (lm.x, lm.y, lm.z)], dtype=np.float32).reshape(-1, 21, 3),
+            world_landmarks=np.array([v for hand in extracted for lm in hand[3] for v in (lm.x, lm.y, lm.z)], dtype=np.float32).reshape(-1, 21, 3),
+        )
+
+    @staticmethod
+    @metrics.timed("stage", "payload_build")
+    def build_payload(frame_dimensions: tuple, time_ns: int, time_delta_ns: int, hands, fps_estimate: float = None, source_id: int = 0) -> FramePayload:
         # Convert mediapipe results to FramePayload
         assert hands is not None, "PayloadBuilder: Hands information is required to build FramePayload."
 
         frame_width, frame_height = frame_dimensions[0], frame_dimensions[1]
-        fps = 1e9 / time_delta_ns if time_delta_ns > 0 else 0.0
+        # Prefer the caller's rolling estimate; fall back to the instantaneous rate
+        if fps_estimate is not None:
+            fps = fps_estimate
+        else:
+            fps = 1e9 / time_delta_ns if time_delta_ns > 0 else 0.0
 
         meta = Meta(timestamp_ns=time_ns, 
                     width=frame_width, 
                     height=frame_height, 
-                    fps_estimate=fps)
+                    fps_estimate=fps,
+                    source_id=source_id)
         
-        payload = FramePayload(meta=meta, hands=[])
+        arrays = PayloadBuilder.to_hand_arrays(hands)
 
-        hand_landmarks = hands.multi_hand_landmarks or []
-        hand_world_landmarks = hands.multi_hand_world_landmarks or []
-        handedness = hands.multi_handedness or []
-
-        assert len(hand_landmarks) == len(handedness) == len(hand_world_landmarks), "PayloadBuilder: Mismatch in number of detected hands."
+        # One vectorized bounds check for all hands instead of per-landmark comparisons
+        xy = arrays.landmarks[:, :, :2]
+        in_frame = ((xy >= 0.0) & (xy <= 1.0)).all(axis=(1, 2))
 
-        for i, landmarks in enumerate(hand_landmarks):
-            # Get the corresponding world landmarks and handedness
-            world_landmarks = hand_world_landmarks[i]
-            hand_handedness = handedness[i].classification[0].label
-            hand_confidence = handedness[i].classification[0].score
-            
-            landmark_list = []
-            world_landmark_list = []
-
-            # Convert each landmark to NormalizedLandmark and Landmark
-            in_frame = True
-            for lm in landmarks.landmark:
-                if lm.x < 0 or lm.x > 1 or lm.y < 0 or lm.y > 1:
-                    in_frame = False
-                landmark = NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z)
-                landmark_list.append(landmark)
-
-            for wlm in world_landmarks.landmark:
-                world_landmark = Landmark(x=wlm.x, y=wlm.y, z=wlm.z)
-                world_landmark_list.append(world_landmark)
-
-            # Create Hand object
-            hand = Hand(
-                in_frame=in_frame,
-                handedness=hand_handedness,
-                confidence=hand_confidence,
-                landmarks=landmark_list,
-                world_landmarks=world_landmark_list
+        # Hands hold views into the (n, 21, 3) result arrays; nothing is copied per landmark
+        payload = FramePayload(meta=meta, hands=[
+            Hand(
+                in_frame=bool(in_frame[i]),
+                handedness=arrays.handedness[i],
+                confidence=float(arrays.confidence[i]),
+                landmarks=arrays.landmarks[i],
+                world_landmarks=arrays.world_landmarks[i],
+                source_id=source_id
             )
-            payload.hands.append(hand)
+            for i in range(len(arrays))
+        ])
 
         return payload
\ No newline at end of file
@@ -0,0 +1,302 @@
+from .config.config import config
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+
+from .camera import Camera
+from .frame_prep import FramePreparer
+from .manager import InterfaceManager
+from .mediapipe import MediaPipeHands
+from .payload import FramePayload
+from .payload_builder import PayloadBuilder
+from .quality import QualityController
+from .time_controller import CaptureThrottle, TimeController
+
+STATS_INTERVAL_S = config.getfloat("Pipeline", "STATS_INTERVAL_S")
+NUM_FRAME_BUFFERS = 3  # One being written, one waiting in the slot, one in inference
+
+class LatestSlot:
+    """Bounded single-slot queue with a drop-oldest policy.
+
+    put() never blocks: a newer item replaces the one still waiting and the replaced item
+    is returned so the producer can recycle it. get() blocks until an item arrives.
+    """
+
+    def __init__(self) -> None:
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item: Any) -> Any:
+        with self._condition:
+            displaced = self._item if self._has_item else None
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self._condition.notify()
+            return displaced
+
+    def get(self, timeout_s: float = None) -> Any:
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._has_item or self._closed, timeout=timeout_s):
+                return None
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+@dataclass
+class CapturedFrame:
+    seq: int
+    timestamp_ns: int
+    frame_dimensions: tuple
+    frame_rgb: np.ndarray
+
+class StageStats:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.processed = 0
+        self.busy_ns = 0
+        self._window_start_ns = time.perf_counter_ns()
+        self._window_processed = 0
+
+    def record(self, busy_ns: int) -> None:
+        self.processed += 1
+        self.busy_ns += busy_ns
+
+    def throughput(self) -> float:
+        now_ns = time.perf_counter_ns()
+        elapsed_ns = now_ns - self._window_start_ns
+        fps = (self.processed - self._window_processed) * 1e9 / elapsed_ns if elapsed_ns > 0 else 0.0
+        self._window_start_ns = now_ns
+        self._window_processed = self.processed
+        return fps
+
+    def average_latency_ms(self) -> float:
+        return self.busy_ns / self.processed / 1e6 if self.processed else 0.0
+
+class PipelinedRuntime:
+    """Runs capture, inference and dispatch as overlapping stages.
+
+    Capture and inference run on worker threads (OpenCV and MediaPipe release the GIL);
+    dispatch runs on the calling thread so OS-level adapters stay on the main thread.
+    Stages are connected by LatestSlot queues, so a slow stage drops stale frames instead
+    of building a backlog.
+    """
+
+    def __init__(self, camera: Camera, hands: MediaPipeHands, interface_manager: InterfaceManager, time_controller: TimeController, adaptive_quality: bool = False) -> None:
+        self.camera = camera
+        self.hands = hands
+        self.interface_manager = interface_manager
+        self.time_controller = time_controller
+
+        self.preparer = FramePreparer(inference_width=camera.preparer.inference_width)
+        self._free_buffers = queue.SimpleQueue()
+        for _ in range(NUM_FRAME_BUFFERS):
+            self._free_buffers.put(None)  # Allocated lazily once the inference size is known
+
+        # Dispatch only measures time, so the frame rate is enforced on the capture stage instead
+        self.capture_throttle = CaptureThrottle()
+        self.quality_controller = QualityController(hands, self.preparer, time_controller, set_fps=self.set_fps) if adaptive_quality else None
+
+        self.capture_slot = LatestSlot()
+        self.inference_slot = LatestSlot()
+
+        self.stats = {
+            "capture": StageStats("capture"),
+            "inference": StageStats("inference"),
+            "dispatch": StageStats("dispatch"),
+        }
+
+        self._running = False
+        self._threads = []
+        self._error = None
+        self._start_timestamp_ns = None
+        self._last_timestamp_ns = None
+
+        # LIVE_STREAM results arrive on a MediaPipe thread; frame metadata is looked up by timestamp
+        self._pending_frames = {}
+        self._pending_lock = threading.Lock()
+        if hands.is_async():
+            hands.add_result_listener(self._on_async_result)
+
+    def start(self) -> None:
+        self._running = True
+        self.time_controller.start()
+        self._threads = [
+            threading.Thread(target=self._run_stage, args=(self._capture_step,), name="PipelineCapture", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._inference_step,), name="PipelineInference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self.capture_slot.close()
+        self.inference_slot.close()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def run(self, should_exit: Callable[[], bool]) -> None:
+        self.start()
+        last_stats_time = time.monotonic()
+
+        try:
+            while not should_exit():
+                self.dispatch_once(timeout_s=0.1)
+
+                if STATS_INTERVAL_S > 0 and time.monotonic() - last_stats_time >= STATS_INTERVAL_S:
+                    self.print_stats()
+                    last_stats_time = time.monotonic()
+        finally:
+            self.stop()
+
+    def set_fps(self, fps: float) -> None:
+        self.capture_throttle.set_fps(fps)
+        self.time_controller.set_fps(fps)  # Not used for pacing here, but reported as the target rate
+
+    def set_paused(self, paused: bool) -> None:
+        # Stops capture and inference; frames already in flight are dropped
+        self.capture_throttle.set_paused(paused)
+
+    def _run_stage(self, step: Callable[[], None]) -> None:
+        try:
+            while self._running:
+                step()
+        except Exception as e:
+            self._error = e
+            self._running = False
+            self.capture_slot.close()
+            self.inference_slot.close()
+
+    def _acquire_buffer(self, frame_dimensions: tuple) -> np.ndarray:
+        width, height = self.preparer.get_inference_dimensions(*frame_dimensions)
+        buffer = self._free_buffers.get()
+        if buffer is None or buffer.shape[:2] != (height, width):
+            buffer = np.empty((height, width, 3), dtype=np.uint8)
+        return buffer
+
+    def _release_frame(self, frame: CapturedFrame) -> None:
+        if frame is not None:
+            self._free_buffers.put(frame.frame_rgb)
+
+    def _capture_step(self) -> None:
+        if not self.capture_throttle.wait():
+            return
+        self.camera.read(wait_for_new=True)
+        start_ns = time.perf_counter_ns()
+
+        frame_dimensions = self.camera.get_frame_dimensions()
+        buffer = self._acquire_buffer(frame_dimensions)
+        frame = CapturedFrame(
+            seq=self.camera.get_frame_seq(),
+            timestamp_ns=self.camera.get_frame_timestamp_ns(),
+            frame_dimensions=frame_dimensions,
+            frame_rgb=self.preparer.prepare(self.camera.get_frame_bgr(), out=buffer),
+        )
+
+        self._release_frame(self.capture_slot.put(frame))
+        self.stats["capture"].record(time.perf_counter_ns() - start_ns)
+
+    def _inference_step(self) -> None:
+        frame = self.capture_slot.get(timeout_s=0.1)
+        if frame is None:
+            return
+        if self.capture_throttle.paused:
+            self._release_frame(frame)
+            return
+
+        start_ns = time.perf_counter_ns()
+        timestamp_ms = frame.timestamp_ns // 1_000_000
+
+        if self.hands.is_async():
+            with self._pending_lock:
+                timestamp_ms = self.hands.process_async(frame.frame_rgb, timestamp_ms)
+                self._pending_frames[timestamp_ms] = (frame.timestamp_ns, frame.frame_dimensions)
+            self._release_frame(frame)
+            self.stats["inference"].record(time.perf_counter_ns() - start_ns)
+            return
+
+        results = self.hands.process_sync(frame.frame_rgb, timestamp_ms)
+        self._release_frame(frame)
+
+        # Only metadata travels on; the pixel buffer is already back in the pool
+        self.inference_slot.put((frame.timestamp_ns, frame.frame_dimensions, results))
+        self.stats["inference"].record(time.perf_counter_ns() - start_ns)
+
+    def _on_async_result(self, result, timestamp_ms: int) -> None:
+        # Results for frames MediaPipe skipped never arrive, so drop any older pending entries
+        with self._pending_lock:
+            for pending_ms in [ms for ms in self._pending_frames if ms < timestamp_ms]:
+                del self._pending_frames[pending_ms]
+            frame_info = self._pending_frames.pop(timestamp_ms, None)
+        if frame_info is not None:
+            self.inference_slot.put((frame_info[0], frame_info[1], result))
+
+    def dispatch_once(self, timeout_s: float = None) -> FramePayload:
+        if self._error is not None:
+            raise RuntimeError("Pipeline stage failed.") from self._error
+
+        item = self.inference_slot.get(timeout_s=timeout_s)
+        if item is None:
+            return None
+
+        start_ns = time.perf_counter_ns()
+        timestamp_ns, frame_dimensions, results = item
+
+        # Payload timing follows capture timestamps, not dispatch time
+        if self._start_timestamp_ns is None:
+            self._start_timestamp_ns = timestamp_ns
+        delta_ns = timestamp_ns - self._last_timestamp_ns if self._last_timestamp_ns is not None else 0
+        self._last_timestamp_ns = timestamp_ns
+        self.time_controller.update(sleep_time_s=0)
+
+        payload = PayloadBuilder.build_payload(frame_dimensions=frame_dimensions,
+                                               time_ns=timestamp_ns - self._start_timestamp_ns,
+                                               time_delta_ns=delta_ns,
+                                               hands=results,
+                                               fps_estimate=self.time_controller.get_fps_estimate())
+        # Capture-to-dispatch latency, including time spent waiting in the slots
+        latency_ns = time.monotonic_ns() - timestamp_ns
+        self.interface_manager.on_frame(payload, latency_ns)
+
+        if self.quality_controller is not None:
+            self.quality_controller.update(latency_ns)
+
+        self.stats["dispatch"].record(time.perf_counter_ns() - start_ns)
+        return payload
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for name, stage in self.stats.items():
+            stats[name] = {
+                "processed": stage.processed,
+                "fps": stage.throughput(),
+                "avg_latency_ms": stage.average_latency_ms(),
+            }
+        stats["capture"]["dropped"] = self.camera.dropped_frames
+        stats["inference"]["dropped"] = self.capture_slot.dropped
+        stats["dispatch"]["dropped"] = self.inference_slot.dropped
+        return stats
+
+    def print_stats(self) -> None:
+        print("[Pipeline] " + " | ".join(
+            f"{name}: {s['fps']:.1f} fps, {s['avg_latency_ms']:.2f} ms, dropped {s['dropped']}"
+            for name, s in self.get_stats().items()
+        ))
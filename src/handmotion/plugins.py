@@ -0,0 +1,175 @@
+from .config.config import config
+from .metrics import metrics
+
+from dataclasses import dataclass, field
+import importlib
+from importlib import metadata
+import time
+from typing import Dict, List, Optional, Tuple
+
+ENTRY_POINTS = config.getboolean("Plugins", "ENTRY_POINTS")
+
+INTERFACE_GROUP = "handmotion.interfaces"
+ADAPTER_GROUP = "handmotion.adapters"
+
+@dataclass(slots=True)
+class PluginSpec:
+    name: str
+    target: str  # "module:Class"; a leading "." is relative to the handmotion package
+    adapter: Optional[str] = None  # Interfaces: adapter plugin placed in the context
+    context_key: Optional[str] = None  # Adapters: context key interfaces look the adapter up by
+    connect: List[str] = field(default_factory=list)  # Adapters: methods called after construction
+    close: Optional[str] = None  # Adapters: method called on shutdown, "close" if not given
+    kwargs: Dict[str, str] = field(default_factory=dict)  # Adapters: constructor arguments
+
+class PluginRegistry:
+    """Interfaces and adapters declared by name, imported and built only when first needed.
+
+    Declarations come from [Interface:<id>] and [Adapter:<name>] config sections and, with
+    ENTRY_POINTS, from installed packages' handmotion.interfaces / handmotion.adapters entry
+    points. create_interface() imports the interface module, then creates and connects its
+    adapter (once, shared by every interface using it) and constructs the interface. Each step
+    is timed; print_report() lists them so unused imports show up at startup.
+    """
+
+    def __init__(self) -> None:
+        self.interfaces: Dict[str, PluginSpec] = {}
+        self.adapters: Dict[str, PluginSpec] = {}
+        self.adapter_instances: Dict[str, object] = {}
+        self._provided = set()
+        self.timings: List[Tuple[str, str, int]] = []  # (plugin, step, duration_ns)
+
+    @classmethod
+    def from_config(cls, entry_points: bool = ENTRY_POINTS) -> "PluginRegistry":
+        registry = cls()
+        if entry_points:
+            registry.load_entry_points()
+        registry.load_config()  # Config declarations override entry points of the same name
+        return registry
+
+    def load_config(self) -> None:
+        defaults = config.defaults()
+        for section in config.sections():
+            kind, _, name = section.partition(":")
+            if kind not in ("Interface", "Adapter") or not name:
+                continue
+
+            options = {key: value for key, value in config.items(section) if key not in defaults}
+            if kind == "Interface":
+                self.declare_interface(name, options["class"], options.get("adapter") or None)
+            else:
+                self.declare_adapter(name, options.pop("class"), options.pop("context_key", None),
+                                     connect=[m.strip() for m in options.pop("connect", "").split(",") if m.strip()],
+                                     close=options.pop("close", None) or None,
+                                     kwargs=options)  # Remaining keys are constructor arguments
+
+    def load_entry_points(self) -> None:
+        # Only the declarations are read here; the plugin modules are imported on activation
+        for entry_point in metadata.entry_points(group=INTERFACE_GROUP):
+            self.declare_interface(entry_point.name, entry_point.value)
+        for entry_point in metadata.entry_points(group=ADAPTER_GROUP):
+            self.declare_adapter(entry_point.name, entry_point.value)
+
+    def declare_interface(self, interface_id: str, target: str, adapter: str = None) -> None:
+        self.interfaces[interface_id] = PluginSpec(name=interface_id, target=target, adapter=adapter)
+
+    def declare_adapter(self, name: str, target: str, context_key: str = None, connect: List[str] = None,
+                        close: str = None, kwargs: Dict[str, str] = None) -> None:
+        self.adapters[name] = PluginSpec(name=name, target=target, context_key=context_key, connect=connect or [],
+                                         close=close, kwargs=kwargs or {})
+
+    def provide_adapter(self, name: str, adapter: object, context_key: str = None) -> None:
+        # Use an adapter built elsewhere (e.g. a board from ESP32AdapterPool) under this name
+        spec = self.adapters.get(name)
+        if spec is None:
+            spec = self.adapters[name] = PluginSpec(name=name, target=f"{type(adapter).__module__}:{type(adapter).__name__}")
+        spec.context_key = context_key or spec.context_key or getattr(adapter, "context_key", None)
+        self.adapter_instances[name] = adapter
+        self._provided.add(name)
+
+    def has_interface(self, interface_id: str) -> bool:
+        return interface_id in self.interfaces
+
+    def create_interface(self, interface_id: str):
+        spec = self.interfaces.get(interface_id)
+        if spec is None:
+            raise KeyError(f"No interface plugin named '{interface_id}'. Known interfaces: {list(self.interfaces)}")
+
+        interface_class = self._load(spec)
+        adapter_name = spec.adapter or getattr(interface_class, "adapter_plugin", None)
+
+        context = {}
+        if adapter_name:
+            adapter = self.get_adapter(adapter_name)
+            context[self.adapters[adapter_name].context_key] = adapter
+
+        with self.timed(spec.name, "construct"):
+            return interface_class(context=context)
+
+    def get_adapter(self, name: str) -> object:
+        adapter = self.adapter_instances.get(name)
+        if adapter is not None:
+            return adapter
+
+        spec = self.adapters.get(name)
+        if spec is None:
+            raise KeyError(f"No adapter plugin named '{name}'. Known adapters: {list(self.adapters)}")
+
+        adapter_class = self._load(spec)
+        if spec.context_key is None:
+            spec.context_key = getattr(adapter_class, "context_key", None)
+        if spec.context_key is None:
+            raise ValueError(f"Adapter plugin '{name}' needs a CONTEXT_KEY.")
+
+        with self.timed(name, "construct"):
+            adapter = adapter_class(**spec.kwargs)
+        if spec.connect:
+            with self.timed(name, "connect"):
+                for method in spec.connect:
+                    getattr(adapter, method)()
+
+        self.adapter_instances[name] = adapter
+        return adapter
+
+    def close(self) -> None:
+        # Only adapters this registry created; provided ones belong to their owner
+        for name, adapter in self.adapter_instances.items():
+            close = getattr(adapter, self.adapters[name].close or "close", None)
+            if name not in self._provided and close is not None:
+                close()
+        self.adapter_instances.clear()
+        self._provided.clear()
+
+    def print_report(self) -> None:
+        if not self.timings:
+            return
+        total_ns = sum(duration_ns for _, _, duration_ns in self.timings)
+        print(f"[Plugins] Plugin startup took {total_ns / 1e6:.1f} ms:")
+        for plugin, step, duration_ns in self.timings:
+            print(f"  {plugin:<12} {step:<10} {duration_ns / 1e6:8.1f} ms")
+
+    def _load(self, spec: PluginSpec) -> type:
+        module_name, _, attribute = spec.target.partition(":")
+        with self.timed(spec.name, "import"):
+            module = importlib.import_module(module_name, __package__)
+        return getattr(module, attribute)
+
+    def timed(self, plugin: str, step: str) -> "_StepTimer":
+        return _StepTimer(self, plugin, step)
+
+class _StepTimer:
+    __slots__ = ("registry", "plugin", "step", "start_ns")
+
+    def __init__(self, registry: PluginRegistry, plugin: str, step: str) -> None:
+        self.registry = registry
+        self.plugin = plugin
+        self.step = step
+
+    def __enter__(self) -> "_StepTimer":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        self.registry.timings.append((self.plugin, self.step, duration_ns))
+        metrics.observe_ns("startup", f"{self.plugin}:{self.step}", duration_ns)
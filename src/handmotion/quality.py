@@ -0,0 +1,110 @@
+from .config.config import config
+
+from dataclasses import dataclass
+from typing import Callable, List
+
+from .frame_prep import FramePreparer
+from .mediapipe import MediaPipeHands
+from .time_controller import TimeController
+
+ENABLED = config.getboolean("QualityController", "ENABLED")
+LATENCY_BUDGET_MS = config.getfloat("QualityController", "LATENCY_BUDGET_MS")
+LEVELS = config.get("QualityController", "LEVELS")
+DOWNGRADE_FRAMES = config.getint("QualityController", "DOWNGRADE_FRAMES")
+UPGRADE_FRAMES = config.getint("QualityController", "UPGRADE_FRAMES")
+UPGRADE_RATIO = config.getfloat("QualityController", "UPGRADE_RATIO")
+SMOOTHING = config.getfloat("QualityController", "SMOOTHING")
+
+@dataclass(frozen=True)
+class QualityLevel:
+    model_complexity: int
+    inference_width: int
+    fps: float
+
+    def __str__(self) -> str:
+        return f"complexity {self.model_complexity}, width {self.inference_width or 'native'}, {self.fps:g} FPS"
+
+def parse_levels(levels: str) -> List[QualityLevel]:
+    # "complexity:width:fps, ..." ordered from highest to lowest quality
+    parsed = []
+    for level in levels.split(","):
+        complexity, width, fps = level.strip().split(":")
+        parsed.append(QualityLevel(model_complexity=int(complexity), inference_width=int(width), fps=float(fps)))
+    return parsed
+
+class QualityController:
+    """Steps quality down or up to keep the smoothed per-frame latency within a budget.
+
+    Downgrades after DOWNGRADE_FRAMES consecutive frames over budget; upgrades only after
+    UPGRADE_FRAMES consecutive frames below UPGRADE_RATIO * budget. The gap between the two
+    conditions is the hysteresis that prevents oscillating between neighbouring levels.
+    """
+
+    def __init__(self, hands: MediaPipeHands, preparer: FramePreparer, time_controller: TimeController,
+                 budget_ms: float = LATENCY_BUDGET_MS, levels: List[QualityLevel] = None,
+                 downgrade_frames: int = DOWNGRADE_FRAMES, upgrade_frames: int = UPGRADE_FRAMES,
+                 upgrade_ratio: float = UPGRADE_RATIO, smoothing: float = SMOOTHING,
+                 set_fps: Callable[[float], None] = None) -> None:
+        self.hands = hands
+        self.preparer = preparer
+        self.time_controller = time_controller
+        # Runtimes whose loop the TimeController does not pace pass their own rate control
+        self.set_fps = set_fps or time_controller.set_fps
+
+        self.budget_ns = budget_ms * 1e6
+        self.levels = levels or parse_levels(LEVELS)
+        self.downgrade_frames = downgrade_frames
+        self.upgrade_frames = upgrade_frames
+        self.upgrade_ratio = upgrade_ratio
+        self.smoothing = smoothing
+
+        self.level_index = 0
+        self.latency_ns = None
+        self._over_budget = 0
+        self._under_budget = 0
+
+        self.apply(self.levels[0])
+
+    def get_level(self) -> QualityLevel:
+        return self.levels[self.level_index]
+
+    def apply(self, level: QualityLevel) -> None:
+        self.hands.set_model_complexity(level.model_complexity)
+        self.preparer.set_inference_width(level.inference_width)
+        self.set_fps(level.fps)
+
+    def update(self, frame_latency_ns: int) -> bool:
+        # Exponentially smoothed latency so single slow frames do not trigger a change
+        if self.latency_ns is None:
+            self.latency_ns = frame_latency_ns
+        else:
+            self.latency_ns += self.smoothing * (frame_latency_ns - self.latency_ns)
+
+        if self.latency_ns > self.budget_ns:
+            self._over_budget += 1
+            self._under_budget = 0
+        elif self.latency_ns < self.budget_ns * self.upgrade_ratio:
+            self._under_budget += 1
+            self._over_budget = 0
+        else:
+            self._over_budget = 0
+            self._under_budget = 0
+
+        if self._over_budget >= self.downgrade_frames and self.level_index < len(self.levels) - 1:
+            return self._step(+1)
+        if self._under_budget >= self.upgrade_frames and self.level_index > 0:
+            return self._step(-1)
+        return False
+
+    def _step(self, direction: int) -> bool:
+        self.level_index += direction
+        level = self.get_level()
+        print(f"[Quality Controller] {'Lowered' if direction > 0 else 'Raised'} quality to level {self.level_index} ({level}); "
+              f"latency {self.latency_ns / 1e6:.1f} ms, budget {self.budget_ns / 1e6:.1f} ms")
+        self.apply(level)
+
+        # Judge the new level on its own measurements
+        self.latency_ns = None
+        self._over_budget = 0
+        self._under_budget = 0
+        return True
@@ -0,0 +1,175 @@
+from .config.config import config
+
+import os
+import time
+from typing import Iterator
+
+import numpy as np
+
+from .manager import InterfaceManager
+from .payload import FramePayload, Hand, Meta
+
+MAX_HANDS = config.getint("Recording", "MAX_HANDS")
+FLUSH_RECORDS = config.getint("Recording", "FLUSH_RECORDS")
+
+MAGIC = b"HMRECORD"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("max_hands", "<u4")])
+
+HANDEDNESS_CODES = {"Left": 0, "Right": 1}
+HANDEDNESS_NAMES = ("Left", "Right")
+
+def record_dtype(max_hands: int) -> np.dtype:
+    # One fixed-size record per frame; unused hand rows are left zeroed
+    return np.dtype([
+        ("timestamp_ns", "<i8"),
+        ("width", "<i4"),
+        ("height", "<i4"),
+        ("fps_estimate", "<f4"),
+        ("num_hands", "u1"),
+        ("handedness", "u1", (max_hands,)),
+        ("in_frame", "?", (max_hands,)),
+        ("confidence", "<f4", (max_hands,)),
+        ("landmarks", "<f4", (max_hands, 21, 3)),
+        ("world_landmarks", "<f4", (max_hands, 21, 3)),
+    ])
+
+class PayloadRecorder:
+    """Appends FramePayloads to a binary file of fixed-size records.
+
+    Records are staged in a preallocated block and written FLUSH_RECORDS at a time, so
+    recording costs one array fill per frame and no per-frame file I/O.
+    """
+
+    def __init__(self, path: str, max_hands: int = MAX_HANDS, flush_records: int = FLUSH_RECORDS) -> None:
+        self.path = path
+        self.max_hands = max_hands
+        self.dtype = record_dtype(max_hands)
+
+        self._file = open(path, "wb")
+        header = np.zeros((), dtype=HEADER_DTYPE)
+        header["magic"], header["version"], header["max_hands"] = MAGIC, VERSION, max_hands
+        self._file.write(header.tobytes())
+
+        self._block = np.zeros(max(flush_records, 1), dtype=self.dtype)
+        self._pending = 0
+        self.records_written = 0
+        self._warned_truncation = False
+
+    def write(self, payload: FramePayload) -> None:
+        record = self._block[self._pending]
+        record.fill(0)
+
+        hands = payload.hands
+        if len(hands) > self.max_hands:
+            if not self._warned_truncation:
+                print(f"[Recorder] Frame has {len(hands)} hands; only the first {self.max_hands} are recorded.")
+                self._warned_truncation = True
+            hands = hands[:self.max_hands]
+
+        record["timestamp_ns"] = payload.meta.timestamp_ns
+        record["width"] = payload.meta.width
+        record["height"] = payload.meta.height
+        record["fps_estimate"] = payload.meta.fps_estimate
+        record["num_hands"] = len(hands)
+        for i, hand in enumerate(hands):
+            record["handedness"][i] = HANDEDNESS_CODES[hand.handedness]
+            record["in_frame"][i] = hand.in_frame
+            record["confidence"][i] = hand.confidence
+            record["landmarks"][i] = hand.landmarks
+            record["world_landmarks"][i] = hand.world_landmarks
+
+        self._pending += 1
+        if self._pending == len(self._block):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._file.write(self._block[:self._pending].tobytes())
+            self.records_written += self._pending
+            self._pending = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        print(f"[Recorder] Wrote {self.records_written} frames to {self.path}")
+
+    def __enter__(self) -> "PayloadRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class PayloadReplay:
+    """Memory-mapped view of a recording; payloads are built lazily from the mapped records.
+
+    Hands hold views into the mapping, so replaying does not copy landmark data.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a hand-bridge recording.")
+        if header["version"][0] != VERSION:
+            raise ValueError(f"Unsupported recording version {header['version'][0]} in {path}. Expected {VERSION}.")
+
+        self.max_hands = int(header["max_hands"][0])
+        self.dtype = record_dtype(self.max_hands)
+
+        # A recording cut short mid-record (e.g. a crash) still replays up to the last full frame
+        count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> FramePayload:
+        record = self.records[index]
+        meta = Meta(timestamp_ns=int(record["timestamp_ns"]),
+                    width=int(record["width"]),
+                    height=int(record["height"]),
+                    fps_estimate=float(record["fps_estimate"]))
+
+        return FramePayload(meta=meta, hands=[
+            Hand(
+                in_frame=bool(record["in_frame"][i]),
+                handedness=HANDEDNESS_NAMES[record["handedness"][i]],
+                confidence=float(record["confidence"][i]),
+                landmarks=record["landmarks"][i],
+                world_landmarks=record["world_landmarks"][i]
+            )
+            for i in range(record["num_hands"])
+        ])
+
+    def __iter__(self) -> Iterator[FramePayload]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def run(self, interface_manager: InterfaceManager, speed: float = 1.0) -> dict:
+        # speed 1.0 replays in real time, 2.0 twice as fast; 0 dispatches as fast as possible
+        start_ns = time.perf_counter_ns()
+        first_timestamp_ns = None
+
+        for payload in self:
+            if speed > 0:
+                if first_timestamp_ns is None:
+                    first_timestamp_ns = payload.meta.timestamp_ns
+                due_ns = start_ns + (payload.meta.timestamp_ns - first_timestamp_ns) / speed
+                remaining_ns = due_ns - time.perf_counter_ns()
+                if remaining_ns > 0:
+                    time.sleep(remaining_ns / 1e9)
+
+            interface_manager.on_frame(payload)
+
+        elapsed_s = (time.perf_counter_ns() - start_ns) / 1e9
+        stats = {"frames": len(self), "elapsed_s": elapsed_s, "fps": len(self) / elapsed_s if elapsed_s > 0 else 0.0}
+        print(f"[Replay] {stats['frames']} frames in {elapsed_s:.3f} s ({stats['fps']:.0f} FPS)")
+        return stats
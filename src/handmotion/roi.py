@@ -0,0 +1,61 @@
+from .config.config import config
+
+from typing import Optional
+
+import numpy as np
+
+from .payload import FramePayload
+from .payload_builder import HandArrays
+
+ROI_MARGIN = config.getfloat("MediaPipe", "ROI_MARGIN")
+ROI_MIN_SIZE_PX = config.getint("MediaPipe", "ROI_MIN_SIZE_PX")
+ROI_QUANTUM_PX = config.getint("MediaPipe", "ROI_QUANTUM_PX")
+ROI_MAX_AREA_FRACTION = 0.6  # Larger crops save too little to be worth the extra bookkeeping
+
+class RoiTracker:
+    """Derives an inference crop from the previous frame's hands and maps results back."""
+
+    def __init__(self, margin: float = ROI_MARGIN, min_size_px: int = ROI_MIN_SIZE_PX, quantum_px: int = ROI_QUANTUM_PX) -> None:
+        self.margin = margin
+        self.min_size_px = min_size_px
+        self.quantum_px = max(quantum_px, 1)
+
+    def compute_roi(self, payload: Optional[FramePayload], frame_width: int, frame_height: int) -> Optional[tuple]:
+        # Returns (x0, y0, x1, y1) in pixels, or None when the full frame should be used
+        if payload is None or not payload.hands:
+            return None
+
+        points = np.concatenate([hand.landmarks[:, :2] for hand in payload.hands])
+        x_min, y_min = points.min(axis=0)
+        x_max, y_max = points.max(axis=0)
+
+        # Square crop around the hands, expanded by the margin on every side
+        size = max((x_max - x_min) * frame_width, (y_max - y_min) * frame_height) * (1 + 2 * self.margin)
+        size = max(size, self.min_size_px)
+        # Quantize the crop size so the frame buffers are not reallocated every frame
+        size = int(np.ceil(size / self.quantum_px) * self.quantum_px)
+        size = min(size, frame_width, frame_height)
+
+        if size * size > ROI_MAX_AREA_FRACTION * frame_width * frame_height:
+            return None
+
+        center_x = (x_min + x_max) / 2 * frame_width
+        center_y = (y_min + y_max) / 2 * frame_height
+        x0 = int(min(max(center_x - size / 2, 0), frame_width - size))
+        y0 = int(min(max(center_y - size / 2, 0), frame_height - size))
+        return (x0, y0, x0 + size, y0 + size)
+
+    @staticmethod
+    def remap(arrays: HandArrays, roi: tuple, frame_width: int, frame_height: int) -> HandArrays:
+        # Crop-normalized landmarks back to full-frame normalized coordinates.
+        # MediaPipe's z uses the same scale as x, so it is rescaled with the crop width.
+        x0, y0, x1, y1 = roi
+        scale = np.array([(x1 - x0) / frame_width, (y1 - y0) / frame_height, (x1 - x0) / frame_width], dtype=np.float32)
+        offset = np.array([x0 / frame_width, y0 / frame_height, 0.0], dtype=np.float32)
+
+        return HandArrays(
+            handedness=arrays.handedness,
+            confidence=arrays.confidence,
+            landmarks=arrays.landmarks * scale + offset,
+            world_landmarks=arrays.world_landmarks,
+        )
@@ -1,46 +1,201 @@
+import threading
 import time
+from collections import deque
 
 from .config.config import config
 
 DEFAULT_FPS = config.getint("TimeController", "FPS")
+OVERRUN_POLICY = config.get("TimeController", "OVERRUN_POLICY")
+MAX_CATCH_UP_FRAMES = config.getint("TimeController", "MAX_CATCH_UP_FRAMES")
+STATS_WINDOW = config.getint("TimeController", "STATS_WINDOW")
 
 class TimeController:
-    def __init__(self):
+    """Paces the loop against absolute frame deadlines on the monotonic perf counter.
+
+    Each deadline is the previous deadline plus one period, so time spent in the loop body
+    is compensated instead of accumulating as drift. When a frame overruns by more than a
+    period, the "skip" policy drops the missed deadlines and re-aligns to the frame grid;
+    "catch-up" runs the missed frames back to back (at most MAX_CATCH_UP_FRAMES of them).
+    """
+
+    def __init__(self, fps: float = DEFAULT_FPS, overrun_policy: str = OVERRUN_POLICY,
+                 max_catch_up_frames: int = MAX_CATCH_UP_FRAMES, stats_window: int = STATS_WINDOW):
+        if overrun_policy not in ("skip", "catch-up"):
+            raise ValueError(f"Unknown overrun policy '{overrun_policy}'. Expected 'skip' or 'catch-up'.")
+
+        self.fps = fps
+        self.overrun_policy = overrun_policy
+        self.max_catch_up_frames = max_catch_up_frames
+
         self.start_time = 0
         self.current_time = 0
         self.elapsed = 0
         self.last_elapsed = 0
         self.delta = 0
-    
+
+        self.next_deadline = None
+        self.overruns = 0
+        self.skipped_frames = 0
+
+        # Rolling windows for FPS and jitter (lateness of each wake-up past its deadline)
+        self._intervals = deque(maxlen=stats_window)
+        self._lateness = deque(maxlen=stats_window)
+
     def start(self):
-        self.start_time = time.time_ns()
-        
-    def update(self, sleep_time_s: float = 1 / DEFAULT_FPS) -> None:
-        self.current_time = time.time_ns()
+        self.start_time = time.perf_counter_ns()
+        self.current_time = self.start_time
+        self.elapsed = 0
+        self.last_elapsed = 0
+        self.delta = 0
+        self.next_deadline = None
+        self.overruns = 0
+        self.skipped_frames = 0
+        self._intervals.clear()
+        self._lateness.clear()
+
+    def set_fps(self, fps: float) -> None:
+        self.fps = fps
+        # Re-anchor so the new period applies from the last frame rather than the old grid
+        self.next_deadline = None
+
+    def get_period_ns(self, sleep_time_s: float = None) -> int:
+        if sleep_time_s is None:
+            return int(1e9 / self.fps) if self.fps > 0 else 0
+        return int(sleep_time_s * 1e9)
+
+    def update(self, sleep_time_s: float = None) -> None:
+        # sleep_time_s overrides the period derived from fps; 0 only measures without pacing
+        period_ns = self.get_period_ns(sleep_time_s)
+
+        if period_ns > 0:
+            if self.next_deadline is None:
+                self.next_deadline = self.current_time + period_ns
 
-        if sleep_time_s > 0:
-            time.sleep(max(self.last_elapsed / 1e9 + sleep_time_s - self.current_time / 1e9, 0))
+            remaining_ns = self.next_deadline - time.perf_counter_ns()
+            if remaining_ns > 0:
+                time.sleep(remaining_ns / 1e9)
+
+        self.current_time = time.perf_counter_ns()
+
+        if period_ns > 0:
+            lateness_ns = self.current_time - self.next_deadline
+            self._lateness.append(max(lateness_ns, 0))
+            self._schedule_next(lateness_ns, period_ns)
+        else:
+            self.next_deadline = None
 
         self.elapsed = self.current_time - self.start_time
         self.delta = self.elapsed - self.last_elapsed
         self.last_elapsed = self.elapsed
+        if self.delta > 0:
+            self._intervals.append(self.delta)
+
+    def _schedule_next(self, lateness_ns: int, period_ns: int) -> None:
+        if lateness_ns < period_ns:
+            self.next_deadline += period_ns
+            return
+
+        # Overran by at least one full period
+        self.overruns += 1
+        missed = lateness_ns // period_ns
+
+        if self.overrun_policy == "catch-up" and missed <= self.max_catch_up_frames:
+            self.next_deadline += period_ns
+        else:
+            # Stay on the original frame grid, dropping the deadlines that have already passed
+            self.skipped_frames += missed
+            self.next_deadline += (missed + 1) * period_ns
 
     def get_elapsed_time_ns(self) -> float:
         return self.elapsed
 
     def get_elapsed_time_s(self) -> float:
         return self.get_elapsed_time_ns() / 1e9
-    
+
     def get_delta_ns(self) -> float:
         return self.delta
-    
+
     def get_delta_s(self) -> float:
         return self.get_delta_ns() / 1e9
 
+    def get_fps_estimate(self) -> float:
+        # Average over the rolling window, steadier than 1 / delta of a single frame
+        if not self._intervals:
+            return 0.0
+        return len(self._intervals) * 1e9 / sum(self._intervals)
+
+    def get_mean_lateness_ns(self) -> float:
+        # Average delay of wake-ups past their deadline; a constant bias, not jitter
+        if not self._lateness:
+            return 0.0
+        return sum(self._lateness) / len(self._lateness)
+
+    def get_jitter_ns(self) -> float:
+        # Standard deviation of the lateness: how much wake-ups vary, whatever their average delay
+        if len(self._lateness) < 2:
+            return 0.0
+        mean_ns = self.get_mean_lateness_ns()
+        return (sum((lateness - mean_ns) ** 2 for lateness in self._lateness) / (len(self._lateness) - 1)) ** 0.5
+
+    def get_stats(self) -> dict:
+        return {
+            "fps": self.get_fps_estimate(),
+            "jitter_ms": self.get_jitter_ns() / 1e6,
+            "mean_lateness_ms": self.get_mean_lateness_ns() / 1e6,
+            "max_lateness_ms": max(self._lateness, default=0) / 1e6,
+            "overruns": self.overruns,
+            "skipped_frames": self.skipped_frames,
+        }
+
     def print_elapsed(self) -> None:
-        print(f"Time (Elapsed): {self.get_elapsed_time_s():.4f}", 
+        print(f"Time (Elapsed): {self.get_elapsed_time_s():.4f}",
               " s")
 
     def print_delta(self) -> None:
-        print(f"Time (Delta):   {self.get_delta_s():.4f}", 
-              " s")
\ No newline at end of file
+        print(f"Time (Delta):   {self.get_delta_s():.4f}",
+              " s")
+
+    def print_stats(self) -> None:
+        stats = self.get_stats()
+        print(f"Time (Pacing):  {stats['fps']:.1f} FPS, jitter {stats['jitter_ms']:.2f} ms, lateness {stats['mean_lateness_ms']:.2f} ms (max {stats['max_lateness_ms']:.2f} ms), "
+              f"{stats['overruns']} overruns, {stats['skipped_frames']} skipped")
+
+class CaptureThrottle:
+    """Minimum interval between captures for capture threads no TimeController paces.
+
+    wait() returns True when the next capture is due. Otherwise it waits (at most timeout_s,
+    so the caller can recheck its running flag) and returns False. set_fps() and set_paused()
+    wake a waiting capture thread immediately.
+    """
+
+    def __init__(self, fps: float = 0) -> None:
+        self.interval_ns = 0
+        self.paused = False
+        self._last_capture_ns = None
+        self._wake = threading.Event()
+        self.set_fps(fps)
+
+    def set_fps(self, fps: float) -> None:
+        # 0 captures as fast as the camera delivers
+        self.interval_ns = int(1e9 / fps) if fps > 0 else 0
+        self._wake.set()
+
+    def set_paused(self, paused: bool) -> None:
+        self.paused = paused
+        self._wake.set()
+
+    def wait(self, timeout_s: float = 0.1) -> bool:
+        if self.paused:
+            remaining_s = timeout_s
+        elif self.interval_ns and self._last_capture_ns is not None:
+            remaining_s = min((self._last_capture_ns + self.interval_ns - time.monotonic_ns()) / 1e9, timeout_s)
+        else:
+            remaining_s = 0
+
+        if remaining_s > 0:
+            self._wake.clear()
+            self._wake.wait(remaining_s)
+            return False
+
+        self._last_capture_ns = time.monotonic_ns()
+        return True
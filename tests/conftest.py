@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The package lives in src/ and is run from there; make it importable without installing
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,138 @@
+import time
+
+import pytest
+
+from handmotion.adapters.esp32_emulator import ESP32Emulator
+from handmotion.adapters.esp32_serial import (
+    ACK_OK, EMULATOR_PORT, LIGHT_ON, OP_ACK, OP_LED_MASK, OP_LED_SET, OP_LED_TOGGLE, OP_LIGHT, OP_TEXT, OP_THROTTLE,
+    ESP32SerialAdapter, FrameDecoder, decode_commands, encode_frame, text_to_command,
+)
+
+def connect(protocol: str, read_replies: bool = False, binary_support: bool = True) -> ESP32SerialAdapter:
+    # Synchronous writes, so the emulator has applied every command when write_line returns
+    adapter = ESP32SerialAdapter("Test", port=EMULATOR_PORT, async_writes=False, protocol=protocol, read_replies=read_replies)
+    adapter.open_serial()
+    if not binary_support:
+        adapter.serial_connection = ESP32Emulator(name="Test", binary_support=False)
+    adapter.establish_connection_handshake(timeout_s=1)
+    return adapter
+
+def drive(adapter: ESP32SerialAdapter) -> ESP32Emulator:
+    for line in ("LED H 0", "LED H 2", "LED T 2", "LED T 3", "THROTTLE 42", "LIGHT ON"):
+        adapter.write_line(line)
+    return adapter.serial_connection
+
+# Frame encoding
+
+def test_frame_round_trip():
+    commands = [(OP_LED_SET, bytes([1, 1])), (OP_THROTTLE, bytes([7])), (OP_TEXT, bytes([4]) + b"PING")]
+    frames = FrameDecoder().feed(encode_frame(9, commands))
+    assert len(frames) == 1
+    seq, body = frames[0]
+    assert seq == 9
+    assert decode_commands(body) == commands
+
+def test_decoder_reassembles_split_frames():
+    data = encode_frame(1, [(OP_THROTTLE, bytes([5]))]) + encode_frame(2, [(OP_LIGHT, bytes([LIGHT_ON]))])
+    decoder = FrameDecoder()
+    frames = []
+    for i in range(len(data)):
+        frames += decoder.feed(data[i:i + 1])
+    assert [seq for seq, _ in frames] == [1, 2]
+    assert decoder.crc_errors == 0
+
+def test_decoder_resynchronizes_after_corruption():
+    good = encode_frame(3, [(OP_THROTTLE, bytes([5]))])
+    corrupted = bytearray(encode_frame(2, [(OP_THROTTLE, bytes([9]))]))
+    corrupted[-1] ^= 0xFF
+    decoder = FrameDecoder()
+    frames = decoder.feed(b"\x00noise" + bytes(corrupted) + good)
+    assert [seq for seq, _ in frames] == [3]
+    assert decoder.crc_errors >= 1
+
+def test_decode_rejects_unknown_and_truncated_commands():
+    with pytest.raises(ValueError):
+        decode_commands(bytes([0x55]))
+    with pytest.raises(ValueError):
+        decode_commands(bytes([OP_LED_SET, 1]))
+    with pytest.raises(ValueError):
+        decode_commands(bytes([OP_TEXT]))
+
+# Text to binary translation
+
+def test_text_to_command():
+    assert text_to_command("LED H 3") == (OP_LED_SET, bytes([3, 1]))
+    assert text_to_command("LED T 7") == (OP_LED_TOGGLE, bytes([7]))
+    assert text_to_command("THROTTLE 150") == (OP_THROTTLE, bytes([100]))
+    assert text_to_command("LIGHT ON") == (OP_LIGHT, bytes([LIGHT_ON]))
+
+@pytest.mark.parametrize("line", ["LED H 8", "LED T 255", "LED L -1", "LED H x"])
+def test_led_index_outside_mask_falls_back_to_text(line):
+    assert text_to_command(line) == (OP_TEXT, bytes([len(line)]) + line.encode("utf-8"))
+
+def test_encode_batch_collapses_led_changes_into_one_mask():
+    adapter = ESP32SerialAdapter("Test", port=EMULATOR_PORT, async_writes=False)
+    frame = adapter.encode_batch(["LED H 0", "THROTTLE 3", "LED H 2", "LED T 0", "LED H 8"])
+    (seq, body), = FrameDecoder().feed(frame)
+    assert seq == 0
+    assert decode_commands(body) == [
+        (OP_LED_MASK, bytes([0b0100])),
+        (OP_THROTTLE, bytes([3])),
+        (OP_TEXT, bytes([7]) + b"LED H 8"),
+    ]
+    assert adapter.seq == 1
+
+# Against the emulator
+
+@pytest.mark.parametrize("protocol, expected", [("text", "text"), ("auto", "binary")])
+def test_emulator_applies_commands(protocol, expected):
+    adapter = connect(protocol)
+    assert adapter.active_protocol == expected
+    board = drive(adapter)
+    assert board.led_states == [True, False, False, True]
+    assert board.throttle == 42
+    assert board.light_on is True
+    adapter.close_serial()
+
+def test_auto_falls_back_to_text_without_binary_support():
+    adapter = connect("auto", binary_support=False)
+    assert adapter.active_protocol == "text"
+    board = drive(adapter)
+    assert not board.binary
+    assert board.led_states == [True, False, False, True]
+    assert board.throttle == 42
+    assert board.light_on is True
+    adapter.close_serial()
+
+def test_binary_protocol_required_raises_without_binary_support():
+    with pytest.raises(ConnectionError):
+        connect("binary", binary_support=False)
+
+def test_led_index_outside_mask_does_not_break_the_binary_link():
+    adapter = connect("auto")
+    adapter.write_line("LED H 8")
+    adapter.write_line("LED H 1")
+    assert adapter.serial_connection.led_states == [False, True, False, False]
+    adapter.close_serial()
+
+def test_binary_frames_are_acknowledged():
+    adapter = connect("auto", read_replies=True)
+    drive(adapter)
+    deadline = time.monotonic() + 2
+    while adapter.reader.acked < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = adapter.reader.get_stats()
+    assert stats["acked"] == 6
+    assert stats["errors"] == 0 and stats["read_errors"] == 0 and stats["protocol_errors"] == 0
+    adapter.close_serial()
+
+def test_emulator_reports_corrupted_frames():
+    board = ESP32Emulator(binary_support=True)
+    board.binary = True
+    frame = bytearray(encode_frame(4, [(OP_THROTTLE, bytes([10]))]))
+    frame[-2] ^= 0xFF
+    board.write(bytes(frame))
+    (_, body), = FrameDecoder().feed(board.read(board.in_waiting))
+    assert decode_commands(body)[0][0] == OP_ACK
+    assert decode_commands(body)[0][1][1] != ACK_OK
+    assert board.throttle == 0